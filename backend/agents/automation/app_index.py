@@ -0,0 +1,351 @@
+import os
+import json
+import time
+from glob import glob
+from fnmatch import fnmatch
+from collections import OrderedDict
+import numpy as np
+from rapidfuzz.process import cdist
+from rapidfuzz.fuzz import ratio
+from rapidfuzz.utils import default_process
+from utils.logger import span
+
+
+# Common Linux application paths
+DESKTOP_PATHS = [
+    "/usr/share/applications/*.desktop",                    # System-wide applications
+    "/usr/local/share/applications/*.desktop",              # Local system applications
+    "~/.local/share/applications/*.desktop",                # User applications
+    "/var/lib/snapd/desktop/applications/*.desktop",        # Snap applications
+    "/var/lib/flatpak/exports/share/applications/*.desktop", # Flatpak applications
+    "~/.local/share/flatpak/exports/share/applications/*.desktop", # User Flatpak applications
+    "/opt/*/share/applications/*.desktop",                  # Applications in /opt
+    "/usr/share/applications/kde4/*.desktop",               # KDE4 applications
+    "/usr/share/applications/kde5/*.desktop",               # KDE5 applications
+    "/usr/share/applications/gnome/*.desktop",              # GNOME applications
+    "/usr/share/applications/xfce4/*.desktop",              # XFCE applications
+    "/snap/*/current/meta/gui/*.desktop",                   # Snap applications (alternative path)
+]
+
+CACHE_VERSION = 4
+
+# How much a match on each desktop field counts towards a candidate's score
+FIELD_WEIGHTS = {
+    "name": 1.0,
+    "localized_name": 1.0,
+    "action": 0.95,
+    "generic_name": 0.9,
+    "keyword": 0.85,
+}
+
+
+def default_cache_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "aura", "app_index.json")
+
+
+def parse_desktop_file(path):
+    """
+    Parse the searchable fields of a .desktop file.
+
+    Returns a dict with the [Desktop Entry] name, exec (the executable),
+    exec_line (the full Exec value, field codes included), workdir,
+    terminal, localized names, generic names, keywords and any
+    [Desktop Action ...] sections, or None if the file has no name or exec.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            lines = f.readlines()
+    except (IOError, PermissionError) as e:
+        print(f"Warning: Could not read {path}: {e}")
+        return None
+    app = {"name": None, "exec": None, "exec_line": None, "workdir": None, "terminal": False,
+           "localized_names": [], "generic_names": [], "keywords": [], "actions": []}
+    section, action = None, None
+    for line in lines:
+        line = line.strip()
+        if line.startswith("["):
+            section = line[1:-1]
+            action = None
+            if section.startswith("Desktop Action "):
+                action = {"id": section[len("Desktop Action "):], "name": None, "exec": None, "exec_line": None}
+                app["actions"].append(action)
+            continue
+        key, sep, value = line.partition("=")
+        if not sep or line.startswith("#"):
+            continue
+        key, value = key.strip(), value.strip()
+        base_key = key.split("[", 1)[0]
+        if action is not None:
+            if key == "Name":
+                action["name"] = value.lower()
+            elif key == "Exec":
+                action["exec"] = value.split(" ")[0]
+                action["exec_line"] = value
+        elif section == "Desktop Entry":
+            if key == "Name" and app["name"] is None:
+                app["name"] = value.lower()
+            elif base_key == "Name" and key != "Name":
+                app["localized_names"].append(value.lower())
+            elif base_key == "GenericName":
+                app["generic_names"].append(value.lower())
+            elif base_key == "Keywords":
+                app["keywords"].extend(k.strip().lower() for k in value.split(";") if k.strip())
+            elif key == "Exec" and app["exec"] is None:
+                app["exec"] = value.split(" ")[0]
+                app["exec_line"] = value
+            elif key == "Path":
+                app["workdir"] = value or None
+            elif key == "Terminal":
+                app["terminal"] = value.lower() == "true"
+    app["actions"] = [a for a in app["actions"] if a["name"] and a["exec"]]
+    if app["name"] and app["exec"]:
+        return app
+    return None
+
+
+class _QueryCache:
+    """Small LRU of resolved queries, cleared whenever the index changes"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class AppIndex:
+    """
+    Persistent index of installed desktop applications.
+
+    The index is cached on disk together with the mtime of every scanned
+    directory and file. A refresh only re-lists directories whose mtime
+    changed and only re-parses files that are new or modified, so after the
+    first build a lookup costs a handful of stat calls plus one bulk fuzzy
+    match over precomputed, normalized fields. Package managers and most
+    editors replace .desktop files by rename, which bumps the directory mtime.
+    """
+
+    def __init__(self, desktop_paths=None, cache_path=None, check_interval=2.0):
+        self.desktop_paths = [os.path.expanduser(p) for p in (desktop_paths or DESKTOP_PATHS)]
+        self.cache_path = cache_path or default_cache_path()
+        self.check_interval = check_interval  # Seconds between mtime checks on lookup
+        self._dirs = {}     # directory -> mtime
+        self._files = {}    # directory -> {desktop file -> {"mtime", "app": parse_desktop_file() result or None}}
+        self._dir_rank = {} # directory -> position of its pattern in desktop_paths
+        self._last_check = 0.0
+        self._apps = {}
+        self._targets = []  # Launchable entries: apps and their desktop actions
+        self._choices = []  # Normalized searchable fields, grouped by target
+        self._choice_weights = np.zeros(0, dtype=np.float32)
+        self._target_starts = np.zeros(0, dtype=np.intp)
+        self._query_cache = _QueryCache()
+        self.generation = 0 # Bumped whenever the searchable targets are rebuilt
+        self.stats = {"refreshes": 0, "files_parsed": 0}
+        self._load_cache()
+        self.refresh(force=True)
+
+    @property
+    def apps(self):
+        """Mapping of lowercase app name to executable"""
+        return self._apps
+
+    def _directories(self):
+        """Directories the desktop path patterns currently expand to"""
+        dirs = {}
+        for rank, pattern in enumerate(self.desktop_paths):
+            dir_pattern, file_pattern = os.path.split(pattern)
+            for directory in glob(dir_pattern):
+                self._dir_rank.setdefault(directory, rank)
+                dirs.setdefault(directory, []).append(file_pattern)
+        return dirs
+
+    def refresh(self, force=False):
+        """Re-scan changed directories; returns True if the index changed"""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        self.stats["refreshes"] += 1
+
+        changed = False
+        current_dirs = self._directories()
+        for directory in list(self._dirs):
+            if directory not in current_dirs:
+                del self._dirs[directory]
+                changed |= self._files.pop(directory, None) is not None
+        for directory, file_patterns in current_dirs.items():
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                continue
+            if self._dirs.get(directory) == mtime:
+                continue
+            self._dirs[directory] = mtime
+            changed |= self._rescan_directory(directory, file_patterns)
+
+        if changed or not self._targets:
+            self._rebuild_search()
+        if changed:
+            self._save_cache()
+        return changed
+
+    def _rescan_directory(self, directory, file_patterns):
+        old_files = self._files.get(directory, {})
+        files = {}
+        changed = False
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if not any(fnmatch(entry.name, pattern) for pattern in file_patterns):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            cached = old_files.get(entry.path)
+            if cached is not None and cached["mtime"] == mtime:
+                files[entry.path] = cached
+                continue
+            files[entry.path] = {"mtime": mtime, "app": parse_desktop_file(entry.path)}
+            self.stats["files_parsed"] += 1
+            changed = True
+        changed |= len(files) != len(old_files) or files.keys() != old_files.keys()
+        self._files[directory] = files
+        return changed
+
+    def _rebuild_search(self):
+        apps = {}
+        targets = {}
+        # Same order as a full scan, so later desktop paths win on duplicate names
+        rank = lambda directory: (self._dir_rank.get(directory, len(self.desktop_paths)), directory)
+        for directory in sorted(self._files, key=rank):
+            files = self._files[directory]
+            for path in sorted(files):
+                app = files[path]["app"]
+                if app is None:
+                    continue
+                apps[app["name"]] = app["exec"]
+                fields = [(app["name"], FIELD_WEIGHTS["name"])]
+                fields += [(name, FIELD_WEIGHTS["localized_name"]) for name in app["localized_names"]]
+                fields += [(name, FIELD_WEIGHTS["generic_name"]) for name in app["generic_names"]]
+                fields += [(keyword, FIELD_WEIGHTS["keyword"]) for keyword in app["keywords"]]
+                launch = {"workdir": app["workdir"], "terminal": app["terminal"], "path": path}
+                targets[(app["name"], None)] = (
+                    dict(launch, name=app["name"], exec=app["exec"], exec_line=app["exec_line"], action=None), fields
+                )
+                for action in app["actions"]:
+                    targets[(app["name"], action["id"])] = (
+                        dict(launch, name=app["name"], exec=action["exec"], exec_line=action["exec_line"], action=action["name"]),
+                        [(f"{app['name']} {action['name']}", FIELD_WEIGHTS["action"]), (action["name"], FIELD_WEIGHTS["action"])]
+                    )
+        self._apps = apps
+
+        # Flatten every searchable field into one choice list, grouped by target
+        # so per-target maxima are a single reduceat over the score matrix
+        self._targets, choices, weights, starts = [], [], [], []
+        for target, fields in targets.values():
+            starts.append(len(choices))
+            self._targets.append(target)
+            for text, weight in fields:
+                choices.append(default_process(text))
+                weights.append(weight)
+        self._choices = choices
+        self._choice_weights = np.asarray(weights, dtype=np.float32)
+        self._target_starts = np.asarray(starts, dtype=np.intp)
+        self._query_cache.clear()
+        self.generation += 1
+
+    def resolve_many(self, queries, limit=3, score_cutoff=70):
+        """
+        Ranked candidates for several queries in one pass.
+
+        Every query is scored against every indexed field at once with
+        rapidfuzz's cdist; each candidate is a dict with name, exec,
+        exec_line, workdir, terminal, action (None for the main entry), path
+        and score, best first.
+        """
+        self.refresh()
+        with span("app_lookup"):
+            normalized = [default_process(query) for query in queries]
+            resolved = {}
+            for query in normalized:
+                cached = self._query_cache.get((query, limit, score_cutoff))
+                if cached is not None:
+                    resolved[query] = cached
+            missing = [query for query in dict.fromkeys(normalized) if query not in resolved]
+            if missing:
+                if self._targets:
+                    scores = cdist(missing, self._choices, scorer=ratio, processor=None, dtype=np.uint8, workers=-1)
+                    weighted = scores.astype(np.float32) * self._choice_weights
+                    best = np.maximum.reduceat(weighted, self._target_starts, axis=1)
+                for row, query in enumerate(missing):
+                    resolved[query] = self._rank(best[row], limit, score_cutoff) if self._targets else []
+                    self._query_cache.put((query, limit, score_cutoff), resolved[query])
+            return [resolved[query] for query in normalized]
+
+    def _rank(self, target_scores, limit, score_cutoff):
+        count = min(limit, len(target_scores))
+        if count <= 0:
+            return []
+        top = np.argpartition(-target_scores, count - 1)[:count]
+        top = top[np.argsort(-target_scores[top], kind="stable")]
+        return [
+            dict(self._targets[i], score=float(target_scores[i]))
+            for i in top if target_scores[i] >= score_cutoff
+        ]
+
+    def match(self, query, score_cutoff=70):
+        """Best (name, score, exec) for query, or None below score_cutoff"""
+        candidates = self.resolve_many([query], limit=1, score_cutoff=score_cutoff)[0]
+        if not candidates:
+            return None
+        best = candidates[0]
+        return best["name"], best["score"], best["exec"]
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cache.get("version") != CACHE_VERSION or cache.get("desktop_paths") != self.desktop_paths:
+            return
+        self._dirs = cache["dirs"]
+        self._files = cache["files"]
+
+    def _save_cache(self):
+        cache = {
+            "version": CACHE_VERSION,
+            "desktop_paths": self.desktop_paths,
+            "dirs": self._dirs,
+            "files": self._files,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(cache, separators=(",", ":")))
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write app index cache: {e}")
@@ -1,75 +1,51 @@
-import os
-from glob import glob
 import subprocess
-from rapidfuzz.process import extractOne
-from rapidfuzz.fuzz import ratio
+from .app_index import AppIndex
+from .workspace import WorkspaceLauncher
+
+
+_app_index = None
+_launcher = None
+
+
+def get_app_index():
+    """Shared app index, built (or loaded from its disk cache) on first use"""
+    global _app_index
+    if _app_index is None:
+        _app_index = AppIndex()
+    return _app_index
 
 
 def get_desktop_apps():
-    # Common Linux application paths
-    desktop_paths = [
-        "/usr/share/applications/*.desktop",                    # System-wide applications
-        "/usr/local/share/applications/*.desktop",              # Local system applications
-        "~/.local/share/applications/*.desktop",                # User applications
-        "/var/lib/snapd/desktop/applications/*.desktop",        # Snap applications
-        "/var/lib/flatpak/exports/share/applications/*.desktop", # Flatpak applications
-        "~/.local/share/flatpak/exports/share/applications/*.desktop", # User Flatpak applications
-        "/opt/*/share/applications/*.desktop",                  # Applications in /opt
-        "/usr/share/applications/kde4/*.desktop",               # KDE4 applications
-        "/usr/share/applications/kde5/*.desktop",               # KDE5 applications
-        "/usr/share/applications/gnome/*.desktop",              # GNOME applications
-        "/usr/share/applications/xfce4/*.desktop",              # XFCE applications
-        "/snap/*/current/meta/gui/*.desktop",                   # Snap applications (alternative path)
-    ]
-    
-    # Expand all paths and collect desktop files
-    desktop_files = []
-    for path in desktop_paths:
-        expanded_path = os.path.expanduser(path)
-        found_files = glob(expanded_path)
-        if found_files:
-            print(f"Found files in {expanded_path}:")
-        desktop_files.extend(found_files)
-    
-    apps = {}
-    for file in desktop_files:
-        try:
-            with open(file, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-            name, exec_cmd = None, None
-            for line in lines:
-                if line.startswith("Name="):
-                    name = line[5:].strip().lower()
-                if line.startswith("Exec="):
-                    exec_cmd = line[5:].strip().split(" ")[0]
-            if name and exec_cmd:
-                apps[name] = exec_cmd
-        except (IOError, PermissionError) as e:
-            print(f"Warning: Could not read {file}: {e}")
-            continue
-            
-    return apps
+    return get_app_index().apps
+
+
+def resolve_apps(app_names, limit=3, score_cutoff=70):
+    """Ranked launch candidates for several app names in one scoring pass"""
+    return get_app_index().resolve_many(app_names, limit=limit, score_cutoff=score_cutoff)
+
+def is_installed_app(name, score_cutoff=70):
+    """Whether name resolves to an installed app (what open_app would launch)"""
+    return get_app_index().match(name, score_cutoff=score_cutoff) is not None
+
+def get_workspace_launcher():
+    """Shared workspace launcher; its launch plans and environment are reused across commands"""
+    global _launcher
+    if _launcher is None:
+        _launcher = WorkspaceLauncher(index=get_app_index())
+    return _launcher
+
 
 def open_app(app_name):
-    apps = get_desktop_apps()
-    app = extractOne(app_name, apps.keys(), scorer=ratio, score_cutoff=70)
-    if app:
-        matched_name, score, _ = app
-        print(f"Matched '{app_name}' to '{matched_name}' with score {score}")
-        
-        # Set up environment variables to reduce warnings
-        env = os.environ.copy()
-        env.update({
-            'GTK_MODULES': '',  # Disable GTK modules to reduce warnings
-            'QT_LOGGING_RULES': '*.debug=false',  # Reduce Qt debug output
-            'QT_ACCESSIBILITY': '0',  # Disable accessibility to reduce warnings
-        })
-        
+    launcher = get_workspace_launcher()
+    entry = launcher.plan_apps([app_name])[0]
+    if entry["argv"]:
+        print(f"Matched '{app_name}' to '{entry['name']}'")
         try:
-            # Use subprocess.Popen with environment variables and redirect stderr
-            process = subprocess.Popen(
-                [apps[matched_name]],
-                env=env,
+            # Use subprocess.Popen with the shared launch environment and redirect output
+            subprocess.Popen(
+                entry["argv"],
+                env=launcher.env,
+                cwd=entry["cwd"],
                 stderr=subprocess.DEVNULL,  # Suppress error messages
                 stdout=subprocess.DEVNULL,  # Suppress output
                 start_new_session=True  # Run in new session to prevent terminal from being affected
@@ -78,9 +54,17 @@ def open_app(app_name):
         except Exception as e:
             print(f"Error launching application: {e}")
             return False
+    elif entry.get("error"):
+        print(f"Error launching application: {entry['error']}")
+        return False
     else:
         print(f"Could not find application: {app_name}")
         return False
 
+
+async def launch_workspace(profile):
+    """Launch every app of a named workspace profile concurrently; per-app status and timing"""
+    return await get_workspace_launcher().launch(profile)
+
 # open_app("telegrm")
 # get_desktop_apps()
\ No newline at end of file
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import shlex
+import shutil
+import asyncio
+import subprocess
+
+
+# Applied to every launched app to keep toolkit warnings off the terminal
+LAUNCH_ENV = {
+    'GTK_MODULES': '',                    # Disable GTK modules to reduce warnings
+    'QT_LOGGING_RULES': '*.debug=false',  # Reduce Qt debug output
+    'QT_ACCESSIBILITY': '0',              # Disable accessibility to reduce warnings
+}
+
+# Field codes that expand to files or URLs; nothing is passed on launch
+FILE_FIELD_CODES = {"%f", "%F", "%u", "%U"}
+# %i (icon) and the deprecated codes, dropped as the index keeps no Icon key
+DROPPED_FIELD_CODES = {"%i", "%d", "%D", "%n", "%N", "%v", "%m"}
+
+TERMINALS = ["x-terminal-emulator", "gnome-terminal", "konsole", "xfce4-terminal", "kitty", "xterm"]
+
+
+def launch_env(base=None):
+    """Environment for launched apps: base (default os.environ) plus LAUNCH_ENV"""
+    env = dict(os.environ if base is None else base)
+    env.update(LAUNCH_ENV)
+    return env
+
+
+def expand_exec(exec_line, name=None, desktop_path=None):
+    """
+    argv for a desktop entry's Exec line.
+
+    The line is split with shell-style quoting (a superset of the spec's
+    rules); file and URL field codes, %i and deprecated codes are dropped,
+    %c becomes the app name, %k the .desktop path and %% a literal percent
+    sign.
+    """
+    argv = []
+    for arg in shlex.split(exec_line):
+        if arg in FILE_FIELD_CODES or arg in DROPPED_FIELD_CODES:
+            continue
+        arg = arg.replace("%%", "\0")
+        arg = arg.replace("%c", name or "").replace("%k", desktop_path or "")
+        for code in FILE_FIELD_CODES | DROPPED_FIELD_CODES:
+            arg = arg.replace(code, "")
+        argv.append(arg.replace("\0", "%"))
+    return argv
+
+
+def find_terminal():
+    for terminal in TERMINALS:
+        path = shutil.which(terminal)
+        if path:
+            return path
+    return None
+
+
+class WorkspaceLauncher:
+    """
+    Launches named groups of apps ("coding": editor, terminal, browser).
+
+    A profile is resolved once, in a single AppIndex.resolve_many pass,
+    into a launch plan: for each app its argv (Exec line with field codes
+    expanded), working directory and a shared environment computed up
+    front. Later launches of the profile reuse the plan and only spawn, all
+    apps at once from worker threads. Launched apps are kept until they
+    exit and are reaped on the next launch (or reap()). A plan is rebuilt when
+    the app index has changed since it was made, or when a spawn fails
+    (e.g. the app was uninstalled), in which case that app is retried once
+    against a fresh index.
+    """
+
+    def __init__(self, index=None, profiles_path="data/automation/workspaces.json", profiles=None):
+        self._index = index
+        self.profiles_path = profiles_path
+        self.profiles = dict(profiles) if profiles is not None else self._load_profiles()
+        self._env = None
+        self._plans = {}  # profile -> (index generation, plan)
+        self._children = []  # Launched processes not yet reaped
+        self.stats = {"plans_built": 0, "plan_hits": 0, "launched": 0, "failed": 0, "not_found": 0}
+
+    @property
+    def index(self):
+        if self._index is None:
+            from .automation import get_app_index
+            self._index = get_app_index()
+        return self._index
+
+    def _load_profiles(self):
+        if not self.profiles_path:
+            return {}
+        try:
+            with open(self.profiles_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read workspace profiles {self.profiles_path}: {e}")
+            return {}
+
+    def save_profiles(self):
+        if not self.profiles_path:
+            return
+        os.makedirs(os.path.dirname(self.profiles_path) or ".", exist_ok=True)
+        tmp = self.profiles_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.profiles, f, indent=2)
+        os.replace(tmp, self.profiles_path)
+
+    def set_profile(self, name, apps):
+        self.profiles[name] = list(apps)
+        self._plans.pop(name, None)
+        self.save_profiles()
+
+    def invalidate(self, profile=None):
+        """Drop cached plans (all, or one profile's) and the cached environment"""
+        if profile is None:
+            self._plans.clear()
+            self._env = None
+        else:
+            self._plans.pop(profile, None)
+
+    def _plan_entry(self, app_name, candidates):
+        if not candidates or not candidates[0].get("exec_line"):
+            return {"app": app_name, "name": None, "argv": None, "cwd": None}
+        target = candidates[0]
+        try:
+            argv = expand_exec(target["exec_line"], target["name"], target["path"])
+        except ValueError as e:
+            # Unbalanced quotes in the Exec line: this app fails, the rest still launch
+            return {"app": app_name, "name": target["name"], "argv": None, "cwd": None, "error": f"Bad Exec line: {e}"}
+        if target.get("terminal"):
+            terminal = find_terminal()
+            if terminal:
+                argv = [terminal, "-e"] + argv
+        return {"app": app_name, "name": target["name"], "argv": argv, "cwd": target.get("workdir")}
+
+    @property
+    def env(self):
+        """Launch environment, computed once and shared by every spawn"""
+        if self._env is None:
+            self._env = launch_env()
+        return self._env
+
+    def plan_apps(self, app_names):
+        """
+        Launch plan entries ({"app", "name", "argv", "cwd"}) for app names,
+        argv None if unresolved or, with an "error", if its Exec line is unusable
+        """
+        resolved = self.index.resolve_many(app_names, limit=1)
+        self.stats["plans_built"] += 1
+        return [self._plan_entry(app_name, candidates) for app_name, candidates in zip(app_names, resolved)]
+
+    def plan(self, profile):
+        """Cached launch plan for a profile"""
+        cached = self._plans.get(profile)
+        if cached is not None and cached[0] == self.index.generation:
+            self.stats["plan_hits"] += 1
+            return cached[1]
+        if profile not in self.profiles:
+            raise KeyError(f"Unknown workspace profile: {profile}")
+        plan = self.plan_apps(self.profiles[profile])
+        self._plans[profile] = (self.index.generation, plan)
+        return plan
+
+    def reap(self):
+        """Collect launched apps that have exited; returns how many are still running"""
+        self._children = [process for process in self._children if process.poll() is None]
+        return len(self._children)
+
+    async def _spawn(self, entry):
+        started = time.perf_counter()
+        result = {"app": entry["app"], "name": entry["name"], "pid": None}
+        if entry.get("error"):
+            result.update(status="failed", error=entry["error"], seconds=0.0)
+            return result
+        if entry["argv"] is None:
+            result.update(status="not_found", error=None, seconds=0.0)
+            return result
+        try:
+            process = await asyncio.to_thread(
+                subprocess.Popen,
+                entry["argv"],
+                env=self.env,
+                cwd=entry["cwd"],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True  # Run in new session to prevent terminal from being affected
+            )
+        except OSError as e:
+            result.update(status="failed", error=str(e), seconds=time.perf_counter() - started)
+            return result
+        self._children.append(process)
+        result.update(status="launched", error=None, pid=process.pid, seconds=time.perf_counter() - started)
+        return result
+
+    async def launch_apps(self, entries):
+        """Spawn plan entries concurrently; one result dict per entry, in order"""
+        self.reap()
+        return list(await asyncio.gather(*(self._spawn(entry) for entry in entries)))
+
+    async def launch(self, profile):
+        """
+        Launch every app of a profile concurrently.
+
+        Returns one {"app", "name", "status", "pid", "seconds", "error"} per
+        app, status being "launched", "failed" or "not_found".
+        """
+        plan = self.plan(profile)
+        results = await self.launch_apps(plan)
+        failed = [i for i, result in enumerate(results) if result["status"] == "failed"]
+        if failed:
+            # The plan may predate an uninstall or upgrade: re-resolve those apps once
+            self.index.refresh(force=True)
+            self._env = None
+            retry = self.plan_apps([plan[i]["app"] for i in failed])
+            retried = await self.launch_apps(retry)
+            plan = list(plan)
+            for i, entry, result in zip(failed, retry, retried):
+                plan[i], results[i] = entry, result
+            self._plans[profile] = (self.index.generation, plan)
+        for result in results:
+            self.stats[result["status"]] += 1
+        return results
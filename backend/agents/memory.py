@@ -0,0 +1,178 @@
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import json
+import logging
+import asyncio
+import sqlite3
+from mcp.mcp import history_index_fields
+from mcp.ring import entry_epoch
+from mcp.serializer import encode_default, decode_tagged
+
+logger = logging.getLogger(__name__)
+
+# MCP history sections and the table each one is stored in
+SECTION_TABLES = {
+    "recentCommands": "commands",
+    "taskHistory": "tasks",
+    "errorLogs": "errors",
+    "feedbackLoop.user_feedback": "feedback",
+    "compressionLog.compression_history": "compression"
+}
+
+class SQLiteHistoryStore:
+    """
+    SQLite (WAL mode) storage backend for MCP history sections
+    One table per section with indexes on timestamp, type and agent id.
+    Appends are buffered and inserted in batches; every database call runs
+    on a single dedicated thread so the event loop never blocks on SQLite.
+    """
+
+    def __init__(self, db_path: str = "data/mcp/history.db", flush_interval: float = 0.05, max_batch: int = 500):
+        self.db_path = Path(db_path)
+        self.flush_interval = flush_interval  # Max time an entry waits before insert (seconds)
+        self.max_batch = max_batch            # Insert early once this many entries are buffered
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mcp-sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: Dict[str, List[Tuple]] = {}
+        self._pending_count = 0
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def open(self) -> None:
+        """Create the database schema and start the batch insert task"""
+        if self._conn is None:
+            await self._run(self._open_sync)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    def _open_sync(self) -> None:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for table in SECTION_TABLES.values():
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "id INTEGER PRIMARY KEY, ts REAL NOT NULL, type TEXT, agent_id TEXT, entry TEXT NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_ts ON {table}(ts)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_type_ts ON {table}(type, ts)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_agent_ts ON {table}(agent_id, ts)")
+        conn.commit()
+        self._conn = conn
+
+    async def close(self) -> None:
+        """Insert anything still buffered and close the database"""
+        if self._flusher is not None:
+            self._closing = True
+            self._wakeup.set()
+            await self._flusher
+            self._flusher = None
+            self._closing = False
+        await self.flush()
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+    def append(self, section: str, entry: Dict[str, Any]) -> None:
+        """Buffer a history entry for the next batched insert"""
+        entry_type, agent_id = history_index_fields(section, entry)
+        row = (entry_epoch(entry), entry_type, agent_id, json.dumps(entry, default=encode_default))
+        self._pending.setdefault(SECTION_TABLES[section], []).append(row)
+        self._pending_count += 1
+        if self._pending_count >= self.max_batch:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Insert all buffered entries in one transaction"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending, self._pending_count = self._pending, {}, 0
+            await self._run(self._insert_sync, pending)
+
+    def _insert_sync(self, pending: Dict[str, List[Tuple]]) -> None:
+        with self._conn:
+            for table, rows in pending.items():
+                self._conn.executemany(
+                    f"INSERT INTO {table} (ts, type, agent_id, entry) VALUES (?, ?, ?, ?)", rows
+                )
+
+    async def clear(self, section: str) -> None:
+        """Delete every stored entry of a section"""
+        await self.flush()
+        table = SECTION_TABLES[section]
+
+        def _clear():
+            with self._conn:
+                self._conn.execute(f"DELETE FROM {table}")
+
+        await self._run(_clear)
+
+    async def recent(self, section: str, n: int = 10) -> List[Dict[str, Any]]:
+        """The n most recent entries of a section, oldest first"""
+        entries = await self.query(section, limit=n)
+        entries.reverse()
+        return entries
+
+    async def query(
+        self,
+        section: str,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        entry_type: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Filtered, paginated history lookup, newest first (timestamps are epoch seconds)"""
+        await self.flush()
+        clauses, params = [], []
+        for column, op, value in (
+            ("ts", ">=", since), ("ts", "<", until), ("type", "=", entry_type), ("agent_id", "=", agent_id)
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        # The statement text only varies with the filter combination, so it stays in the statement cache
+        sql = f"SELECT entry FROM {SECTION_TABLES[section]}{where} ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?"
+        params.extend((limit, offset))
+
+        def _select():
+            return [json.loads(row[0], object_hook=decode_tagged) for row in self._conn.execute(sql, params)]
+
+        return await self._run(_select)
+
+    async def count(self, section: str, since: Optional[float] = None) -> int:
+        """Number of stored entries in a section"""
+        await self.flush()
+        table = SECTION_TABLES[section]
+        if since is None:
+            sql, params = f"SELECT COUNT(*) FROM {table}", ()
+        else:
+            sql, params = f"SELECT COUNT(*) FROM {table} WHERE ts >= ?", (since,)
+        return await self._run(lambda: self._conn.execute(sql, params).fetchone()[0])
+
+    async def _flush_loop(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._closing:
+                break
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"History batch insert failed: {e}")
@@ -0,0 +1,110 @@
+"""
+open_app resolution cost over a synthetic tree of .desktop files: a full
+glob + parse per call (the previous get_desktop_apps) versus the cached
+AppIndex.
+
+Usage (from backend/): python benchmarks/app_index_bench.py --files 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from glob import glob
+from pathlib import Path
+
+from rapidfuzz.fuzz import ratio
+from rapidfuzz.process import extractOne
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from agents.automation.app_index import AppIndex
+
+WORDS = ["office", "studio", "player", "editor", "viewer", "manager", "browser", "terminal", "monitor", "mail"]
+
+
+def build_tree(root: Path, files: int, dirs: int = 12) -> list:
+    patterns = []
+    for d in range(dirs):
+        directory = root / f"share{d}" / "applications"
+        directory.mkdir(parents=True)
+        patterns.append(str(directory / "*.desktop"))
+    for i in range(files):
+        name = f"{WORDS[i % len(WORDS)]} {WORDS[(i // len(WORDS)) % len(WORDS)]} {i}"
+        content = (
+            "[Desktop Entry]\nType=Application\n"
+            f"Name={name}\nGenericName=Application {i}\nComment=Synthetic entry {i}\n"
+            f"Exec=/usr/bin/app{i} %U\nIcon=app{i}\nCategories=Utility;\n"
+        )
+        (root / f"share{i % dirs}" / "applications" / f"app{i}.desktop").write_text(content)
+    return patterns
+
+
+def legacy_lookup(patterns: list, query: str):
+    """The previous get_desktop_apps + extractOne, once per open_app call"""
+    apps = {}
+    for pattern in patterns:
+        for path in glob(pattern):
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.readlines()
+            name, exec_cmd = None, None
+            for line in lines:
+                if line.startswith("Name="):
+                    name = line[5:].strip().lower()
+                if line.startswith("Exec="):
+                    exec_cmd = line[5:].strip().split(" ")[0]
+            if name and exec_cmd:
+                apps[name] = exec_cmd
+    return extractOne(query, apps.keys(), scorer=ratio, score_cutoff=70)
+
+
+def timed(fn, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(files: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        patterns = build_tree(root / "apps", files)
+        cache_path = str(root / "cache" / "app_index.json")
+        query = "studio editr 421"
+
+        legacy_ms = timed(lambda: legacy_lookup(patterns, query), 3)
+        cold_ms = timed(lambda: AppIndex(patterns, cache_path, check_interval=0))
+        warm_start_ms = timed(lambda: AppIndex(patterns, cache_path, check_interval=0))
+        index = AppIndex(patterns, cache_path, check_interval=0)
+        counter = iter(range(10**9))
+        lookup_ms = timed(lambda: index.match(f"studio editr {next(counter)}"), 50)
+        cached_ms = timed(lambda: index.match(query), 50)
+
+        # Workspace setup: five apps, one open_app each versus one batch
+        workspace = ["office studio 12", "terminal mail 7", "browser viewer 901", "player editor 33", "monitor office 4"]
+        workspace_legacy_ms = timed(lambda: [legacy_lookup(patterns, q) for q in workspace])
+        index._query_cache.clear()
+        workspace_batch_ms = timed(lambda: index.resolve_many(workspace))
+
+        # One package update: a single new file in one directory
+        new_file = root / "apps" / "share0" / "applications" / "new.desktop"
+        new_file.write_text("[Desktop Entry]\nName=Fresh Install\nExec=fresh\n")
+        os.utime(new_file.parent)
+        refresh_ms = timed(lambda: index.match("fresh install"))
+
+    print(f"{files} desktop files")
+    print(f"legacy glob + parse per open_app : {legacy_ms:9.2f} ms")
+    print(f"index cold build (no cache)      : {cold_ms:9.2f} ms")
+    print(f"index start from disk cache      : {warm_start_ms:9.2f} ms")
+    print(f"index lookup (mtime check+match) : {lookup_ms:9.2f} ms")
+    print(f"index lookup, LRU hit            : {cached_ms:9.2f} ms")
+    print(f"5-app workspace, legacy per app  : {workspace_legacy_ms:9.2f} ms")
+    print(f"5-app workspace, resolve_many    : {workspace_batch_ms:9.2f} ms")
+    print(f"lookup after one file changed    : {refresh_ms:9.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=5000)
+    args = parser.parse_args()
+    main(args.files)
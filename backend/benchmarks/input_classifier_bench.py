@@ -0,0 +1,89 @@
+"""
+Classification latency of the local command matcher per tier (exact phrase,
+keyword pattern, fuzzy phrase, miss) as the command map grows.
+
+A synthetic command map is generated with the given number of phrases and a
+tenth as many keyword patterns; p50/p99 are per classify() call.
+
+Usage (from backend/): python benchmarks/input_classifier_bench.py --sizes 1000 5000 10000
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from supervisor.input_classifier import CommandMatcher
+
+WORDS = (
+    "open close show play pause mail music browser window file folder note timer alarm weather news "
+    "volume screen light calendar meeting report photo video document message reminder task project"
+).split()
+
+
+def synthetic_map(phrases: int, rng: random.Random) -> dict:
+    commands = []
+    seen = set()
+    while len(seen) < phrases:
+        phrase = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 6))) + f" {len(seen)}"
+        seen.add(phrase)
+    phrase_list = sorted(seen)
+    for i in range(0, phrases, 5):
+        commands.append({"id": f"c{i}", "phrases": phrase_list[i:i + 5], "response": "ok"})
+    for i in range(phrases // 10):
+        commands.append({"id": f"p{i}", "patterns": [f"kw{i} {rng.choice(WORDS)}"], "action": {"name": "x"}})
+    return {"version": 1, "commands": commands}, phrase_list
+
+
+def typo(phrase: str, rng: random.Random) -> str:
+    i = rng.randrange(len(phrase) - 1)
+    return phrase[:i] + phrase[i + 1] + phrase[i] + phrase[i + 2:]
+
+
+def measure(matcher: CommandMatcher, queries: list) -> tuple:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        matcher.classify(query)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main(sizes: list, queries: int) -> None:
+    rng = random.Random(7)
+    print(f"{'phrases':>8}  {'tier':>8}  {'p50 (us)':>9}  {'p99 (us)':>9}  matched")
+    for size in sizes:
+        command_map, phrases = synthetic_map(size, rng)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "command_map.json"
+            path.write_text(json.dumps(command_map))
+            start = time.perf_counter()
+            matcher = CommandMatcher(str(path), check_interval=3600)
+            compile_ms = (time.perf_counter() - start) * 1000
+            patterns = [c["patterns"][0] for c in command_map["commands"] if "patterns" in c]
+            workloads = {
+                "exact": [rng.choice(phrases).upper() + "!" for _ in range(queries)],
+                "pattern": [f"please {rng.choice(patterns)} the thing" for _ in range(queries)],
+                "fuzzy": [typo(rng.choice(phrases), rng) for _ in range(queries)],
+                "miss": [f"summarize the article about {rng.random()}" for _ in range(queries)],
+            }
+            for tier, workload in workloads.items():
+                before = dict(matcher.stats)
+                p50, p99 = measure(matcher, workload)
+                matched = matcher.stats[tier if tier != "miss" else "misses"] - before[tier if tier != "miss" else "misses"]
+                print(f"{size:>8}  {tier:>8}  {p50:>9.1f}  {p99:>9.1f}  {matched}/{queries}")
+            print(f"{'':>8}  compile {compile_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.sizes, args.queries)
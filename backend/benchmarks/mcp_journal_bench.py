@@ -0,0 +1,78 @@
+"""
+Compare MCP persistence strategies: full context.json rewrite per event
+versus the append-only journal with group commits.
+
+Usage (from backend/): python benchmarks/mcp_journal_bench.py --events 2000
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+
+
+async def bench_full_rewrite(events: int, storage: Path) -> dict:
+    mcp = MCP(storage_path=str(storage))
+    await mcp.initialize()
+    context_file = storage / "context.json"
+    bytes_written = 0
+    start = time.perf_counter()
+    for i in range(events):
+        # Equivalent of one mutator call: apply, then rewrite the whole file
+        mcp._apply_command({"entry": {"timestamp": datetime.now().isoformat(), "command": f"cmd-{i}", "result": {"ok": True}}})
+        await mcp.save_context()
+        bytes_written += context_file.stat().st_size
+    elapsed = time.perf_counter() - start
+    return {"events_per_sec": events / elapsed, "bytes_per_event": bytes_written / events}
+
+
+async def bench_journal(events: int, storage: Path) -> dict:
+    mcp = MCP(storage_path=str(storage), journal_mode=True)
+    await mcp.initialize()
+    snapshot_bytes = 0
+    compact = mcp.compact
+
+    async def counting_compact():
+        nonlocal snapshot_bytes
+        await compact()
+        snapshot_bytes += (storage / "context.json").stat().st_size
+
+    mcp.journal._on_compact = counting_compact
+    start = time.perf_counter()
+    for i in range(events):
+        await mcp.add_command(f"cmd-{i}", {"ok": True})
+        if i % 50 == 0:
+            # Yield so the group-commit task gets scheduled like it would under a server
+            await asyncio.sleep(0)
+    await mcp.close()
+    elapsed = time.perf_counter() - start
+    total = mcp.journal.stats["bytes_written"] + snapshot_bytes
+    return {
+        "events_per_sec": events / elapsed,
+        "bytes_per_event": total / events,
+        "batches": mcp.journal.stats["batches"],
+        "compactions": mcp.journal.stats["compactions"]
+    }
+
+
+async def main(events: int) -> None:
+    with tempfile.TemporaryDirectory() as full_dir, tempfile.TemporaryDirectory() as journal_dir:
+        full = await bench_full_rewrite(events, Path(full_dir))
+        journal = await bench_journal(events, Path(journal_dir))
+    print(f"events: {events}")
+    print(f"full rewrite : {full['events_per_sec']:>10.0f} events/s  {full['bytes_per_event']:>10.0f} bytes/event")
+    print(f"journal      : {journal['events_per_sec']:>10.0f} events/s  {journal['bytes_per_event']:>10.0f} bytes/event"
+          f"  ({journal['batches']} batches, {journal['compactions']} compactions)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.events))
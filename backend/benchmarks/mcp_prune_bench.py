@@ -0,0 +1,72 @@
+"""
+Prune cost versus history size: the incremental pruner against the previous
+full-scan algorithm (re-parse every timestamp, rebuild the list).
+
+The simulated clock advances one second per round and one entry is appended
+per round, so exactly one entry crosses the age cutoff each time.
+
+Usage (from backend/): python benchmarks/mcp_prune_bench.py --sizes 1000 10000 100000
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.pruner import ContextPruner
+from mcp.ring import RingBuffer
+
+
+def legacy_prune(history: list, max_age_days: int, max_items: int) -> list:
+    now = datetime.now()
+    kept = []
+    for entry in history:
+        if now - datetime.fromisoformat(entry["timestamp"]) <= timedelta(days=max_age_days):
+            kept.append(entry)
+    return kept[-max_items:]
+
+
+def bench_incremental(size: int, rounds: int) -> float:
+    pruner = ContextPruner()
+    clock = {"now": float(size)}
+    pruner._cutoff = lambda: clock["now"] - size
+    ring = RingBuffer(size * 2)
+    for epoch in range(size):
+        ring.append({"timestamp": None, "n": epoch}, epoch=float(epoch))
+    context = {"recentCommands": ring}
+    elapsed = 0.0
+    for _ in range(rounds):
+        clock["now"] += 1
+        ring.append({"timestamp": None}, epoch=clock["now"])
+        start = time.perf_counter()
+        pruner.prune_in_place(context)
+        elapsed += time.perf_counter() - start
+    assert len(ring) == size
+    return elapsed / rounds
+
+
+def bench_legacy(size: int, rounds: int) -> float:
+    now = datetime.now()
+    history = [{"timestamp": (now - timedelta(seconds=size - i)).isoformat(), "n": i} for i in range(size)]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        legacy_prune(history, 7, size)
+    return (time.perf_counter() - start) / rounds
+
+
+def main(sizes: list, rounds: int) -> None:
+    print(f"{'history':>10}   {'incremental (us)':>16}   {'full scan (us)':>14}")
+    for size in sizes:
+        incremental = bench_incremental(size, rounds)
+        legacy = bench_legacy(size, max(1, rounds // 100))
+        print(f"{size:>10}   {incremental * 1e6:>16.1f}   {legacy * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--rounds", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.sizes, args.rounds)
@@ -0,0 +1,62 @@
+"""
+Soak test for MCP history memory: replay a simulated multi-day command
+stream and sample traced memory per simulated day, for the bounded ring
+buffers versus plain unbounded lists.
+
+Usage (from backend/): python benchmarks/mcp_ring_soak_bench.py --days 8 --interval 2
+"""
+import argparse
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+
+DAY = 24 * 60 * 60
+
+
+def soak(mcp: MCP, days: int, interval: float) -> list:
+    start = datetime.now() - timedelta(days=days)
+    events_per_day = int(DAY / interval)
+    samples = []
+    tracemalloc.start()
+    for day in range(days):
+        for i in range(events_per_day):
+            timestamp = (start + timedelta(seconds=(day * events_per_day + i) * interval)).isoformat()
+            mcp._apply_command({"entry": {"timestamp": timestamp, "command": f"cmd-{i}", "result": {"ok": True}}})
+            if i % 10 == 0:
+                mcp._apply_error({"entry": {"timestamp": timestamp, "error_type": "RuntimeError",
+                                            "error_message": "boom", "context": {}}})
+                mcp._apply_feedback({"entry": {"timestamp": timestamp, "type": "metric",
+                                               "content": "latency", "metadata": {}}})
+        current, _ = tracemalloc.get_traced_memory()
+        samples.append(current)
+    tracemalloc.stop()
+    return samples
+
+
+def main(days: int, interval: float) -> None:
+    with tempfile.TemporaryDirectory() as storage:
+        bounded = soak(MCP(storage_path=storage), days, interval)
+        unbounded_mcp = MCP(storage_path=storage)
+        # Emulate the previous schema of plain, ever-growing lists
+        unbounded_mcp.context["recentCommands"] = []
+        unbounded_mcp.context["errorLogs"] = []
+        unbounded_mcp.context["feedbackLoop"]["user_feedback"] = []
+        unbounded = soak(unbounded_mcp, days, interval)
+    print(f"simulated {days} days, one command every {interval}s")
+    print("day   ring buffers (KiB)   plain lists (KiB)")
+    for day, (ring_bytes, list_bytes) in enumerate(zip(bounded, unbounded), start=1):
+        print(f"{day:>3}   {ring_bytes / 1024:>18.0f}   {list_bytes / 1024:>17.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=8)
+    parser.add_argument("--interval", type=float, default=2.0)
+    args = parser.parse_args()
+    main(args.days, args.interval)
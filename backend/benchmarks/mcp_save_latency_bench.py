@@ -0,0 +1,81 @@
+"""
+Measure how long MCP.save_context blocks the event loop.
+
+A ticker coroutine sleeps for 1 ms in a loop and records how late it wakes up
+while saves run; the lag is time other requests on the loop would have waited.
+The legacy path (serialize + json.dumps on the loop) is reproduced inline.
+
+Usage (from backend/): python benchmarks/mcp_save_latency_bench.py --commands 20000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import aiofiles
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+
+
+async def legacy_save(mcp: MCP) -> None:
+    context_to_save = mcp.context.copy()
+    context_to_save["activeAgents"] = list(context_to_save["activeAgents"])
+    serialized = mcp.serializer.serialize(mcp.pruner.prune(context_to_save))
+    async with aiofiles.open(mcp.storage_path / "context.json", "w") as f:
+        await f.write(json.dumps(serialized, indent=2))
+
+
+async def measure(save, saves: int) -> dict:
+    lags = []
+    running = True
+
+    async def ticker():
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    tick_task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    for _ in range(saves):
+        await save()
+    elapsed = time.perf_counter() - start
+    running = False
+    await tick_task
+    lags.sort()
+    return {
+        "save_ms": elapsed / saves * 1000,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_p99_ms": lags[int(len(lags) * 0.99) - 1] * 1000,
+        "lag_max_ms": lags[-1] * 1000
+    }
+
+
+async def main(commands: int, saves: int) -> None:
+    with tempfile.TemporaryDirectory() as storage:
+        # Lift the history bound so the context really holds every command
+        mcp = MCP(storage_path=storage, history_limits={"recentCommands": {"capacity": commands, "max_age": None}})
+        for i in range(commands):
+            mcp._apply_command({"entry": {"timestamp": datetime.now().isoformat(), "command": f"cmd-{i}", "result": {"ok": True, "n": i}}})
+        legacy = await measure(lambda: legacy_save(mcp), saves)
+        current = await measure(mcp.save_context, saves)
+        await mcp.close()
+    print(f"context: {commands} commands, {saves} saves each")
+    for label, result in (("legacy on-loop", legacy), ("off-loop writer", current)):
+        print(f"{label:<16} save {result['save_ms']:8.1f} ms  loop lag p50 {result['lag_p50_ms']:7.2f} ms"
+              f"  p99 {result['lag_p99_ms']:7.2f} ms  max {result['lag_max_ms']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commands", type=int, default=20000)
+    parser.add_argument("--saves", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.commands, args.saves))
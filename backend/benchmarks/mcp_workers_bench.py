@@ -0,0 +1,102 @@
+"""
+Throughput of one MCP storage directory shared by several worker processes
+(SharedMCP), as uvicorn runs it with --workers N.
+
+Each worker process opens its own SharedMCP on the same directory and, once
+all of them are ready, commits --ops mutations (commands, agent states and
+feedback) as fast as it can, reading its agent's state back after each one.
+Reported throughput is total committed mutations per second of wall time
+across the workers; scaling is relative to a single worker. Commits are
+serialized by the cross-process lock, so the gain from more workers comes
+from the request work done outside it, and is bounded by the core count.
+
+Usage (from backend/): python benchmarks/mcp_workers_bench.py --workers 1 2 4 --ops 500
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.shared import SharedMCP
+
+
+async def _worker(storage: str, worker: int, ops: int, compact_every: int, start) -> dict:
+    mcp = SharedMCP(storage_path=storage, compact_every=compact_every, poll_interval=0)
+    await mcp.initialize()
+    await asyncio.to_thread(start.wait)
+    started = time.perf_counter()
+    for i in range(ops):
+        if i % 10 == 9:
+            await mcp.add_feedback("rating", f"worker {worker} rating {i}", {"worker": worker})
+        elif i % 5 == 4:
+            await mcp.update_agent_state(f"worker-{worker}", {"step": i})
+        else:
+            await mcp.add_command(f"worker {worker} command {i}", {"ok": True}, agent_id=f"worker-{worker}")
+        await mcp.get_agent_state(f"worker-{worker}")
+    elapsed = time.perf_counter() - started
+    await mcp.close()
+    return {"seconds": elapsed, "started": started, "stats": dict(mcp.journal.stats)}
+
+
+def _worker_main(storage: str, worker: int, ops: int, compact_every: int, start, results) -> None:
+    results.put((worker, asyncio.run(_worker(storage, worker, ops, compact_every, start))))
+
+
+def run_workers(storage: str, workers: int, ops: int, compact_every: int = 1000) -> dict:
+    """Run workers processes against storage concurrently; throughput and per-worker journal stats"""
+    ctx = multiprocessing.get_context("spawn")
+    start = ctx.Event()
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_worker_main, args=(storage, worker, ops, compact_every, start, results))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # Workers block on the event after loading, so process start-up is not timed
+    started = time.perf_counter()
+    start.set()
+    collected = dict(results.get(timeout=120) for _ in processes)
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join(timeout=30)
+        if process.exitcode != 0:
+            raise RuntimeError(f"worker process exited with {process.exitcode}")
+    return {
+        "workers": workers,
+        "ops": workers * ops,
+        "seconds": elapsed,
+        "ops_per_sec": workers * ops / elapsed,
+        "stats": [collected[worker]["stats"] for worker in range(workers)]
+    }
+
+
+def main(worker_counts: list, ops: int, compact_every: int) -> None:
+    print(f"{ops} mutations per worker, compaction every {compact_every} records, {os.cpu_count()} CPUs")
+    baseline = None
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            result = run_workers(tmp, workers, ops, compact_every)
+        baseline = baseline or result["ops_per_sec"]
+        compactions = sum(s["compactions"] for s in result["stats"])
+        remote = sum(s["remote_records"] for s in result["stats"])
+        print(
+            f"{workers:>2} workers: {result['ops_per_sec']:9.0f} ops/s  "
+            f"x{result['ops_per_sec'] / baseline:4.2f}  "
+            f"{compactions} compactions, {remote} records applied from other workers"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--ops", type=int, default=500, help="mutations per worker")
+    parser.add_argument("--compact-every", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.workers, args.ops, args.compact_every)
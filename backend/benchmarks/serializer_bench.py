@@ -0,0 +1,79 @@
+"""
+ContextSerializer round-trip benchmark: the recursive serialize/deserialize
+path with indented JSON versus the fast encode/decode path (JSON and msgpack).
+
+Usage (from backend/): python benchmarks/serializer_bench.py
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.serializer import ContextSerializer, msgpack
+
+SIZES = {"small": 10, "medium": 1000, "large": 100_000}
+
+
+def synthetic_context(entries: int) -> dict:
+    now = datetime.now()
+    context = {
+        "userProfile": {"preferences": {"language": "en", "theme": "dark"}, "usage_stats": {"total_commands": entries}},
+        "activeAgents": {f"agent-{i}" for i in range(8)},
+        "agentStates": {f"agent-{i}": {"state": {"step": i}, "last_updated": now.isoformat()} for i in range(8)},
+        "recentCommands": [
+            {"timestamp": (now - timedelta(seconds=i)).isoformat(), "command": f"open app {i}",
+             "result": {"status": "ok", "latency_ms": i % 250}}
+            for i in range(entries)
+        ],
+        "errorLogs": [
+            {"timestamp": now.isoformat(), "error_type": "RuntimeError", "error_message": "boom", "context": {"i": i}}
+            for i in range(entries // 10)
+        ],
+        "system_state": {"last_updated": now, "active_tasks": [], "resource_usage": {}}
+    }
+    return context
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(repeat_budget: int) -> None:
+    serializer = ContextSerializer()
+    print(f"{'size':<8}{'path':<22}{'encode ms':>10}{'decode ms':>10}{'bytes':>12}")
+    for label, entries in SIZES.items():
+        context = synthetic_context(entries)
+        repeat = max(1, repeat_budget // max(entries, 1))
+        legacy_raw = json.dumps(serializer.serialize(dict(context, activeAgents=list(context["activeAgents"]))), indent=2).encode()
+        rows = [(
+            "legacy indented json",
+            timed(lambda: json.dumps(serializer.serialize(dict(context, activeAgents=list(context["activeAgents"]))), indent=2).encode(), repeat),
+            timed(lambda: serializer.deserialize(json.loads(legacy_raw)), repeat),
+            len(legacy_raw)
+        )]
+        for fmt in ("json", "msgpack"):
+            if fmt == "msgpack" and msgpack is None:
+                continue
+            raw = serializer.encode(context, fmt)
+            rows.append((
+                f"encode/decode {fmt}",
+                timed(lambda: serializer.encode(context, fmt), repeat),
+                timed(lambda: serializer.decode(raw, fmt), repeat),
+                len(raw)
+            ))
+        for path, encode_s, decode_s, size in rows:
+            print(f"{label:<8}{path:<22}{encode_s * 1000:>10.3f}{decode_s * 1000:>10.3f}{size:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=int, default=200_000, help="entries processed per measurement")
+    args = parser.parse_args()
+    main(args.budget)
@@ -0,0 +1,106 @@
+"""
+Backend cold start: import time of main, time until /health answers and
+time until every lazily loaded subsystem is warm.
+
+Each run starts a fresh interpreter. Import time is measured in-process
+around `import main`; the server runs under uvicorn from an empty working
+directory (so caches and data files start cold) and /health is polled until
+it answers, then until every subsystem is ready or failed. For comparison,
+"eager" is the sum of the subsystems' load times, which startup would pay
+before the first response if they were built up front.
+
+Usage (from backend/): python benchmarks/startup_bench.py --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).parent.parent
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_seconds() -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def serve_once(timeout: float) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, AURA_MCP_PATH=str(Path(workdir) / "mcp"), AURA_LOG_PATH=str(Path(workdir) / "aura.log"))
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(BACKEND), "--port", str(port), "--log-level", "warning"],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            first_response = warm = None
+            subsystems = {}
+            with httpx.Client(timeout=1.0) as client:
+                while time.perf_counter() - started < timeout:
+                    try:
+                        response = client.get(url)
+                    except httpx.TransportError:
+                        time.sleep(0.005)
+                        continue
+                    now = time.perf_counter() - started
+                    if first_response is None:
+                        first_response = now
+                    subsystems = response.json()["subsystems"]
+                    if all(s["state"] in ("ready", "failed") for s in subsystems.values()):
+                        warm = now
+                        break
+                    time.sleep(0.01)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    if first_response is None:
+        raise RuntimeError(f"server did not answer within {timeout}s")
+    return {
+        "first_response": first_response,
+        "warm": warm,
+        "eager": sum(s["seconds"] or 0.0 for s in subsystems.values()),
+        "subsystems": subsystems
+    }
+
+
+def main(runs: int, timeout: float) -> None:
+    imports = [import_seconds() for _ in range(runs)]
+    serves = [serve_once(timeout) for _ in range(runs)]
+
+    def median(values):
+        values = [v for v in values if v is not None]
+        return statistics.median(values) * 1000 if values else float("nan")
+
+    print(f"{runs} cold starts")
+    print(f"import main              : {median(imports):8.1f} ms")
+    print(f"first /health response   : {median(s['first_response'] for s in serves):8.1f} ms")
+    print(f"all subsystems warm      : {median(s['warm'] for s in serves):8.1f} ms")
+    print(f"eager load (sum of loads): {median(s['eager'] for s in serves):8.1f} ms")
+    for name, status in serves[-1]["subsystems"].items():
+        seconds = status["seconds"]
+        timing = f"{seconds * 1000:8.1f} ms" if seconds is not None else f"{'-':>8}"
+        print(f"  {name:<22} {timing}  {status['state']}{'  ' + status['error'] if status['error'] else ''}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for startup and warm-up")
+    args = parser.parse_args()
+    main(args.runs, args.timeout)
@@ -0,0 +1,255 @@
+"""
+Reproducible benchmark suite for the MCP, serializer and automation hot
+paths, over synthetic contexts and desktop-file trees of several sizes.
+
+Results are written as JSON; with --baseline the run is compared against a
+stored result and cases whose median slowed down by more than --threshold
+are flagged (exit status 1), so the suite can gate CI.
+
+Usage (from backend/):
+    python benchmarks/suite.py --output bench.json
+    python benchmarks/suite.py --sizes small medium --baseline bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from agents.automation.app_index import AppIndex
+from benchmarks.app_index_bench import build_tree
+from benchmarks.serializer_bench import synthetic_context
+from mcp.mcp import MCP, WEEK_SECONDS
+from mcp.pruner import ContextPruner
+from mcp.serializer import ContextSerializer, msgpack
+from utils.logger import registry
+
+RESULTS_VERSION = 1
+SIZES = {"small": 100, "medium": 1000, "large": 10_000}
+CONCURRENCY = (1, 16)
+
+
+def summarize(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "min": ordered[0],
+        "samples": len(ordered)
+    }
+
+
+def repeat_timed(fn, repeat: int, per: int = 1) -> list:
+    """Seconds per call of fn (divided by per, for batched operations)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) / per)
+    return samples
+
+
+def history_limits(entries: int) -> dict:
+    # Large enough that the synthetic history is kept whole
+    return {section: {"capacity": max(entries, 100), "max_age": WEEK_SECONDS}
+            for section in ("recentCommands", "taskHistory", "errorLogs")}
+
+
+async def bench_add_command(entries: int, repeat: int, root: Path) -> dict:
+    """Per-command latency of MCP.add_command with N callers in flight (journal mode)"""
+    results = {}
+    for concurrency in CONCURRENCY:
+        samples = []
+        for run in range(repeat):
+            mcp = MCP(storage_path=str(root / f"add-c{concurrency}-{run}"), journal_mode=True,
+                      history_limits=history_limits(entries))
+            await mcp.initialize()
+            start = time.perf_counter()
+            for first in range(0, entries, concurrency):
+                await asyncio.gather(*(
+                    mcp.add_command(f"open app {i}", {"status": "ok"})
+                    for i in range(first, min(entries, first + concurrency))
+                ))
+            samples.append((time.perf_counter() - start) / entries)
+            await mcp.close()
+        results[f"mcp.add_command.c{concurrency}"] = samples
+    return results
+
+
+async def bench_save_load(entries: int, repeat: int, root: Path) -> dict:
+    """save_context and load_context of a context holding entries commands"""
+    storage = root / "save-load"
+    mcp = MCP(storage_path=str(storage), history_limits=history_limits(entries))
+    now = datetime.now()
+    for i in range(entries):
+        timestamp = (now - timedelta(seconds=entries - i)).isoformat()
+        mcp._apply_command({"entry": {"timestamp": timestamp, "command": f"open app {i}", "result": {"status": "ok"}}})
+        if i % 10 == 0:
+            mcp._apply_error({"entry": {"timestamp": timestamp, "error_type": "RuntimeError",
+                                        "error_message": "boom", "context": {"i": i}}})
+    save = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await mcp.save_context()
+        save.append(time.perf_counter() - start)
+    await mcp.close()
+    load = []
+    for _ in range(repeat):
+        fresh = MCP(storage_path=str(storage), history_limits=history_limits(entries))
+        start = time.perf_counter()
+        await fresh.load_context()
+        load.append(time.perf_counter() - start)
+        assert len(fresh.context["recentCommands"]) == entries
+        await fresh.close()
+    return {"mcp.save_context": save, "mcp.load_context": load}
+
+
+async def bench_prune(entries: int, repeat: int, root: Path) -> dict:
+    pruner = ContextPruner()
+    context = synthetic_context(entries)
+    return {"pruner.prune": repeat_timed(lambda: pruner.prune(context), repeat)}
+
+
+async def bench_serializer(entries: int, repeat: int, root: Path) -> dict:
+    serializer = ContextSerializer()
+    context = synthetic_context(entries)
+    results = {}
+    for fmt in ("json", "msgpack"):
+        if fmt == "msgpack" and msgpack is None:
+            continue
+        results[f"serializer.roundtrip.{fmt}"] = repeat_timed(
+            lambda: serializer.decode(serializer.encode(context, fmt), fmt), repeat
+        )
+    return results
+
+
+async def bench_app_resolution(entries: int, repeat: int, root: Path) -> dict:
+    """open_app name resolution over a tree of entries desktop files"""
+    patterns = build_tree(root / "apps", entries)
+    cache_path = str(root / "apps-cache" / "app_index.json")
+    cold = []
+    for _ in range(repeat):
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        cold.extend(repeat_timed(lambda: AppIndex(patterns, cache_path, check_interval=0), 1))
+    index = AppIndex(patterns, cache_path, check_interval=0)
+    queries = iter(range(10**9))
+    lookups = 20
+    lookup = repeat_timed(lambda: [index.match(f"studio editr {next(queries)}") for _ in range(lookups)], repeat, lookups)
+    return {"app_index.cold_build": cold, "app_index.match": lookup}
+
+
+CASES = {
+    "add_command": bench_add_command,
+    "save_load": bench_save_load,
+    "prune": bench_prune,
+    "serializer": bench_serializer,
+    "app_resolution": bench_app_resolution
+}
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+
+async def run(sizes: list, cases: list, repeat: int) -> dict:
+    # Instrumentation is measured separately (see utils.logger); keep it out of these numbers
+    registry.enabled = False
+    results = {}
+    try:
+        for label in sizes:
+            for name in cases:
+                with tempfile.TemporaryDirectory() as tmp:
+                    measured = await CASES[name](SIZES[label], repeat, Path(tmp))
+                for key, samples in measured.items():
+                    results[f"{key}[{label}]"] = summarize(samples)
+                    print(f"  {key}[{label}]: {results[f'{key}[{label}]']['median'] * 1000:.3f} ms", file=sys.stderr)
+    finally:
+        registry.enabled = True
+    return {"version": RESULTS_VERSION, "meta": metadata(), "results": results}
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.25, min_delta: float = 50e-6) -> list:
+    """
+    (case, baseline median, current median, ratio, status) per case; status
+    is "regression" when the median grew by more than threshold (and by at
+    least min_delta seconds, so timer noise on tiny cases is ignored),
+    "improved" for the mirror case, else "ok", "new" or "missing"
+    """
+    rows = []
+    old, new = baseline["results"], current["results"]
+    for case in sorted(old.keys() | new.keys()):
+        if case not in old or case not in new:
+            rows.append((case, old.get(case, {}).get("median"), new.get(case, {}).get("median"), None,
+                         "new" if case not in old else "missing"))
+            continue
+        before, after = old[case]["median"], new[case]["median"]
+        ratio = after / before if before else float("inf")
+        if after - before > min_delta and ratio > 1 + threshold:
+            status = "regression"
+        elif before - after > min_delta and ratio < 1 / (1 + threshold):
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((case, before, after, ratio, status))
+    return rows
+
+
+def print_comparison(rows: list) -> None:
+    def ms(value):
+        return f"{value * 1000:12.3f}" if value is not None else f"{'-':>12}"
+    print(f"{'case':<44}{'baseline ms':>12}{'current ms':>12}{'ratio':>8}  status")
+    for case, before, after, ratio, status in rows:
+        print(f"{case:<44}{ms(before)}{ms(after)}{ratio if ratio is not None else float('nan'):8.2f}  {status}")
+
+
+def main(args: argparse.Namespace) -> int:
+    current = asyncio.run(run(args.sizes, args.cases, args.repeat))
+    if args.output:
+        Path(args.output).write_text(json.dumps(current, indent=2))
+    if not args.baseline:
+        for case, stats in current["results"].items():
+            print(f"{case:<44}{stats['median'] * 1000:12.3f} ms  (p95 {stats['p95'] * 1000:.3f} ms)")
+        return 0
+    baseline = json.loads(Path(args.baseline).read_text())
+    if baseline.get("version") != RESULTS_VERSION:
+        print(f"Baseline {args.baseline} has an incompatible format", file=sys.stderr)
+        return 2
+    rows = compare(current, baseline, args.threshold)
+    print_comparison(rows)
+    regressions = [row for row in rows if row[4] == "regression"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,296 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from collections import OrderedDict
+from pathlib import Path
+import re
+import json
+import time
+import zlib
+import hashlib
+import logging
+import asyncio
+import numpy as np
+from mcp.writer import write_atomic
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+_WHITESPACE = re.compile(r"\s+")
+_WORD = re.compile(r"\w+")
+_MERSENNE_PRIME = (1 << 31) - 1
+
+Compressor = Callable[[str], Union[str, Awaitable[str]]]
+
+def normalize_prompt(prompt: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation"""
+    return _WHITESPACE.sub(" ", prompt.casefold()).rstrip(".!? ").strip()
+
+def prompt_tokens(normalized: str) -> List[str]:
+    """Words of a normalized prompt, ignoring whitespace and punctuation"""
+    return _WORD.findall(normalized)
+
+def prompt_key(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+class MinHasher:
+    """
+    MinHash signatures over character shingles
+    Jaccard similarity of two shingle sets is estimated by the fraction of
+    equal signature slots; signatures are split into bands for LSH lookup.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 4, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def shingles(self, text: str) -> set:
+        size = self.shingle_size
+        if len(text) <= size:
+            return {text}
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) & _MERSENNE_PRIME for s in self.shingles(text)),
+            dtype=np.uint64
+        )
+        # a * x + b stays below 2**62, so the universal hash never overflows uint64
+        return ((self._a * hashes + self._b) % _MERSENNE_PRIME).min(axis=1).astype(np.uint32)
+
+    @staticmethod
+    def similarity(left: np.ndarray, right: np.ndarray) -> float:
+        return float(np.count_nonzero(left == right)) / len(left)
+
+class CompressionCache:
+    """
+    LRU cache of compressed prompts, persisted to disk
+
+    Lookups first try an exact match on the hash of the normalized prompt.
+    With near_duplicates enabled (off by default), a miss falls back to
+    MinHash LSH: a cached prompt whose estimated shingle similarity reaches
+    similarity_threshold is reused, but only if it has the same words in the
+    same order, differing just in whitespace and punctuation. Similarity
+    alone would hand back the compression of a different prompt ("send it"
+    and "do not send it" score above 0.9). The cache is bounded by entry count and by total
+    characters stored; hit/miss stats are recorded through
+    MCP.update_compression_log when an MCP instance is attached.
+    """
+
+    def __init__(
+        self,
+        path: str = "data/compressor/cache.json",
+        max_entries: int = 2000,
+        max_chars: int = 4_000_000,
+        near_duplicates: bool = False,
+        similarity_threshold: float = 0.9,
+        min_near_length: int = 24,
+        num_perm: int = 64,
+        bands: int = 16,
+        save_every: int = 50,
+        mcp: Optional[Any] = None
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = Path(path)
+        self.max_entries = max_entries              # Maximum number of cached prompts
+        self.max_chars = max_chars                  # Maximum prompt + compression characters kept
+        self.near_duplicates = near_duplicates      # Enable the MinHash near-duplicate tier
+        self.similarity_threshold = similarity_threshold
+        self.min_near_length = min_near_length      # Shorter prompts only ever match exactly
+        self.save_every = save_every                # Persist after this many new entries
+        self.mcp = mcp
+        self._hasher = MinHasher(num_perm)
+        self._bands = bands
+        self._rows = num_perm // bands
+        # key -> {"prompt", "compressed", "seconds", "signature"}, least recently used first
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, bytes], set] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._chars = 0
+        self._unsaved = 0
+        self.stats = {
+            "hits": 0,
+            "near_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "compress_seconds": 0.0,
+            "seconds_saved": 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        rows = self._rows
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self._bands)]
+
+    def _near_eligible(self, normalized: str) -> bool:
+        return self.near_duplicates and len(normalized) >= self.min_near_length
+
+    def lookup(self, prompt: str) -> Tuple[Optional[str], str, float]:
+        """(compressed prompt or None, "hit" | "near_hit" | "miss", similarity)"""
+        normalized = normalize_prompt(prompt)
+        key = prompt_key(normalized)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self._record_hit("hits", entry)
+            return entry["compressed"], "hit", 1.0
+
+        if self._near_eligible(normalized):
+            signature = self._hasher.signature(normalized)
+            best_key, best = None, 0.0
+            candidates = set()
+            for band_key in self._band_keys(signature):
+                candidates |= self._buckets.get(band_key, set())
+            tokens = prompt_tokens(normalized)
+            for candidate in candidates:
+                score = MinHasher.similarity(signature, self._entries[candidate]["signature"])
+                if score > best and prompt_tokens(self._entries[candidate]["prompt"]) == tokens:
+                    best_key, best = candidate, score
+            if best_key is not None and best >= self.similarity_threshold:
+                entry = self._entries[best_key]
+                self._entries.move_to_end(best_key)
+                self._record_hit("near_hits", entry)
+                return entry["compressed"], "near_hit", best
+
+        self.stats["misses"] += 1
+        return None, "miss", 0.0
+
+    def _record_hit(self, kind: str, entry: Dict[str, Any]) -> None:
+        self.stats[kind] += 1
+        self.stats["seconds_saved"] += entry["seconds"]
+
+    def put(self, prompt: str, compressed: str, seconds: float = 0.0) -> None:
+        """Cache the compression of prompt; seconds is what compressing it cost"""
+        normalized = normalize_prompt(prompt)
+        key = prompt_key(normalized)
+        if key in self._entries:
+            self._remove(key)
+        signature = self._hasher.signature(normalized) if self._near_eligible(normalized) else None
+        self._entries[key] = {
+            "prompt": normalized,
+            "compressed": compressed,
+            "seconds": seconds,
+            "signature": signature
+        }
+        if signature is not None:
+            for band_key in self._band_keys(signature):
+                self._buckets.setdefault(band_key, set()).add(key)
+        self._chars += len(normalized) + len(compressed)
+        self._unsaved += 1
+        while self._entries and (len(self._entries) > self.max_entries or self._chars > self.max_chars):
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._chars -= len(entry["prompt"]) + len(entry["compressed"])
+        if entry["signature"] is not None:
+            for band_key in self._band_keys(entry["signature"]):
+                bucket = self._buckets.get(band_key)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._buckets[band_key]
+
+    async def get_or_compress(self, prompt: str, compress: Compressor) -> str:
+        """
+        Compressed form of prompt, calling compress only on a cache miss
+        compress may be a coroutine function or a blocking callable (run in a
+        thread); concurrent misses for the same prompt share one call.
+        """
+        compressed, event, similarity = self.lookup(prompt)
+        if compressed is None:
+            key = prompt_key(normalize_prompt(prompt))
+            pending = self._inflight.get(key)
+            if pending is not None:
+                compressed = await asyncio.shield(pending)
+            else:
+                pending = self._inflight[key] = asyncio.get_running_loop().create_future()
+                try:
+                    started = time.perf_counter()
+                    if asyncio.iscoroutinefunction(compress):
+                        compressed = await compress(prompt)
+                    else:
+                        compressed = await asyncio.to_thread(compress, prompt)
+                    elapsed = time.perf_counter() - started
+                    self.stats["compress_seconds"] += elapsed
+                    self.put(prompt, compressed, elapsed)
+                    pending.set_result(compressed)
+                except asyncio.CancelledError:
+                    pending.cancel()
+                    raise
+                except Exception as e:
+                    pending.set_exception(e)
+                    # Nobody else may be waiting; keep the loop from warning about it
+                    pending.exception()
+                    raise
+                finally:
+                    del self._inflight[key]
+                if self._unsaved >= self.save_every:
+                    await self.save()
+
+        if self.mcp is not None:
+            await self.mcp.update_compression_log(self.snapshot(event, similarity, prompt, compressed))
+        return compressed
+
+    def snapshot(
+        self,
+        event: Optional[str] = None,
+        similarity: float = 0.0,
+        prompt: Optional[str] = None,
+        compressed: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Cache statistics, plus the outcome of the last lookup when given"""
+        lookups = self.stats["hits"] + self.stats["near_hits"] + self.stats["misses"]
+        stats = dict(
+            self.stats,
+            entries=len(self._entries),
+            chars=self._chars,
+            hit_rate=(self.stats["hits"] + self.stats["near_hits"]) / lookups if lookups else 0.0
+        )
+        if event is not None:
+            stats["event"] = event
+            stats["similarity"] = similarity
+        if prompt is not None and compressed is not None:
+            stats["original_chars"] = len(prompt)
+            stats["compressed_chars"] = len(compressed)
+        return stats
+
+    def _encode(self) -> bytes:
+        entries = [[e["prompt"], e["compressed"], e["seconds"]] for e in self._entries.values()]
+        cache = {"version": CACHE_VERSION, "num_perm": self._hasher.num_perm, "entries": entries}
+        return json.dumps(cache, separators=(",", ":")).encode("utf-8")
+
+    async def save(self) -> None:
+        """Persist the cache in LRU order (runs off the event loop)"""
+        data = self._encode()
+        self._unsaved = 0
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(write_atomic, self.path, data)
+        except OSError as e:
+            logger.error(f"Error saving compression cache: {e}")
+
+    async def load(self) -> None:
+        """Load a previously saved cache; signatures are rebuilt, not stored"""
+        try:
+            raw = await asyncio.to_thread(self.path.read_bytes)
+            cache = json.loads(raw)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading compression cache: {e}")
+            return
+        if cache.get("version") != CACHE_VERSION:
+            return
+        for prompt, compressed, seconds in cache["entries"]:
+            self.put(prompt, compressed, seconds)
+        self._unsaved = 0
+
+    async def close(self) -> None:
+        if self._unsaved:
+            await self.save()
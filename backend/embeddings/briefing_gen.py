@@ -0,0 +1,240 @@
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+import heapq
+import json
+import time
+import logging
+import asyncio
+from mcp.writer import write_atomic
+
+logger = logging.getLogger(__name__)
+
+BRIEFING_SECTIONS = ("recentCommands", "taskHistory")
+
+Summarizer = Callable[[List[str]], Union[List[str], Awaitable[List[str]]]]
+Embedder = Callable[[List[str]], Any]
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+def render_event(section: str, entry: Dict[str, Any]) -> str:
+    """One line of summarizer input for a history entry"""
+    if section == "recentCommands":
+        line = f"command: {entry.get('command')}"
+        if entry.get("result") not in (None, "", {}):
+            line += f" -> {str(entry['result'])[:80]}"
+    else:
+        line = f"task [{entry.get('status')}]: {entry.get('task')}"
+    if entry.get("agent_id"):
+        line += f" ({entry['agent_id']})"
+    return line
+
+def new_events(mcp: Any, checkpoint: Dict[str, float]) -> Iterator[Tuple[float, str, Dict[str, Any]]]:
+    """(epoch, section, entry) for every briefing event after the checkpoint, oldest first"""
+    def stream(section):
+        for epoch, entry in mcp.iter_history(section, checkpoint.get(section, float("-inf"))):
+            yield epoch, section, entry
+
+    return heapq.merge(*(stream(section) for section in BRIEFING_SECTIONS), key=lambda event: event[0])
+
+def chunk_events(
+    events: Iterable[Tuple[float, str, Dict[str, Any]]],
+    max_events: int = 25,
+    max_chars: int = 2000
+) -> Iterator[List[Tuple[float, str, Dict[str, Any], str]]]:
+    """Group events into chunks bounded by event count and rendered size"""
+    chunk, chars = [], 0
+    for epoch, section, entry in events:
+        line = render_event(section, entry)
+        if chunk and (len(chunk) >= max_events or chars + len(line) > max_chars):
+            yield chunk
+            chunk, chars = [], 0
+        chunk.append((epoch, section, entry, line))
+        chars += len(line) + 1
+    if chunk:
+        yield chunk
+
+def extractive_summarize(texts: List[str], max_points: int = 5) -> List[str]:
+    """Default summarizer: the most frequent lines of each chunk, one key point per line"""
+    summaries = []
+    for text in texts:
+        counts = Counter(line for line in text.splitlines() if line)
+        points = [line if count == 1 else f"{line} (x{count})" for line, count in counts.most_common(max_points)]
+        summaries.append("\n".join(points))
+    return summaries
+
+class BriefingGenerator:
+    """
+    Rolling briefing of past sessions, built incrementally from MCP history
+
+    Each run consumes only the commands and tasks logged since the last
+    checkpoint, chunks them, summarizes the chunks in batches and merges the
+    key points into the rolling briefing. When an embedder and a VectorIndex
+    are given, only the new chunk summaries are embedded and added. Runs are
+    low priority: each one is capped at max_events_per_run, yields to the
+    event loop between batches and runs blocking work in threads. The cost
+    of every run (events, chunks, tokens, seconds) is kept in runs and
+    published to MCP as the "briefing" agent state.
+    """
+
+    def __init__(
+        self,
+        mcp: Any,
+        path: str = "data/embeddings/briefing.json",
+        summarize: Summarizer = extractive_summarize,
+        embed: Optional[Embedder] = None,
+        index: Optional[Any] = None,
+        events_per_chunk: int = 25,
+        chars_per_chunk: int = 2000,
+        batch_size: int = 8,
+        max_events_per_run: int = 500,
+        max_points: int = 50
+    ):
+        self.mcp = mcp
+        self.path = Path(path)
+        self.summarize = summarize
+        self.embed = embed
+        self.index = index
+        self.events_per_chunk = events_per_chunk    # Maximum events per chunk
+        self.chars_per_chunk = chars_per_chunk      # Maximum rendered characters per chunk
+        self.batch_size = batch_size                # Chunks per summarizer call
+        self.max_events_per_run = max_events_per_run
+        self.max_points = max_points                # Key points kept in the rolling briefing
+        self.checkpoint: Dict[str, float] = {}      # Section -> epoch of the last consumed entry
+        self.key_points: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.runs: deque = deque(maxlen=50)
+        self.totals = {"runs": 0, "events": 0, "chunks": 0, "tokens": 0, "embedded": 0, "seconds": 0.0}
+        self._task: Optional[asyncio.Task] = None
+        self._run_lock = asyncio.Lock()
+
+    async def load(self) -> None:
+        """Restore the briefing and checkpoint saved by a previous run"""
+        try:
+            state = json.loads(await asyncio.to_thread(self.path.read_bytes))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading briefing: {e}")
+            return
+        self.checkpoint = state.get("checkpoint", {})
+        self.key_points = OrderedDict((p["point"], p) for p in state.get("key_points", []))
+        self.totals.update(state.get("totals", {}))
+
+    async def save(self) -> None:
+        state = {
+            "checkpoint": self.checkpoint,
+            "key_points": list(self.key_points.values()),
+            "totals": self.totals
+        }
+        data = json.dumps(state, separators=(",", ":")).encode("utf-8")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(write_atomic, self.path, data)
+        except OSError as e:
+            logger.error(f"Error saving briefing: {e}")
+
+    def briefing(self, limit: int = 10) -> List[str]:
+        """The most recently reinforced key points, newest first"""
+        points = list(self.key_points.values())[-limit:]
+        points.reverse()
+        return [p["point"] if p["count"] == 1 else f"{p['point']} [{p['count']}]" for p in points]
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Process events logged since the checkpoint; returns the cost of this run"""
+        async with self._run_lock:
+            started = time.perf_counter()
+            cost = {"events": 0, "chunks": 0, "tokens": 0, "embedded": 0}
+            events = new_events(self.mcp, self.checkpoint)
+            capped = (event for _, event in zip(range(self.max_events_per_run), events))
+            batch = []
+            for chunk in chunk_events(capped, self.events_per_chunk, self.chars_per_chunk):
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    await self._process_batch(batch, cost)
+                    batch = []
+                    await asyncio.sleep(0)
+            if batch:
+                await self._process_batch(batch, cost)
+
+            cost["seconds"] = time.perf_counter() - started
+            cost["finished"] = datetime.now().isoformat()
+            self.runs.append(cost)
+            self.totals["runs"] += 1
+            for key in ("events", "chunks", "tokens", "embedded", "seconds"):
+                self.totals[key] += cost[key]
+            if cost["events"]:
+                await self.save()
+            await self.mcp.update_agent_state("briefing", {"last_run": cost, "totals": dict(self.totals)})
+            return cost
+
+    async def _process_batch(self, batch: List[List[Tuple]], cost: Dict[str, Any]) -> None:
+        texts = ["\n".join(event[3] for event in chunk) for chunk in batch]
+        if asyncio.iscoroutinefunction(self.summarize):
+            summaries = await self.summarize(texts)
+        else:
+            summaries = await asyncio.to_thread(self.summarize, texts)
+
+        for chunk, summary in zip(batch, summaries):
+            self._merge(summary, chunk[-1][0])
+        if self.embed is not None and self.index is not None:
+            await asyncio.to_thread(self._embed_chunks, batch, summaries)
+            cost["embedded"] += len(batch)
+
+        # Only advance the checkpoint once the batch is merged, so a failed run is retried
+        for chunk in batch:
+            for epoch, section, _, _ in chunk:
+                self.checkpoint[section] = max(epoch, self.checkpoint.get(section, float("-inf")))
+        cost["events"] += sum(len(chunk) for chunk in batch)
+        cost["chunks"] += len(batch)
+        cost["tokens"] += sum(estimate_tokens(t) for t in texts) + sum(estimate_tokens(s) for s in summaries)
+
+    def _merge(self, summary: str, epoch: float) -> None:
+        for point in summary.splitlines():
+            point = point.strip()
+            if not point:
+                continue
+            entry = self.key_points.pop(point, None) or {"point": point, "count": 0}
+            entry["count"] += 1
+            entry["last_seen"] = epoch
+            self.key_points[point] = entry
+        while len(self.key_points) > self.max_points:
+            self.key_points.popitem(last=False)
+
+    def _embed_chunks(self, batch: List[List[Tuple]], summaries: List[str]) -> None:
+        vectors = self.embed(summaries)
+        ids = [f"briefing:{chunk[0][0]:.6f}" for chunk in batch]
+        payloads = [
+            {"summary": summary, "start": chunk[0][0], "end": chunk[-1][0], "events": len(chunk)}
+            for chunk, summary in zip(batch, summaries)
+        ]
+        self.index.add(ids, vectors, payloads)
+
+    def start(self, interval: float = 300.0, scheduler: Optional[Any] = None) -> None:
+        """Run in the background every interval seconds, through scheduler's background lane if given"""
+        if self._task is None:
+            if scheduler is not None:
+                self._task = scheduler.every(interval, self.run_once, lane="background", name="briefing")
+            else:
+                self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self, interval: float) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Briefing run failed: {e}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,194 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from pathlib import Path
+import json
+import logging
+import numpy as np
+from mcp.writer import write_atomic
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 1
+
+def normalize_rows(vectors: Any) -> np.ndarray:
+    """float32 copy of vectors scaled to unit length (zero rows stay zero)"""
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+class VectorStore:
+    """
+    Persistent, memory-mapped storage for embedding vectors
+    Vectors are kept unit-normalized in one contiguous float32 matrix backed by
+    vectors.f32, so opening a store maps the file instead of reading it and
+    cosine similarity is a plain dot product. Deleted rows are tombstoned and
+    reused by later adds; ids and payloads live in meta.json.
+    """
+
+    def __init__(self, path: str = "data/embeddings", dim: int = 384, initial_capacity: int = 1024):
+        self.path = Path(path)
+        self.dim = dim
+        self.initial_capacity = initial_capacity
+        self._vectors: Optional[np.memmap] = None
+        self._capacity = 0
+        self._size = 0                               # High-water mark of used rows
+        self._ids: List[Optional[str]] = []          # Row -> id (None for deleted rows)
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[str, int] = {}              # id -> row
+        self._alive = np.zeros(0, dtype=bool)
+        self._free: List[int] = []
+        self._dirty = False
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.path / "vectors.f32"
+
+    @property
+    def meta_path(self) -> Path:
+        return self.path / "meta.json"
+
+    def open(self) -> None:
+        """Map the vector file and load ids; creates an empty store if none exists"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        try:
+            meta = json.loads(self.meta_path.read_bytes())
+        except FileNotFoundError:
+            meta = None
+        if meta is None or meta.get("version") != STORE_VERSION:
+            self._create(self.initial_capacity)
+            return
+        if meta["dim"] != self.dim:
+            raise ValueError(f"Store at {self.path} has dim {meta['dim']}, expected {self.dim}")
+        self._capacity = meta["capacity"]
+        self._size = len(meta["ids"])
+        self._ids = meta["ids"]
+        self._payloads = meta["payloads"]
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self._capacity, self.dim))
+        self._alive = np.zeros(self._capacity, dtype=bool)
+        self._alive[:self._size] = np.fromiter((i is not None for i in self._ids), dtype=bool, count=self._size)
+        self._rows = {vector_id: row for row, vector_id in enumerate(self._ids) if vector_id is not None}
+        # Reuse the lowest rows first
+        self._free = np.flatnonzero(~self._alive[:self._size])[::-1].tolist()
+
+    def _create(self, capacity: int) -> None:
+        with open(self.vectors_path, "wb") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._capacity = capacity
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._dirty = True
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(self._capacity * 2, needed)
+        self._vectors.flush()
+        self._vectors = None
+        with open(self.vectors_path, "r+b") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - self._capacity, dtype=bool)])
+        self._capacity = capacity
+
+    def add(
+        self,
+        ids: Sequence[str],
+        vectors: Any,
+        payloads: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+    ) -> np.ndarray:
+        """Insert or replace vectors; returns the row each one was stored in"""
+        matrix = normalize_rows(vectors)
+        if matrix.shape != (len(ids), self.dim):
+            raise ValueError(f"Expected {len(ids)} vectors of dim {self.dim}, got {matrix.shape}")
+        payloads = payloads or [None] * len(ids)
+        rows = np.empty(len(ids), dtype=np.int64)
+        new_rows = sum(1 for vector_id in ids if vector_id not in self._rows) - len(self._free)
+        if self._size + new_rows > self._capacity:
+            self._grow(self._size + new_rows)
+        for i, vector_id in enumerate(ids):
+            row = self._rows.get(vector_id)
+            if row is None:
+                if self._free:
+                    row = self._free.pop()
+                else:
+                    row = self._size
+                    self._size += 1
+                    self._ids.append(None)
+                    self._payloads.append(None)
+                self._rows[vector_id] = row
+                self._ids[row] = vector_id
+            self._payloads[row] = payloads[i]
+            rows[i] = row
+        self._vectors[rows] = matrix
+        self._alive[rows] = True
+        self._dirty = True
+        return rows
+
+    def delete(self, ids: Iterable[str]) -> np.ndarray:
+        """Tombstone vectors by id; returns the rows that were freed"""
+        freed = []
+        for vector_id in ids:
+            row = self._rows.pop(vector_id, None)
+            if row is None:
+                continue
+            self._ids[row] = None
+            self._payloads[row] = None
+            self._alive[row] = False
+            self._free.append(row)
+            freed.append(row)
+        if freed:
+            self._dirty = True
+        return np.asarray(freed, dtype=np.int64)
+
+    def row_of(self, vector_id: str) -> Optional[int]:
+        return self._rows.get(vector_id)
+
+    def id_at(self, row: int) -> Optional[str]:
+        return self._ids[row]
+
+    def payload(self, vector_id: str) -> Optional[Dict[str, Any]]:
+        row = self._rows.get(vector_id)
+        return self._payloads[row] if row is not None else None
+
+    def vector(self, vector_id: str) -> Optional[np.ndarray]:
+        row = self._rows.get(vector_id)
+        return np.array(self._vectors[row]) if row is not None else None
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Used rows of the mapped matrix, deleted rows included (see alive)"""
+        return self._vectors[:self._size]
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Mask of live rows, aligned with matrix"""
+        return self._alive[:self._size]
+
+    @property
+    def size(self) -> int:
+        """Number of used rows, including tombstones"""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, vector_id: str) -> bool:
+        return vector_id in self._rows
+
+    def flush(self) -> None:
+        """Flush mapped vectors and rewrite metadata if anything changed"""
+        if self._vectors is None or not self._dirty:
+            return
+        self._vectors.flush()
+        meta = {
+            "version": STORE_VERSION,
+            "dim": self.dim,
+            "capacity": self._capacity,
+            "ids": self._ids,
+            "payloads": self._payloads
+        }
+        write_atomic(self.meta_path, json.dumps(meta, separators=(",", ":")).encode("utf-8"))
+        self._dirty = False
+
+    def close(self) -> None:
+        self.flush()
+        self._vectors = None
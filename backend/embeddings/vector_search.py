@@ -0,0 +1,243 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import io
+import math
+import time
+import logging
+import numpy as np
+from mcp.writer import write_atomic
+from .store import VectorStore, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ("auto", "exact", "ivf")
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k best scores in each row, best first"""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+class VectorIndex:
+    """
+    Cosine similarity search over a VectorStore
+
+    Exact mode scores queries against the whole matrix in blocks with one
+    matrix product per block. IVF mode clusters the vectors with spherical
+    k-means and only scans the nprobe clusters closest to each query.
+    Adds are assigned to their nearest centroid and deletes are masked out,
+    so neither needs a rebuild; the posting lists are re-sorted once the
+    unsorted tail grows past a fraction of the index. Retraining the
+    centroids (train) is an explicit call. In "auto" mode small indexes are
+    searched exactly and large ones through IVF, training on first use.
+    """
+
+    def __init__(
+        self,
+        store: VectorStore,
+        mode: str = "auto",
+        exact_limit: int = 20_000,
+        nprobe: int = 8,
+        block_rows: int = 65_536
+    ):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        self.store = store
+        self.mode = mode
+        self.exact_limit = exact_limit  # Auto mode searches exactly up to this many vectors
+        self.nprobe = nprobe            # Clusters scanned per query in IVF mode
+        self.block_rows = block_rows    # Rows scored per matrix product in exact mode
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)  # Row -> cluster (-1 when deleted)
+        self._order = np.zeros(0, dtype=np.int64)   # Rows sorted by cluster
+        self._offsets = np.zeros(1, dtype=np.int64) # Cluster -> slice of _order
+        self._pending: Dict[int, List[int]] = {}    # Rows assigned since _order was built
+        self._pending_count = 0
+        self.stats = {"searches": 0, "exact": 0, "ivf": 0, "trainings": 0, "last_train_seconds": 0.0}
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def open(self) -> None:
+        """Open the store and load saved centroids and assignments"""
+        self.store.open()
+        try:
+            self._centroids = np.load(self.store.path / "centroids.npy")
+            assign = np.load(self.store.path / "assign.npy")
+        except FileNotFoundError:
+            self._centroids = None
+            return
+        if len(assign) != self.store.size or self._centroids.shape[1] != self.store.dim:
+            # Vectors changed without the index (e.g. a crash between flushes)
+            logger.warning("Vector index assignments are stale, retraining on next IVF search")
+            self._centroids = None
+            return
+        self._assign = assign.astype(np.int32)
+        self._rebuild_postings()
+
+    def flush(self) -> None:
+        self.store.flush()
+        if self._centroids is not None:
+            for name, array in (("centroids.npy", self._centroids), ("assign.npy", self._assign[:self.store.size])):
+                write_atomic(self.store.path / name, _npy_bytes(array))
+
+    def close(self) -> None:
+        self.flush()
+        self.store.close()
+
+    def add(
+        self,
+        ids: Sequence[str],
+        vectors: Any,
+        payloads: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+    ) -> None:
+        """Add or replace vectors; they are searchable immediately in every mode"""
+        rows = self.store.add(ids, vectors, payloads)
+        if self._centroids is None:
+            return
+        if len(self._assign) < self.store.size:
+            grown = np.full(max(self.store.size, 2 * len(self._assign)), -1, dtype=np.int32)
+            grown[:len(self._assign)] = self._assign
+            self._assign = grown
+        clusters = self._nearest_centroids(self.store.matrix[rows])
+        self._assign[rows] = clusters
+        for row, cluster in zip(rows.tolist(), clusters.tolist()):
+            self._pending.setdefault(cluster, []).append(row)
+        self._pending_count += len(rows)
+        if self._pending_count > max(1024, self.store.size // 20):
+            self._rebuild_postings()
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """Remove vectors by id; returns how many existed"""
+        rows = self.store.delete(ids)
+        if self._centroids is not None and len(rows):
+            self._assign[rows] = -1
+        return len(rows)
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10, sample_per_list: int = 40, seed: int = 0) -> None:
+        """Cluster the live vectors into nlist lists (default sqrt of the count)"""
+        started = time.perf_counter()
+        live = np.flatnonzero(self.store.alive)
+        if len(live) == 0:
+            return
+        nlist = min(nlist or max(16, int(math.sqrt(len(live)))), len(live))
+        rng = np.random.default_rng(seed)
+        sample_rows = live if len(live) <= nlist * sample_per_list else np.sort(
+            rng.choice(live, nlist * sample_per_list, replace=False)
+        )
+        sample = np.asarray(self.store.matrix[sample_rows])
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty clusters with random sample points
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+            centroids = normalize_rows(sums)
+        self._centroids = centroids
+        self._assign = np.full(self.store.size, -1, dtype=np.int32)
+        self._assign[live] = self._nearest_centroids_rows(live)
+        self._rebuild_postings()
+        self.stats["trainings"] += 1
+        self.stats["last_train_seconds"] = time.perf_counter() - started
+
+    def _nearest_centroids(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _nearest_centroids_rows(self, rows: np.ndarray) -> np.ndarray:
+        matrix = self.store.matrix
+        return np.concatenate([
+            self._nearest_centroids(matrix[rows[start:start + self.block_rows]])
+            for start in range(0, len(rows), self.block_rows)
+        ])
+
+    def _rebuild_postings(self) -> None:
+        assign = self._assign[:self.store.size]
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign[assign >= 0], minlength=len(self._centroids))
+        skipped = int(np.count_nonzero(assign < 0))  # Deleted rows sort first
+        self._order = order[skipped:]
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._pending = {}
+        self._pending_count = 0
+
+    def search(
+        self,
+        queries: Any,
+        k: int = 10,
+        mode: Optional[str] = None,
+        nprobe: Optional[int] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """k nearest (id, cosine similarity) pairs for each query, best first"""
+        queries = normalize_rows(queries)
+        mode = mode or self.mode
+        if mode == "auto":
+            mode = "exact" if len(self.store) <= self.exact_limit else "ivf"
+        if mode == "ivf" and self._centroids is None:
+            self.train()
+        self.stats["searches"] += len(queries)
+        self.stats[mode] += len(queries)
+        if len(self.store) == 0:
+            return [[] for _ in queries]
+        if mode == "exact":
+            rows, scores = self._search_exact(queries, k)
+        else:
+            rows, scores = self._search_ivf(queries, k, nprobe or self.nprobe)
+        id_at = self.store.id_at
+        return [
+            [(id_at(row), float(score)) for row, score in zip(row_list, score_list) if score > -np.inf]
+            for row_list, score_list in zip(rows, scores)
+        ]
+
+    def _search_exact(self, queries: np.ndarray, k: int) -> Tuple[List[List[int]], List[List[float]]]:
+        matrix, alive = self.store.matrix, self.store.alive
+        best_rows, best_scores = None, None
+        for start in range(0, len(matrix), self.block_rows):
+            scores = queries @ matrix[start:start + self.block_rows].T
+            scores[:, ~alive[start:start + self.block_rows]] = -np.inf
+            top = _top_k(scores, k)
+            rows = top + start
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            if best_rows is not None:
+                rows = np.concatenate([best_rows, rows], axis=1)
+                top_scores = np.concatenate([best_scores, top_scores], axis=1)
+                keep = _top_k(top_scores, k)
+                rows = np.take_along_axis(rows, keep, axis=1)
+                top_scores = np.take_along_axis(top_scores, keep, axis=1)
+            best_rows, best_scores = rows, top_scores
+        return best_rows.tolist(), best_scores.tolist()
+
+    def _search_ivf(self, queries: np.ndarray, k: int, nprobe: int) -> Tuple[List[List[int]], List[List[float]]]:
+        matrix, assign = np.asarray(self.store.matrix), self._assign
+        probes = _top_k(queries @ self._centroids.T, nprobe)
+        all_rows, all_scores = [], []
+        for query, clusters in zip(queries, probes):
+            candidates = []
+            repeated = False
+            for cluster in clusters.tolist():
+                rows = self._order[self._offsets[cluster]:self._offsets[cluster + 1]]
+                pending = self._pending.get(cluster)
+                if pending:
+                    rows = np.concatenate([rows, np.asarray(pending, dtype=np.int64)])
+                    repeated = True
+                # Drops deleted rows and rows re-added to another cluster since the lists were built
+                candidates.append(rows[assign[rows] == cluster])
+            rows = np.concatenate(candidates)
+            if repeated:
+                rows = np.unique(rows)
+            scores = matrix[rows] @ query
+            top = _top_k(scores[np.newaxis, :], k)[0]
+            all_rows.append(rows[top].tolist())
+            all_scores.append(scores[top].tolist())
+        return all_rows, all_scores
+
+def _npy_bytes(array: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
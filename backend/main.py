@@ -1,8 +1,128 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+import os
+import json
+import time
+import asyncio
+from fastapi import FastAPI, Header, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from mcp.mcp import MCP
+from mcp.shared import SharedMCP
+from mcp.stream import ContextStreamer, parse_event_id
+from utils.scheduler import get_scheduler
+from utils.subsystems import SubsystemRegistry, import_module
+from utils.logger import configure_logging, registry, stop_logging
 
-app = FastAPI(title="Aura Backend")
+# Heavy components are only imported by these loaders, so startup pays for
+# none of them; warm-up then loads them in priority order (lower first).
+
+async def _load_http_pool(subsystems: SubsystemRegistry) -> Any:
+    http = await import_module("models.http")
+    pool = http.get_http_pool()
+    await pool.start()
+    return pool
+
+def _build_router(pool: Any, mcp: MCP) -> Any:
+    from models.gemini import GeminiClient
+    from models.together_llama3 import TogetherLlama3Client
+    from models.scout_llama4 import ScoutLlama4Client
+    from models.fallback import OllamaClient
+    from agents.automation.automation import is_installed_app
+    from supervisor.input_classifier import CommandMatcher
+    from supervisor.response_cache import ResponseCache
+    from supervisor.router import ModelRouter
+    clients = [GeminiClient(pool=pool), TogetherLlama3Client(pool=pool), ScoutLlama4Client(pool=pool), OllamaClient(pool=pool)]
+    return ModelRouter({client.name: client for client in clients}, mcp=mcp, matcher=CommandMatcher(argument_checks={"app": is_installed_app}), cache=ResponseCache(mcp=mcp))
+
+async def _load_model_router(subsystems: SubsystemRegistry) -> Any:
+    pool = await subsystems.get("http_pool")
+    router = await asyncio.to_thread(_build_router, pool, app.state.mcp)
+    await router.cache.load()
+    return router
+
+def _load_app_index(subsystems: SubsystemRegistry) -> Any:
+    from agents.automation.automation import get_app_index
+    return get_app_index()
+
+async def _load_compressor_cache(subsystems: SubsystemRegistry) -> Any:
+    cache = (await import_module("compressor.cache")).CompressionCache(mcp=app.state.mcp)
+    await cache.load()
+    return cache
+
+def _load_embedding_index(subsystems: SubsystemRegistry) -> Any:
+    from embeddings.store import VectorStore
+    from embeddings.vector_search import VectorIndex
+    index = VectorIndex(VectorStore(os.environ.get("AURA_EMBEDDINGS_PATH", "data/embeddings")))
+    index.open()
+    return index
+
+SUBSYSTEMS = {
+    "http_pool": (_load_http_pool, 0),
+    "model_router": (_load_model_router, 10),
+    "app_index": (_load_app_index, 20),
+    "compressor_cache": (_load_compressor_cache, 30),
+    "embedding_index": (_load_embedding_index, 40)
+}
+
+def _runtime_metrics() -> dict:
+    """Gauges read from live components each time /metrics is scraped"""
+    lanes = app.state.scheduler.stats()
+    pool = app.state.subsystems.peek("http_pool")
+    providers = pool.stats if pool is not None else {}
+    stream = app.state.context_stream.stats
+    loaded = app.state.subsystems.status()
+    return {
+        "subsystem_ready": ("gauge", "1 once a lazily loaded subsystem is ready", [({"subsystem": n}, float(s["state"] == "ready")) for n, s in loaded.items()]),
+        "scheduler_queued_jobs": ("gauge", "Jobs waiting per scheduler lane", [({"lane": n}, s["queued"]) for n, s in lanes.items()]),
+        "scheduler_running_jobs": ("gauge", "Jobs running per scheduler lane", [({"lane": n}, s["running"]) for n, s in lanes.items()]),
+        "scheduler_wait_p95_seconds": ("gauge", "Recent p95 queue wait per scheduler lane", [({"lane": n}, s["wait_p95"]) for n, s in lanes.items()]),
+        "http_requests_total": ("counter", "Model HTTP requests per provider, retries included", [({"provider": p}, s["requests"]) for p, s in providers.items()]),
+        "http_retries_total": ("counter", "Model HTTP retries per provider", [({"provider": p}, s["retries"]) for p, s in providers.items()]),
+        "http_in_flight": ("gauge", "Model HTTP requests in flight per provider", [({"provider": p}, s["in_flight"]) for p, s in providers.items()]),
+        "http_throttled_seconds_total": ("counter", "Seconds spent waiting on provider rate limits", [({"provider": p}, s["throttled_seconds"]) for p, s in providers.items()]),
+        "context_stream_frames_total": ("counter", "Context delta frames published", [({}, stream["frames"])]),
+        "context_stream_resyncs_total": ("counter", "Slow context stream clients resynced with a snapshot", [({}, stream["resyncs"])])
+    }
+
+def _workers() -> int:
+    return max(1, int(os.environ.get("AURA_WORKERS", "1")))
+
+def _build_mcp(scheduler: Any) -> MCP:
+    storage_path = os.environ.get("AURA_MCP_PATH", "data/mcp")
+    if _workers() > 1 or os.environ.get("AURA_MCP_SHARED") == "1":
+        # Several uvicorn workers: each process caches the context and commits through the shared journal
+        return SharedMCP(storage_path=storage_path, scheduler=scheduler)
+    return MCP(storage_path=storage_path, journal_mode=True, scheduler=scheduler)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Log records are queued and written by a background thread, off the event loop
+    configure_logging(path=os.environ.get("AURA_LOG_PATH"))
+    # Priority lanes for everything that should not compete with UI requests
+    app.state.scheduler = get_scheduler()
+    app.state.mcp = _build_mcp(app.state.scheduler)
+    await app.state.mcp.initialize()
+    # Pushes context changes to the frontend instead of it polling
+    app.state.context_stream = ContextStreamer(app.state.mcp)
+    app.state.context_stream.start()
+    # Everything else loads in the background once the server is up, or on first use
+    app.state.subsystems = SubsystemRegistry(app.state.scheduler)
+    for name, (loader, priority) in SUBSYSTEMS.items():
+        app.state.subsystems.register(name, loader, priority)
+    if os.environ.get("AURA_WARM_SUBSYSTEMS", "1") != "0":
+        app.state.subsystems.warm()
+    registry.add_collector(_runtime_metrics)
+    yield
+    registry.remove_collector(_runtime_metrics)
+    await app.state.subsystems.close()
+    await app.state.context_stream.stop()
+    await app.state.mcp.close()
+    await app.state.scheduler.close()
+    stop_logging()
+
+app = FastAPI(title="Aura Backend", lifespan=lifespan)
+app.state.started = time.monotonic()
 
 # Configure CORS
 app.add_middleware(
@@ -13,9 +133,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _frame(frame: dict) -> str:
+    return json.dumps(frame, separators=(",", ":"))
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Aura Backend"}
 
+@app.get("/health")
+async def health():
+    """Answers as soon as the server is up; subsystems report their load state"""
+    subsystems = getattr(app.state, "subsystems", None)
+    return {
+        "status": "ok",
+        "uptime_seconds": time.monotonic() - app.state.started,
+        "subsystems": subsystems.status() if subsystems is not None else {}
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Spans, histograms and runtime gauges in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.websocket("/ws/context")
+async def context_socket(
+    websocket: WebSocket,
+    since: Optional[int] = None,
+    stream: Optional[str] = None,
+    sections: Optional[str] = None
+):
+    """Context snapshot, then deltas; reconnect with ?stream=<stream>&since=<last seq> to resume"""
+    await websocket.accept()
+    subscription = app.state.context_stream.subscribe(since, sections.split(",") if sections else None, stream)
+    try:
+        while True:
+            await websocket.send_text(_frame(await subscription.next()))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        subscription.close()
+
+@app.get("/context/stream")
+async def context_events(sections: Optional[str] = None, last_event_id: Optional[str] = Header(None)):
+    """Server-sent events variant of /ws/context; browsers resume via Last-Event-ID"""
+    stream, since = parse_event_id(last_event_id)
+    subscription = app.state.context_stream.subscribe(since, sections.split(",") if sections else None, stream)
+
+    async def events():
+        try:
+            while True:
+                frame = await subscription.next()
+                yield f"id: {frame['stream']}:{frame['seq']}\nevent: {frame['type']}\ndata: {_frame(frame)}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    import uvicorn
+    # Reload only works with a single worker; workers inherit AURA_WORKERS and share the MCP storage
+    workers = _workers()
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=workers == 1, workers=workers)
@@ -0,0 +1,363 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import math
+import time
+
+# Time window tiers: bucket width in seconds and how many buckets are kept
+DEFAULT_TIERS = {
+    "hour": (60 * 60, 48),
+    "day": (24 * 60 * 60, 35)
+}
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+OTHER = "other"                                     # Dimension values past max_series are folded into this one
+
+def _overflow(dimension: str) -> str:
+    return f"{dimension.partition(':')[0]}:{OTHER}"
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative accuracy (DDSketch)
+
+    Positive values fall into logarithmic bins, so any quantile is estimated
+    within relative_accuracy of the true value. At most max_bins bins are
+    kept: past that the lowest bins are collapsed together, which only costs
+    accuracy at the bottom of the distribution. Merging adds bin counts, so a
+    sketch of a week is exactly the merge of its days.
+    """
+
+    __slots__ = ("relative_accuracy", "max_bins", "_gamma_log", "bins", "zero")
+
+    def __init__(self, relative_accuracy: float = 0.02, max_bins: int = 256):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma_log = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.bins: Dict[int, int] = {}              # Bin index -> count
+        self.zero = 0                               # Values <= 0 (ratios and latencies never go below)
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value <= 0:
+            self.zero += count
+            return
+        index = math.ceil(math.log(value) / self._gamma_log)
+        self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        ordered = sorted(self.bins)
+        excess = ordered[:len(ordered) - self.max_bins + 1]
+        self.bins[excess[-1]] += sum(self.bins.pop(index) for index in excess[:-1])
+
+    def merge(self, other: "QuantileSketch") -> None:
+        self.zero += other.zero
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.zero + sum(self.bins.values())
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.zero
+        if rank < seen:
+            return 0.0
+        gamma = math.exp(self._gamma_log)
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                return 2 * gamma ** index / (gamma + 1)
+        return 2 * gamma ** max(self.bins) / (gamma + 1)
+
+    def to_list(self) -> List[int]:
+        """[zero, index, count, index, count, ...]"""
+        flat = [self.zero]
+        for index, count in self.bins.items():
+            flat += (index, count)
+        return flat
+
+    def merge_list(self, flat: List[int]) -> None:
+        self.zero += flat[0]
+        for i in range(1, len(flat), 2):
+            self.bins[flat[i]] = self.bins.get(flat[i], 0) + flat[i + 1]
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+
+class Summary:
+    """Count, sum, min and max of one series in one window, plus a quantile sketch for measured values"""
+
+    __slots__ = ("count", "total", "low", "high", "sketch")
+
+    def __init__(self, sketch: Optional[QuantileSketch] = None):
+        self.count = 0
+        self.total = 0.0
+        self.low = math.inf
+        self.high = -math.inf
+        self.sketch = sketch                        # None for plain counters
+
+    def add(self, value: float, count: int = 1) -> None:
+        self.count += count
+        self.total += value * count
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+        if self.sketch is not None:
+            self.sketch.add(value, count)
+
+    def merge(self, other: "Summary") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.low = min(self.low, other.low)
+        self.high = max(self.high, other.high)
+        if other.sketch is not None:
+            if self.sketch is None:
+                self.sketch = QuantileSketch(other.sketch.relative_accuracy, other.sketch.max_bins)
+            self.sketch.merge(other.sketch)
+
+    def to_list(self) -> List[Any]:
+        return [self.count, self.total, self.low, self.high, self.sketch.to_list() if self.sketch is not None else None]
+
+    def report(self, seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Plain statistics; seconds (the span covered) adds the average rate per second"""
+        result = {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.low if self.count else None,
+            "max": self.high if self.count else None
+        }
+        if self.sketch is not None:
+            for q in QUANTILES:
+                estimate = self.sketch.quantile(q)
+                # The sketch is relative to bin edges; never report past the observed range
+                result[f"p{round(q * 100)}"] = None if estimate is None else min(self.high, max(self.low, estimate))
+        if seconds:
+            result["per_second"] = self.count / seconds
+        return result
+
+class StreamingAggregates:
+    """
+    Counters, measured-value summaries and EWMA rates per series and window
+
+    A series is a metric name plus a dimension: "" for the total, or e.g.
+    "agent:media" or "model:gemini". Every event lands in the current bucket
+    of each tier (hourly and daily by default) and only the newest buckets of
+    a tier are kept, so memory is bounded by tiers x buckets x series x
+    sketch bins no matter how many events are recorded; a bucket holds at
+    most max_series dimensions per metric and folds the rest into e.g.
+    "agent:other". Events older than every bucket a tier keeps are not
+    recorded in it, only counted in dropped.
+    Rates are exponentially weighted with half_life seconds. Everything is
+    keyed by the events' own timestamps, so replaying the same events gives
+    the same aggregates, and states merge by adding counts.
+    """
+
+    def __init__(
+        self,
+        tiers: Optional[Dict[str, Tuple[int, int]]] = None,
+        half_life: float = 5 * 60,
+        max_series: int = 64,
+        relative_accuracy: float = 0.02,
+        max_bins: int = 256,
+        max_totals: int = 1024
+    ):
+        self.tiers = dict(tiers or DEFAULT_TIERS)   # Tier -> (bucket seconds, buckets kept)
+        self.half_life = half_life                  # Seconds for an EWMA rate to halve without events
+        self.max_series = max_series                # Dimensions per metric and bucket
+        self.relative_accuracy = relative_accuracy  # Quantile estimate error, relative to the value
+        self.max_bins = max_bins                    # Sketch bins per series and bucket
+        self.max_totals = max_totals                # Running totals tracked; the least recently reported go first
+        # Tier -> bucket start -> metric -> dimension -> Summary
+        self._buckets: Dict[str, Dict[int, Dict[str, Dict[str, Summary]]]] = {tier: {} for tier in self.tiers}
+        self._rates: Dict[str, Dict[str, List[float]]] = {}  # Metric -> dimension -> [rate, epoch]
+        self.totals: Dict[str, float] = {}          # Last cumulative value of sources that report running totals
+        self.dropped: Dict[str, int] = {tier: 0 for tier in self.tiers}  # Events older than a tier's kept buckets
+        self._encoded: Dict[Tuple[str, int], Dict[str, Any]] = {}  # Cached to_dict() of unchanged buckets
+
+    def _bucket(self, tier: str, epoch: float) -> Optional[Dict[str, Dict[str, Summary]]]:
+        """Bucket of tier holding epoch; None if epoch is older than every bucket kept"""
+        width, keep = self.tiers[tier]
+        start = int(epoch // width * width)
+        buckets = self._buckets[tier]
+        bucket = buckets.get(start)
+        if bucket is None:
+            if len(buckets) >= keep and start < min(buckets):
+                return None
+            bucket = buckets[start] = {}
+            if len(buckets) > keep:
+                for old in sorted(buckets)[:len(buckets) - keep]:
+                    del buckets[old]
+                    self._encoded.pop((tier, old), None)
+        self._encoded.pop((tier, start), None)
+        return bucket
+
+    def _series(self, metrics: Dict[str, Dict[str, Summary]], metric: str, dimension: str, measured: bool) -> Summary:
+        series = metrics.setdefault(metric, {})
+        summary = series.get(dimension)
+        if summary is None:
+            if len(series) >= self.max_series and dimension:
+                dimension = _overflow(dimension)
+                summary = series.get(dimension)
+            if summary is None:
+                summary = series[dimension] = Summary(QuantileSketch(self.relative_accuracy, self.max_bins) if measured else None)
+        return summary
+
+    def _tick(self, metric: str, dimension: str, epoch: float, count: int) -> None:
+        rates = self._rates.setdefault(metric, {})
+        if dimension not in rates and len(rates) >= self.max_series and dimension:
+            dimension = _overflow(dimension)
+        rate = rates.get(dimension)
+        decay = math.log(2) / self.half_life
+        if rate is None:
+            rates[dimension] = [count * decay, epoch]
+        elif epoch >= rate[1]:
+            rate[0] = rate[0] * math.exp(-decay * (epoch - rate[1])) + count * decay
+            rate[1] = epoch
+        else:
+            # A late event adds what would be left of it by now
+            rate[0] += count * decay * math.exp(-decay * (rate[1] - epoch))
+
+    def count(self, metric: str, epoch: float, dimensions: Iterable[str] = (), n: int = 1) -> None:
+        """Count n events of metric, in the total and in each dimension"""
+        self._record(metric, 1.0, epoch, dimensions, n, measured=False)
+
+    def observe(self, metric: str, value: float, epoch: float, dimensions: Iterable[str] = ()) -> None:
+        """Record one measured value (a ratio, a latency) of metric"""
+        self._record(metric, value, epoch, dimensions, 1, measured=True)
+
+    def _record(self, metric: str, value: float, epoch: float, dimensions: Iterable[str], n: int, measured: bool) -> None:
+        if n <= 0:
+            return
+        dimensions = ("", *(d for d in dimensions if d))
+        for tier in self.tiers:
+            bucket = self._bucket(tier, epoch)
+            if bucket is None:
+                self.dropped[tier] += n
+                continue
+            for dimension in dimensions:
+                self._series(bucket, metric, dimension, measured).add(value, n)
+        for dimension in dimensions:
+            self._tick(metric, dimension, epoch, n)
+
+    def delta(self, key: str, total: float) -> float:
+        """
+        Increase of a running total since the last report (all of it after the
+        source restarted); key must identify one reporting process, since two
+        processes' totals interleaved would look like restarts
+        """
+        last = self.totals.pop(key, 0)
+        self.totals[key] = total
+        if len(self.totals) > self.max_totals:
+            del self.totals[next(iter(self.totals))]
+        return total - last if total >= last else total
+
+    def _select(self, tier: Optional[str], since: Optional[float], now: Optional[float]) -> Tuple[str, List[int]]:
+        now = time.time() if now is None else now
+        if tier is None:
+            # The finest tier that still reaches back to since; everything kept when there is no since
+            by_width = sorted(self.tiers, key=lambda name: self.tiers[name][0])
+            tier = next(
+                (name for name in by_width if since is not None and now - since <= self.tiers[name][0] * (self.tiers[name][1] - 1)),
+                by_width[-1]
+            )
+        width = self.tiers[tier][0]
+        floor = -math.inf if since is None else since // width * width
+        return tier, [start for start in self._buckets[tier] if start >= floor]
+
+    def summary(self, metric: str, dimension: str = "", since: Optional[float] = None,
+                now: Optional[float] = None, tier: Optional[str] = None) -> Optional[Summary]:
+        """Merged summary of one series over the buckets from since on
+        Buckets are counted whole, so the span may start up to one bucket before since"""
+        return self.summaries(metric, since, now, tier).get(dimension)
+
+    def summaries(self, metric: str, since: Optional[float] = None, now: Optional[float] = None,
+                  tier: Optional[str] = None, prefix: Optional[str] = None) -> Dict[str, Summary]:
+        """Merged summaries per dimension; prefix (e.g. "agent") keeps only that kind, keyed by value"""
+        tier, starts = self._select(tier, since, now)
+        merged: Dict[str, Summary] = {}
+        for start in starts:
+            for dimension, summary in self._buckets[tier][start].get(metric, {}).items():
+                if prefix is not None:
+                    kind, _, value = dimension.partition(":")
+                    if kind != prefix:
+                        continue
+                    dimension = value
+                target = merged.get(dimension)
+                if target is None:
+                    target = merged[dimension] = Summary()
+                target.merge(summary)
+        return merged
+
+    def rate(self, metric: str, dimension: str = "", now: Optional[float] = None) -> float:
+        """EWMA events per second, decayed to now"""
+        rate = self._rates.get(metric, {}).get(dimension)
+        if rate is None:
+            return 0.0
+        elapsed = max(0.0, (time.time() if now is None else now) - rate[1])
+        return rate[0] * math.exp(-math.log(2) / self.half_life * elapsed)
+
+    def metrics(self) -> List[str]:
+        names = set(self._rates)
+        for buckets in self._buckets.values():
+            for bucket in buckets.values():
+                names.update(bucket)
+        return sorted(names)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain state for the context snapshot; only buckets changed since the last call are re-encoded"""
+        tiers = {}
+        for tier, buckets in self._buckets.items():
+            encoded = tiers[tier] = {}
+            for start, bucket in buckets.items():
+                cached = self._encoded.get((tier, start))
+                if cached is None:
+                    cached = self._encoded[(tier, start)] = {
+                        metric: {dimension: summary.to_list() for dimension, summary in series.items()}
+                        for metric, series in bucket.items()
+                    }
+                encoded[str(start)] = cached
+        return {
+            "tiers": tiers,
+            "rates": {metric: {d: list(rate) for d, rate in rates.items()} for metric, rates in self._rates.items()},
+            "totals": dict(self.totals),
+            "dropped": dict(self.dropped)
+        }
+
+    def copy(self) -> Dict[str, Any]:
+        return self.to_dict()
+
+    def merge_state(self, state: Dict[str, Any]) -> "StreamingAggregates":
+        """Add a to_dict() state (e.g. from a snapshot) into this one"""
+        for tier, buckets in state.get("tiers", {}).items():
+            if tier not in self.tiers:
+                continue
+            for start, metrics in buckets.items():
+                bucket = self._bucket(tier, int(start))
+                if bucket is None:
+                    continue
+                for metric, series in metrics.items():
+                    for dimension, (count, total, low, high, sketch) in series.items():
+                        summary = self._series(bucket, metric, dimension, sketch is not None)
+                        summary.count += count
+                        summary.total += total
+                        summary.low = min(summary.low, low)
+                        summary.high = max(summary.high, high)
+                        if sketch is not None:
+                            summary.sketch.merge_list(sketch)
+        decay = math.log(2) / self.half_life
+        for metric, rates in state.get("rates", {}).items():
+            for dimension, (value, epoch) in rates.items():
+                mine = self._rates.setdefault(metric, {}).get(dimension)
+                if mine is None:
+                    self._rates[metric][dimension] = [value, epoch]
+                else:
+                    # Decay both to the later timestamp, then add
+                    latest = max(mine[1], epoch)
+                    mine[0] = mine[0] * math.exp(-decay * (latest - mine[1])) + value * math.exp(-decay * (latest - epoch))
+                    mine[1] = latest
+        for key, total in state.get("totals", {}).items():
+            self.totals[key] = max(self.totals.get(key, 0), total)
+        for tier, dropped in state.get("dropped", {}).items():
+            if tier in self.dropped:
+                self.dropped[tier] += dropped
+        return self
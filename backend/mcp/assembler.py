@@ -0,0 +1,223 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import re
+import json
+import math
+import time
+import logging
+from .ring import entry_epoch
+
+logger = logging.getLogger(__name__)
+
+# Context sections in prompt order, with the heading each one is rendered under
+SECTION_HEADINGS = {
+    "userProfile": "User preferences",
+    "agentStates": "Agent states",
+    "taskHistory": "Recent tasks",
+    "recentCommands": "Recent commands"
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by do for from how i in is it me my of on or please the this to was what with you".split()
+)
+
+TokenCounter = Callable[[str], int]
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+def terms(text: str) -> Set[str]:
+    """Lowercased content words of text"""
+    return {word for word in _WORD.findall(text.lower()) if word not in STOPWORDS}
+
+def similarity(query: Set[str], item: Set[str]) -> float:
+    """Cosine similarity of two term sets"""
+    if not query or not item:
+        return 0.0
+    return len(query & item) / math.sqrt(len(query) * len(item))
+
+def _compact(value: Any, limit: int) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, separators=(",", ":"), default=str)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+def render_item(section: str, key: str, value: Any, max_value_chars: int = 160) -> str:
+    """One prompt line for a context item"""
+    if section == "userProfile":
+        return "; ".join(f"{name}: {_compact(v, max_value_chars)}" for name, v in sorted(value.items()))
+    if section == "agentStates":
+        return f"{key}: {_compact(value.get('state'), max_value_chars)} (updated {value.get('last_updated')})"
+    if section == "recentCommands":
+        line = f"{value.get('command')}"
+        if value.get("result") not in (None, "", {}):
+            line += f" -> {_compact(value['result'], max_value_chars)}"
+    else:
+        line = f"[{value.get('status')}] {value.get('task')}"
+        if value.get("result") not in (None, "", {}):
+            line += f" -> {_compact(value['result'], max_value_chars)}"
+    if value.get("agent_id"):
+        line += f" ({value['agent_id']})"
+    return line
+
+class _Item:
+    """A rendered context item, cached until its source value changes"""
+
+    __slots__ = ("section", "key", "source", "epoch", "text", "tokens", "terms")
+
+    def __init__(self, section: str, key: str, source: Any, epoch: float, text: str, tokens: int):
+        self.section = section
+        self.key = key
+        self.source = source                        # Value (or fingerprint) it was rendered from
+        self.epoch = epoch
+        self.text = text
+        self.tokens = tokens                        # Tokens of the rendered line, newline included
+        self.terms = terms(text)
+
+class ContextAssembler:
+    """
+    Builds model prompts from MCP context within a token budget
+
+    Each context item (the preferences, one agent's state, one command or
+    task) is rendered to a line once; the line, its token count and its
+    terms are cached and reused until the item changes. Sections whose MCP
+    version has not moved are not even re-scanned. Items are ranked by a
+    mix of term similarity to the query and recency (exponential decay with
+    half_life seconds) and added best first while they fit the budget, so
+    the prompt carries what is relevant instead of the whole context.
+    """
+
+    def __init__(
+        self,
+        mcp: Any,
+        count_tokens: TokenCounter = estimate_tokens,
+        sections: Iterable[str] = tuple(SECTION_HEADINGS),
+        half_life: float = 6 * 60 * 60,
+        similarity_weight: float = 0.7,
+        max_candidates: int = 200,
+        min_score: float = 0.05,
+        max_value_chars: int = 160
+    ):
+        self.mcp = mcp
+        self.count_tokens = count_tokens
+        self.sections = [section for section in SECTION_HEADINGS if section in set(sections)]
+        self.half_life = half_life                  # Seconds for an item's recency score to halve
+        self.similarity_weight = similarity_weight  # Recency gets the remainder
+        self.max_candidates = max_candidates        # Newest history entries considered per section
+        self.min_score = min_score                  # Items scoring below this are never included
+        self.max_value_chars = max_value_chars      # Longer values are truncated when rendered
+        self._items: Dict[str, Dict[Any, _Item]] = {section: {} for section in self.sections}
+        self._versions: Dict[str, int] = {}         # Section version the cached item list reflects
+        self._lists: Dict[str, List[_Item]] = {}
+        self._heading_tokens = {section: self.count_tokens(f"## {SECTION_HEADINGS[section]}\n") for section in self.sections}
+        self.stats = {"assembled": 0, "rendered": 0, "reused": 0, "rescans": 0}
+
+    def _render(self, section: str, key: Any, source: Any, epoch: float, value: Any) -> _Item:
+        cached = self._items[section].get(key)
+        if cached is not None and (cached.source is source or cached.source == source):
+            cached.epoch = epoch
+            self.stats["reused"] += 1
+            return cached
+        text = render_item(section, key if isinstance(key, str) else "", value, self.max_value_chars)
+        item = _Item(section, key, source, epoch, text, self.count_tokens(text + "\n"))
+        self._items[section][key] = item
+        self.stats["rendered"] += 1
+        return item
+
+    def _scan(self, section: str) -> List[_Item]:
+        """Current items of a section, re-rendering only those that changed"""
+        version = self.mcp.get_section_version(section)
+        if self._versions.get(section) == version and section in self._lists:
+            return self._lists[section]
+        self.stats["rescans"] += 1
+        context = self.mcp.context
+        items: List[_Item] = []
+        if section == "userProfile":
+            # Preferences are updated in place: their fingerprint tells whether they changed
+            preferences = context["userProfile"]["preferences"]
+            fingerprint = self.mcp.fingerprint(["userProfile.preferences"])
+            last_active = context["userProfile"]["usage_stats"].get("last_active")
+            items.append(self._render(section, "preferences", fingerprint, entry_epoch({"timestamp": last_active}), preferences))
+        elif section == "agentStates":
+            for agent_id, entry in context["agentStates"].items():
+                items.append(self._render(section, agent_id, entry, entry_epoch({"timestamp": entry.get("last_updated")}), entry))
+        else:
+            buffer = context[section]
+            newest = buffer.iter_newest() if hasattr(buffer, "iter_newest") else ((entry_epoch(e), e) for e in reversed(buffer))
+            for count, (epoch, entry) in enumerate(newest):
+                if count >= self.max_candidates:
+                    break
+                # Entries are immutable once logged; the object identifies them, and the
+                # cached item holds a reference so the id cannot be reused meanwhile
+                items.append(self._render(section, id(entry), entry, epoch, entry))
+            items.reverse()
+        live = {item.key for item in items}
+        cache = self._items[section]
+        for key in [key for key in cache if key not in live]:
+            del cache[key]
+        self._versions[section] = version
+        self._lists[section] = items
+        return items
+
+    def score(self, item: _Item, query_terms: Set[str], now: float) -> float:
+        recency = 0.5 ** (max(0.0, now - item.epoch) / self.half_life)
+        return self.similarity_weight * similarity(query_terms, item.terms) + (1 - self.similarity_weight) * recency
+
+    def assemble(self, query: str, budget: int, instructions: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Prompt for query within budget tokens, and where the tokens went
+
+        Returns {"prompt", "tokens", "breakdown"}; the breakdown has the
+        tokens spent on the query, instructions and section headings
+        ("overhead"), and per section the tokens used, the items included and
+        the items considered.
+        """
+        started = time.perf_counter()
+        self.stats["assembled"] += 1
+        head = f"{instructions}\n\n" if instructions else ""
+        tail = f"\nUser: {query}\n"
+        fixed = self.count_tokens(head) + self.count_tokens("Context:\n") + self.count_tokens(tail)
+        remaining = budget - fixed
+        now = time.time()
+        query_terms = terms(query)
+
+        candidates: List[Tuple[float, _Item]] = []
+        considered: Dict[str, int] = {}
+        for section in self.sections:
+            items = self._scan(section)
+            considered[section] = len(items)
+            for item in items:
+                item_score = self.score(item, query_terms, now)
+                if item_score >= self.min_score:
+                    candidates.append((item_score, item))
+        # Ties go to the newer item
+        candidates.sort(key=lambda pair: (pair[0], pair[1].epoch), reverse=True)
+
+        chosen: Dict[str, List[_Item]] = {section: [] for section in self.sections}
+        for _, item in candidates:
+            cost = item.tokens + (0 if chosen[item.section] else self._heading_tokens[item.section])
+            if cost <= remaining:
+                chosen[item.section].append(item)
+                remaining -= cost
+
+        lines = [head + "Context:"] if head else ["Context:"]
+        sections: Dict[str, Dict[str, int]] = {}
+        headings = 0
+        for section in self.sections:
+            picked = sorted(chosen[section], key=lambda item: item.epoch)
+            used = sum(item.tokens for item in picked)
+            if picked:
+                headings += self._heading_tokens[section]
+                lines.append(f"## {SECTION_HEADINGS[section]}")
+                lines.extend(item.text for item in picked)
+            sections[section] = {"tokens": used, "items": len(picked), "considered": considered[section]}
+        prompt = "\n".join(lines) + "\n" + tail
+        context_tokens = sum(s["tokens"] for s in sections.values())
+        breakdown = {
+            "budget": budget,
+            "query": self.count_tokens(tail),
+            "overhead": fixed - self.count_tokens(tail) + headings,
+            "sections": sections,
+            "seconds": time.perf_counter() - started
+        }
+        breakdown["total"] = breakdown["query"] + breakdown["overhead"] + context_tokens
+        return {"prompt": prompt, "tokens": breakdown["total"], "breakdown": breakdown}
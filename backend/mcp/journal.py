@@ -0,0 +1,204 @@
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Iterator
+from pathlib import Path
+import os
+import json
+import logging
+import asyncio
+import aiofiles
+
+logger = logging.getLogger(__name__)
+
+def _append_durable(path: Path, data: bytes) -> None:
+    """Append data and fsync it; a failed write is cut off so the file ends on a whole record"""
+    created = not path.exists()
+    with open(path, "ab") as f:
+        start = f.tell()
+        try:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.truncate(start)
+            raise
+    if created:
+        # fsync the directory so the new file's entry survives a crash
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+class ContextJournal:
+    """
+    Append-only write-ahead journal for MCP context mutations
+    Buffers one compact record per mutation and group-commits them to disk
+    on a size/time window, fsyncing each batch; a batch that fails to write
+    stays buffered for the next flush. Compaction is delegated to the owner (MCP), which
+    folds the journal into a snapshot and drops the rotated segment.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        flush_interval: float = 0.05,
+        max_batch_bytes: int = 64 * 1024,
+        compact_every: int = 1000,
+        default: Optional[Callable[[Any], Any]] = None
+    ):
+        self.path = Path(path)
+        self.rotated_path = self.path.with_name(self.path.name + ".1")
+        self.flush_interval = flush_interval      # Max time a record waits in the buffer (seconds)
+        self.max_batch_bytes = max_batch_bytes    # Flush early once this many bytes are buffered
+        self.compact_every = compact_every        # Records between compactions
+        self.default = default                    # Encoder hook for non-JSON values
+
+        self.seq = 0
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._records_since_compaction = 0
+        self._io_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+        self._on_compact: Optional[Callable[[], Awaitable[None]]] = None
+        self._compaction: Optional[asyncio.Task] = None  # At most one compaction in flight
+        self.stats = {
+            "records": 0,
+            "batches": 0,
+            "bytes_written": 0,
+            "compactions": 0
+        }
+
+    def start(self, on_compact: Optional[Callable[[], Awaitable[None]]] = None) -> None:
+        """Start the background group-commit task"""
+        self._on_compact = on_compact
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stop the background task and flush anything still buffered"""
+        if self._flusher is not None:
+            # Let an in-progress flush or compaction finish instead of cancelling it
+            self._closing = True
+            self._wakeup.set()
+            await self._flusher
+            self._flusher = None
+            self._closing = False
+        if self._compaction is not None:
+            await self._compaction
+            self._compaction = None
+        await self.flush()
+
+    def append(self, op: str, data: Dict[str, Any]) -> int:
+        """Buffer a mutation record and return its sequence number"""
+        self.seq += 1
+        line = json.dumps(
+            {"seq": self.seq, "op": op, "data": data}, separators=(",", ":"), default=self.default
+        ) + "\n"
+        self._buffer.append(line)
+        self._buffered_bytes += len(line)
+        self._records_since_compaction += 1
+        self.stats["records"] += 1
+        if self._buffered_bytes >= self.max_batch_bytes:
+            self._wakeup.set()
+        return self.seq
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self._records_since_compaction >= self.compact_every
+
+    async def flush(self) -> None:
+        """Write all buffered records to the journal file in one batch"""
+        async with self._io_lock:
+            await self._flush_locked()
+
+    async def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        records, buffered_bytes = self._buffer, self._buffered_bytes
+        self._buffer = []
+        self._buffered_bytes = 0
+        batch = "".join(records).encode("utf-8")
+        try:
+            await asyncio.to_thread(_append_durable, self.path, batch)
+        except BaseException:
+            # Not on disk: keep the records, ahead of any appended meanwhile, for the next flush
+            self._buffer = records + self._buffer
+            self._buffered_bytes += buffered_bytes
+            raise
+        self.stats["batches"] += 1
+        self.stats["bytes_written"] += len(batch)
+
+    async def rotate(self) -> None:
+        """Flush and move the live journal aside so a snapshot can supersede it"""
+        async with self._io_lock:
+            await self._flush_locked()
+            if not self.path.exists():
+                return
+            if self.rotated_path.exists():
+                # A previous compaction never finished; keep its records
+                async with aiofiles.open(self.path, "r", encoding="utf-8") as src:
+                    pending = await src.read()
+                async with aiofiles.open(self.rotated_path, "a", encoding="utf-8") as dst:
+                    await dst.write(pending)
+                self.path.unlink()
+            else:
+                self.path.rename(self.rotated_path)
+            self._records_since_compaction = 0
+
+    def drop_rotated(self) -> None:
+        """Remove the rotated segment once a snapshot covering it is on disk"""
+        if self.rotated_path.exists():
+            self.rotated_path.unlink()
+        self.stats["compactions"] += 1
+
+    def replay(self, after_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield journal records newer than after_seq, oldest first"""
+        for path in (self.rotated_path, self.path):
+            if not path.exists():
+                continue
+            intact_bytes = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete record")
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn tail from a crash mid-write; everything before it is intact
+                        logger.warning(f"Skipping unreadable journal record in {path.name}")
+                        break
+                    intact_bytes += len(line)
+                    self.seq = max(self.seq, record["seq"])
+                    if record["seq"] > after_seq:
+                        yield record
+            if intact_bytes < path.stat().st_size:
+                # Cut the torn tail so new appends start on a clean line
+                with open(path, "r+b") as f:
+                    f.truncate(intact_bytes)
+        self.seq = max(self.seq, after_seq)
+
+    async def _flush_loop(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._closing:
+                break
+            try:
+                await self.flush()
+                if self._on_compact is not None and self.needs_compaction and (self._compaction is None or self._compaction.done()):
+                    # Compaction may queue behind other maintenance work; group commits must not wait for it
+                    self._compaction = asyncio.create_task(self._compact())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Journal flush failed: {e}")
+
+    async def _compact(self) -> None:
+        try:
+            await self._on_compact()
+        except Exception as e:
+            logger.error(f"Journal compaction failed: {e}")
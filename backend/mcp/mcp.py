@@ -1,24 +1,130 @@
-from typing import Dict, List, Any, Optional, Set
+from typing import Callable, Dict, List, Any, Iterable, Iterator, Optional, Set, Tuple
 from datetime import datetime
-import json
 from pathlib import Path
 import logging
 import asyncio
-import aiofiles
-from .serializer import ContextSerializer
+import itertools
+import hashlib
+import json
+import time
+import uuid
+from .serializer import ContextSerializer, FORMATS, encode_default, require_msgpack
 from .pruner import ContextPruner
+from .journal import ContextJournal
+from .writer import ContextWriter
+from .ring import RingBuffer, entry_epoch
+from .aggregates import StreamingAggregates
+from utils.logger import span
 
 logger = logging.getLogger(__name__)
 
+WEEK_SECONDS = 7 * 24 * 60 * 60
+
+# Bounded history sections, addressed by dotted path into the context
+DEFAULT_HISTORY_LIMITS = {
+    "recentCommands": {"capacity": 50, "max_age": WEEK_SECONDS},
+    "taskHistory": {"capacity": 100, "max_age": WEEK_SECONDS},
+    "errorLogs": {"capacity": 100, "max_age": WEEK_SECONDS},
+    "feedbackLoop.user_feedback": {"capacity": 100, "max_age": WEEK_SECONDS},
+    "compressionLog.compression_history": {"capacity": 100, "max_age": WEEK_SECONDS}
+}
+
+# Context sections touched by each mutation; the first one owns the lock
+OP_SECTIONS = {
+    "update_user_profile": ("userProfile",),
+    "add_command": ("recentCommands", "userProfile"),
+    "update_agent_state": ("agentStates",),
+    "add_feedback": ("feedbackLoop",),
+    "log_error": ("errorLogs",),
+    "update_compression_log": ("compressionLog",),
+    "update_performance_metrics": ("feedbackLoop",),
+    "add_task": ("taskHistory",),
+    "clear_error_logs": ("errorLogs",)
+}
+
+# Task statuses counted as failures in the aggregates
+FAILED_TASK_STATUSES = ("failed", "error")
+
+# Error rates per dimension kind: (error metric, metrics counting the attempts)
+ERROR_RATE_METRICS = {
+    "agent": ("errors", ("commands", "tasks")),
+    "model": ("model_errors", ("model_requests",))
+}
+
+# Mutations that append a history entry, and the section it goes to
+OP_HISTORY = {
+    "add_command": "recentCommands",
+    "add_task": "taskHistory",
+    "log_error": "errorLogs",
+    "add_feedback": "feedbackLoop.user_feedback",
+    "update_compression_log": "compressionLog.compression_history"
+}
+
+def history_index_fields(section: str, entry: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """The (type, agent_id) a history entry is filtered by"""
+    if section == "errorLogs":
+        return entry.get("error_type"), (entry.get("context") or {}).get("agent_id")
+    if section == "feedbackLoop.user_feedback":
+        return entry.get("type"), (entry.get("metadata") or {}).get("agent_id")
+    if section == "taskHistory":
+        return entry.get("status"), entry.get("agent_id")
+    return None, entry.get("agent_id")
+
+def _dimension(kind: str, value: Any) -> Optional[str]:
+    """Aggregate dimension for a value, e.g. "agent:media" (None when there is no value)"""
+    return f"{kind}:{value}" if value not in (None, "") else None
+
+def _copy_structure(value: Any) -> Any:
+    """Copy containers so the loop can keep mutating while a snapshot is encoded
+    History entries themselves are never mutated in place, so they are shared"""
+    if isinstance(value, dict):
+        return {k: _copy_structure(v) for k, v in value.items()}
+    if isinstance(value, (list, set, RingBuffer)):
+        return value.copy()
+    return value
+
+def _fingerprint_default(value: Any) -> Any:
+    # Sets are sorted so a fingerprint does not depend on hash randomization
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return encode_default(value)
+
+def _encode_snapshot(snapshot: Tuple[ContextPruner, ContextSerializer, Dict[str, Any], int, str]) -> bytes:
+    """Prune and encode a captured context (runs off the event loop)"""
+    pruner, serializer, context, journal_seq, storage_format = snapshot
+    pruned_context = pruner.prune(context)
+    if journal_seq:
+        pruned_context["__journal_seq__"] = journal_seq
+    return serializer.encode(pruned_context, storage_format)
+
 class MCP:
     """
     Memory and Context Pruner (MCP) - Central context management system
     Handles state management, pruning, compression, and async context sync
     """
     
-    def __init__(self, storage_path: str = "data/mcp"):
+    def __init__(
+        self,
+        storage_path: str = "data/mcp",
+        journal_mode: bool = False,
+        storage_format: str = "json",
+        history_limits: Optional[Dict[str, Dict[str, Any]]] = None,
+        history_store: Optional[Any] = None,
+        scheduler: Optional[Any] = None
+    ):
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
+        self.history_limits = {**DEFAULT_HISTORY_LIMITS, **(history_limits or {})}
+        if storage_format not in FORMATS:
+            raise ValueError(f"Unknown context format: {storage_format}")
+        if storage_format == "msgpack":
+            require_msgpack()  # Fail here rather than on the first save
+        self.storage_format = storage_format
+        # Optional queryable backend (e.g. agents.memory.SQLiteHistoryStore) holding full history;
+        # the in-memory ring buffers then act as a bounded cache of the newest entries
+        self.history_store = history_store
+        # Optional utils.scheduler.Scheduler; journal compaction then runs in its maintenance lane
+        self.scheduler = scheduler
         
         # Core context structure with new schema
         self.context = {
@@ -60,142 +166,509 @@ class MCP:
             }
         }
         
+        self._install_history_buffers()
+        # Counters, rates and quantile sketches per window, fed by the apply handlers below
+        self.aggregates = StreamingAggregates()
+        # Tells this process's running metric totals apart from other workers' in the aggregates
+        self.reporter_id = uuid.uuid4().hex
+        
         self.serializer = ContextSerializer()
         self.pruner = ContextPruner()
-        self._sync_lock = asyncio.Lock()
+        self._sync_lock = asyncio.Lock()            # Guards whole-context replacement on load
+        self._section_locks: Dict[str, asyncio.Lock] = {}
+        self._versions: Dict[str, int] = {}
+        self._fingerprints: Dict[str, Tuple[int, bytes]] = {}  # Dotted path -> (section version, digest)
+        self._listeners: List[Callable[[str, Tuple[str, ...]], None]] = []
         self._initialized = False
+        
+        # Journal mode: append one record per mutation instead of rewriting context.json
+        self.journal = ContextJournal(self.storage_path / "context.journal", default=encode_default) if journal_mode else None
+        self.writer = ContextWriter(self.storage_path / f"context.{storage_format}", encode=_encode_snapshot)
+        self._apply_handlers = {
+            "update_user_profile": self._apply_user_profile,
+            "add_command": self._apply_command,
+            "update_agent_state": self._apply_agent_state,
+            "add_feedback": self._apply_feedback,
+            "log_error": self._apply_error,
+            "update_compression_log": self._apply_compression,
+            "update_performance_metrics": self._apply_performance_metrics,
+            "add_task": self._apply_task,
+            "clear_error_logs": self._apply_clear_errors
+        }
     
     async def initialize(self) -> None:
         """Initialize the MCP instance asynchronously"""
         if not self._initialized:
+            if self.history_store is not None:
+                await self.history_store.open()
             await self.load_context()
+            if self.journal is not None:
+                self.journal.start(on_compact=self.compact if self.scheduler is None else self._scheduled_compact)
             self._initialized = True
     
+    async def close(self) -> None:
+        """Flush pending journal records and stop background tasks"""
+        if self.journal is not None:
+            await self.journal.close()
+        await self.writer.close()
+        if self.history_store is not None:
+            await self.history_store.close()
+    
     async def update_user_profile(self, key: str, value: Any) -> None:
         """Update user profile data"""
-        async with self._sync_lock:
-            if key in self.context["userProfile"]["preferences"]:
-                self.context["userProfile"]["preferences"][key] = value
-                await self.save_context()
-            else:
-                logger.warning(f"Attempted to update non-existent preference: {key}")
-    
-    async def add_command(self, command: str, result: Any) -> None:
+        if key in self.context["userProfile"]["preferences"]:
+            await self._commit("update_user_profile", {"key": key, "value": value})
+        else:
+            logger.warning(f"Attempted to update non-existent preference: {key}")
+    
+    async def add_command(self, command: str, result: Any, agent_id: Optional[str] = None) -> None:
         """Add a command to recent history"""
-        async with self._sync_lock:
-            command_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "command": command,
-                "result": result
-            }
-            self.context["recentCommands"].append(command_entry)
-            self.context["userProfile"]["usage_stats"]["total_commands"] += 1
-            self.context["userProfile"]["usage_stats"]["last_active"] = datetime.now().isoformat()
-            await self.save_context()
+        command_entry = {
+            "timestamp": datetime.now().isoformat(),
+            "command": command,
+            "result": result
+        }
+        if agent_id is not None:
+            command_entry["agent_id"] = agent_id
+        await self._commit("add_command", {"entry": command_entry})
+    
+    async def add_task(self, task: str, status: str, result: Any = None, agent_id: Optional[str] = None) -> None:
+        """Add a finished or failed task to task history"""
+        task_entry = {
+            "timestamp": datetime.now().isoformat(),
+            "task": task,
+            "status": status,
+            "result": result,
+            "agent_id": agent_id
+        }
+        await self._commit("add_task", {"entry": task_entry})
     
     async def update_agent_state(self, agent_id: str, state: Dict[str, Any]) -> None:
         """Update state for a specific agent"""
-        async with self._sync_lock:
-            self.context["agentStates"][agent_id] = {
+        await self._commit("update_agent_state", {
+            "agent_id": agent_id,
+            "entry": {
                 "state": state,
                 "last_updated": datetime.now().isoformat()
             }
-            await self.save_context()
+        }, shard=agent_id)
     
     async def add_feedback(self, feedback_type: str, content: str, metadata: Dict = None) -> None:
         """Add user feedback or performance metrics"""
-        async with self._sync_lock:
-            feedback_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "type": feedback_type,
-                "content": content,
-                "metadata": metadata or {}
-            }
-            self.context["feedbackLoop"]["user_feedback"].append(feedback_entry)
-            await self.save_context()
+        feedback_entry = {
+            "timestamp": datetime.now().isoformat(),
+            "type": feedback_type,
+            "content": content,
+            "metadata": metadata or {}
+        }
+        await self._commit("add_feedback", {"entry": feedback_entry})
     
     async def log_error(self, error: Exception, context: Dict = None) -> None:
         """Log an error with context"""
-        async with self._sync_lock:
-            error_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "error_type": type(error).__name__,
-                "error_message": str(error),
-                "context": context or {}
-            }
-            self.context["errorLogs"].append(error_entry)
-            await self.save_context()
+        error_entry = {
+            "timestamp": datetime.now().isoformat(),
+            "error_type": type(error).__name__,
+            "error_message": str(error),
+            "context": context or {}
+        }
+        await self._commit("log_error", {"entry": error_entry})
     
     async def update_compression_log(self, stats: Dict[str, Any]) -> None:
         """Update compression statistics"""
-        async with self._sync_lock:
-            self.context["compressionLog"]["last_compression"] = datetime.now().isoformat()
-            self.context["compressionLog"]["compression_stats"] = stats
-            self.context["compressionLog"]["compression_history"].append({
+        await self._commit("update_compression_log", {
+            "entry": {
                 "timestamp": datetime.now().isoformat(),
                 "stats": stats
-            })
+            }
+        })
+    
+    async def update_performance_metrics(self, metrics: Dict[str, Dict[str, Any]], reporter: Optional[str] = None) -> None:
+        """Replace the performance metrics of one or more models (or other components)
+        Running "requests"/"errors" totals (per reporter, this process by default) and a "latencies" list of new samples feed the aggregates"""
+        await self._commit("update_performance_metrics", {
+            "timestamp": datetime.now().isoformat(),
+            "reporter": reporter or self.reporter_id,
+            "metrics": metrics
+        })
+    
+    def _section_lock(self, section: str, shard: Optional[str] = None) -> asyncio.Lock:
+        """Get the lock guarding one context section (or one shard of it)"""
+        key = f"{section}:{shard}" if shard is not None else section
+        lock = self._section_locks.get(key)
+        if lock is None:
+            lock = self._section_locks[key] = asyncio.Lock()
+        return lock
+    
+    def get_section_version(self, section: str) -> int:
+        """Get the mutation counter for a context section"""
+        return self._versions.get(section, 0)
+    
+    def add_listener(self, listener: Callable[[str, Tuple[str, ...]], None]) -> None:
+        """Call listener(op, sections) after every committed mutation; it must not block"""
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[str, Tuple[str, ...]], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def fingerprint(self, paths: Iterable[str]) -> str:
+        """Stable hash of the context values at dotted paths (e.g. "userProfile.preferences")
+        A path's digest is only recomputed after its section's version changes"""
+        digest = hashlib.blake2b(digest_size=16)
+        for path in paths:
+            version = self._versions.get(path.split(".", 1)[0], 0)
+            cached = self._fingerprints.get(path)
+            if cached is None or cached[0] != version:
+                value: Any = self.context
+                for part in path.split("."):
+                    value = value.get(part) if isinstance(value, dict) else None
+                encoded = json.dumps(value, sort_keys=True, default=_fingerprint_default).encode("utf-8")
+                cached = self._fingerprints[path] = (version, hashlib.blake2b(encoded, digest_size=16).digest())
+            digest.update(path.encode("utf-8"))
+            digest.update(cached[1])
+        return digest.hexdigest()
+    
+    async def _commit(self, op: str, data: Dict[str, Any], shard: Optional[str] = None) -> None:
+        """Apply a mutation to the in-memory context and persist it"""
+        sections = OP_SECTIONS[op]
+        # Only the owning section (or agent) is locked; readers never take a lock
+        lock = self._section_lock(sections[0], shard)
+        with span("mcp_lock_wait", section=sections[0]):
+            await lock.acquire()
+        try:
+            self._apply(op, data)
+            if self.journal is not None:
+                self.journal.append(op, data)
+            if self.history_store is not None and op in OP_HISTORY:
+                self.history_store.append(OP_HISTORY[op], data["entry"])
+        finally:
+            lock.release()
+        if self.history_store is not None and op == "clear_error_logs":
+            await self.history_store.clear("errorLogs")
+        if self.journal is None:
+            # Saves coalesce in the writer, so this never holds up other sections
             await self.save_context()
     
+    def _apply(self, op: str, data: Dict[str, Any]) -> None:
+        """Apply a mutation in memory, bump its sections' versions and notify listeners"""
+        sections = OP_SECTIONS[op]
+        self._apply_handlers[op](data)
+        for section in sections:
+            self._versions[section] = self._versions.get(section, 0) + 1
+        for listener in self._listeners:
+            listener(op, sections)
+    
+    async def refresh(self) -> bool:
+        """Pick up changes made by other processes; True if the context changed
+        A single-process MCP owns its context, so there is never anything to pick up"""
+        return False
+    
+    def _apply_user_profile(self, data: Dict[str, Any]) -> None:
+        self.context["userProfile"]["preferences"][data["key"]] = data["value"]
+    
+    def _apply_command(self, data: Dict[str, Any]) -> None:
+        entry = data["entry"]
+        self.context["recentCommands"].append(entry)
+        self.context["userProfile"]["usage_stats"]["total_commands"] += 1
+        self.context["userProfile"]["usage_stats"]["last_active"] = entry["timestamp"]
+        self.aggregates.count("commands", entry_epoch(entry), [_dimension("agent", entry.get("agent_id"))])
+    
+    def _apply_agent_state(self, data: Dict[str, Any]) -> None:
+        # Copy-on-write so readers and in-flight snapshots keep a stable mapping
+        agent_states = dict(self.context["agentStates"])
+        agent_states[data["agent_id"]] = data["entry"]
+        self.context["agentStates"] = agent_states
+    
+    def _apply_feedback(self, data: Dict[str, Any]) -> None:
+        entry = data["entry"]
+        self.context["feedbackLoop"]["user_feedback"].append(entry)
+        self.aggregates.count("feedback", entry_epoch(entry), [_dimension("type", entry.get("type"))])
+    
+    def _apply_error(self, data: Dict[str, Any]) -> None:
+        entry = data["entry"]
+        self.context["errorLogs"].append(entry)
+        agent_id = (entry.get("context") or {}).get("agent_id")
+        self.aggregates.count("errors", entry_epoch(entry), [_dimension("agent", agent_id), _dimension("type", entry.get("error_type"))])
+    
+    def _apply_compression(self, data: Dict[str, Any]) -> None:
+        entry = data["entry"]
+        stats = entry["stats"]
+        self.context["compressionLog"]["last_compression"] = entry["timestamp"]
+        self.context["compressionLog"]["compression_stats"] = stats
+        self.context["compressionLog"]["compression_history"].append(entry)
+        epoch = entry_epoch(entry)
+        if "event" in stats:
+            self.aggregates.count("compression_lookups", epoch, [_dimension("event", stats["event"])])
+        original = stats.get("original_chars", stats.get("original_size"))
+        compressed = stats.get("compressed_chars", stats.get("compressed_size"))
+        if original and compressed is not None:
+            self.aggregates.observe("compression_ratio", compressed / original, epoch)
+    
+    def _apply_performance_metrics(self, data: Dict[str, Any]) -> None:
+        epoch = entry_epoch(data)
+        reporter = data.get("reporter", "")
+        # Copy-on-write so readers and in-flight snapshots keep a stable mapping
+        metrics = dict(self.context["feedbackLoop"]["performance_metrics"])
+        for name, values in data["metrics"].items():
+            # Raw samples only feed the aggregates; the context keeps the latest summary
+            latencies = values.get("latencies") or ()
+            metrics[name] = {key: value for key, value in values.items() if key != "latencies"}
+            dimension = [_dimension("model", name)]
+            for metric, key in (("model_requests", "requests"), ("model_errors", "errors")):
+                if isinstance(values.get(key), (int, float)):
+                    self.aggregates.count(metric, epoch, dimension, int(self.aggregates.delta(f"{reporter}/{name}.{key}", values[key])))
+            for latency in latencies:
+                self.aggregates.observe("model_latency", latency, epoch, dimension)
+        self.context["feedbackLoop"]["performance_metrics"] = metrics
+    
+    def _apply_task(self, data: Dict[str, Any]) -> None:
+        entry = data["entry"]
+        self.context["taskHistory"].append(entry)
+        epoch = entry_epoch(entry)
+        dimension = [_dimension("agent", entry.get("agent_id"))]
+        self.aggregates.count("tasks", epoch, dimension)
+        if entry.get("status") in FAILED_TASK_STATUSES:
+            self.aggregates.count("task_failures", epoch, dimension)
+    
+    def _apply_clear_errors(self, data: Dict[str, Any]) -> None:
+        self.context["errorLogs"].clear()
+    
+    def _history_parent(self, path: str) -> Tuple[Dict[str, Any], str]:
+        *parents, key = path.split(".")
+        container = self.context
+        for parent in parents:
+            container = container.setdefault(parent, {})
+        return container, key
+    
+    def _install_aggregates(self, state: Optional[Dict[str, Any]]) -> None:
+        """Rebuild the aggregates from a saved state, merged into an empty set with the current limits"""
+        current = self.aggregates
+        self.aggregates = StreamingAggregates(
+            current.tiers, current.half_life, current.max_series, current.relative_accuracy, current.max_bins
+        ).merge_state(state or {})
+    
+    def _install_history_buffers(self) -> None:
+        """Wrap history sections in bounded ring buffers"""
+        for path, limits in self.history_limits.items():
+            container, key = self._history_parent(path)
+            entries = container.get(key) or []
+            container[key] = RingBuffer(limits["capacity"], limits.get("max_age"), entries)
+    
+    def _capture_snapshot(self) -> Tuple[ContextPruner, ContextSerializer, Dict[str, Any], int, str]:
+        """Capture a consistent copy of the context for off-loop encoding"""
+        # Expired history is dropped from the live context first; this only
+        # touches entries that crossed the age cutoff since the last save
+        self.pruner.prune_in_place(self.context)
+        journal_seq = self.journal.seq if self.journal is not None else 0
+        context = _copy_structure(self.context)
+        # Aggregates are saved beside the context, not in a section, so streams and fingerprints skip them
+        context["__aggregates__"] = self.aggregates.to_dict()
+        return self.pruner, self.serializer, context, journal_seq, self.storage_format
+    
+    def _snapshot_size_hint(self) -> int:
+        size = 0
+        for path in self.history_limits:
+            container, key = self._history_parent(path)
+            size += len(container[key])
+        return size
+    
     async def save_context(self) -> None:
         """Save current context to disk asynchronously"""
         try:
-            async with self._sync_lock:
-                print("🔒 Acquiring lock to save context")
-                # Convert set to list for JSON serialization
-                context_to_save = self.context.copy()
-                context_to_save["activeAgents"] = list(context_to_save["activeAgents"])
-                # Prune context before saving
-                pruned_context = self.pruner.prune(context_to_save)
-                print("🔧 Pruned. About to serialize")
-                # Serialize and save
-                serialized = self.serializer.serialize(pruned_context)
-                print("📁 Writing to file...")
-                async with aiofiles.open(self.storage_path / "context.json", "w") as f:
-                    json.dump(serialized, f, indent=2)
+            # The writer serializes writes itself and coalesces overlapping saves
+            await self.writer.save(self._capture_snapshot, self._snapshot_size_hint())
         except Exception as e:
             logger.error(f"Failed to save context: {e}")
-            print("❌ Exception in save_context:", e)
-            asyncio.create_task(self.log_error(e, {"operation": "save_context"}))
+            # Record the failure in memory only; persisting it would retry the failing write
+            self._apply_error({"entry": {
+                "timestamp": datetime.now().isoformat(),
+                "error_type": type(e).__name__,
+                "error_message": str(e),
+                "context": {"operation": "save_context"}
+            }})
+    
+    async def compact(self) -> None:
+        """Fold the journal into a fresh context.json snapshot"""
+        if self.journal is None:
+            return
+        try:
+            await self.journal.rotate()
+            # The snapshot is captured after rotation, so it covers every rotated record
+            await self.writer.save(self._capture_snapshot, self._snapshot_size_hint())
+            self.journal.drop_rotated()
+        except Exception as e:
+            logger.error(f"Failed to compact journal: {e}")
+    
+    async def _scheduled_compact(self) -> None:
+        """Compact through the scheduler so it waits behind interactive work"""
+        await self.scheduler.run(self.compact, lane="maintenance", name="mcp_compact")
+    
+    def _read_snapshot_file(self) -> Tuple[Optional[Dict[str, Any]], int]:
+        """The context snapshot and the journal sequence number it covers"""
+        # Prefer the configured format, but pick up a snapshot left in the other one
+        for fmt in sorted(FORMATS, key=lambda f: f != self.storage_format):
+            context_file = self.storage_path / f"context.{fmt}"
+            if context_file.exists():
+                loaded_context = self.serializer.decode(context_file.read_bytes(), fmt)
+                return loaded_context, loaded_context.pop("__journal_seq__", 0)
+        return None, 0
+    
+    def _read_snapshot(self) -> Tuple[Optional[Dict[str, Any]], int, List[Dict[str, Any]]]:
+        """Read the context snapshot and newer journal records (runs off the event loop)"""
+        loaded_context, snapshot_seq = self._read_snapshot_file()
+        records = []
+        if self.journal is not None:
+            records = [
+                self.serializer.deserialize(record)
+                for record in self.journal.replay(after_seq=snapshot_seq)
+            ]
+        return loaded_context, snapshot_seq, records
     
     async def load_context(self) -> None:
         """Load context from disk asynchronously"""
         try:
             async with self._sync_lock:
-                context_file = self.storage_path / "context.json"
-                if context_file.exists():
-                    with open(context_file, "r") as f:
-                        serialized = json.load(f)
-                    loaded_context = self.serializer.deserialize(serialized)
+                loaded_context, _, records = await asyncio.to_thread(self._read_snapshot)
+                if loaded_context is not None:
                     # Convert list back to set for activeAgents
                     loaded_context["activeAgents"] = set(loaded_context["activeAgents"])
+                    self._install_aggregates(loaded_context.pop("__aggregates__", None))
                     self.context = loaded_context
+                    self._install_history_buffers()
+                # Replay mutations recorded after the snapshot was taken
+                for record in records:
+                    self._apply_handlers[record["op"]](record["data"])
+                # Loading bypasses the section versions, so cached fingerprints are stale
+                self._fingerprints = {}
         except Exception as e:
             logger.error(f"Failed to load context: {e}")
             await self.log_error(e, {"operation": "load_context"})
     
     async def get_agent_state(self, agent_id: str) -> Optional[Dict]:
         """Get current state for a specific agent"""
+        await self.refresh()
         return self.context["agentStates"].get(agent_id)
     
     async def get_recent_errors(self, n: int = 10) -> List[Dict]:
         """Get n most recent errors"""
-        return self.context["errorLogs"][-n:]
+        await self.refresh()
+        if self.history_store is not None:
+            return await self.history_store.recent("errorLogs", n)
+        return self.context["errorLogs"].tail(n)
+    
+    async def query_history(
+        self,
+        section: str,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        entry_type: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> List[Dict]:
+        """Filtered, paginated history lookup, newest first
+        since/until are epoch seconds; entry_type is the error type, feedback type or task status"""
+        await self.refresh()
+        if self.history_store is not None:
+            return await self.history_store.query(section, since, until, entry_type, agent_id, limit, offset)
+        container, key = self._history_parent(section)
+        matches = []
+        for epoch, entry in container[key].iter_newest():
+            if since is not None and epoch < since:
+                break
+            if until is not None and epoch >= until:
+                continue
+            if entry_type is not None or agent_id is not None:
+                fields = history_index_fields(section, entry)
+                if (entry_type is not None and fields[0] != entry_type) or (agent_id is not None and fields[1] != agent_id):
+                    continue
+            matches.append(entry)
+            if len(matches) >= offset + limit:
+                break
+        return matches[offset:]
+    
+    def iter_history(self, section: str, after: float) -> Iterator[Tuple[float, Dict]]:
+        """(epoch, entry) pairs of an in-memory history section newer than after, oldest first
+        Walks back from the newest entry only as far as after, so the cost tracks new entries"""
+        container, key = self._history_parent(section)
+        newer = list(itertools.takewhile(lambda pair: pair[0] > after, container[key].iter_newest()))
+        return reversed(newer)
+    
+    async def get_errors(self, error_type: Optional[str] = None, since: Optional[float] = None,
+                         limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Get errors, optionally of one type and/or since an epoch time, newest first"""
+        return await self.query_history("errorLogs", since=since, entry_type=error_type, limit=limit, offset=offset)
+    
+    async def get_commands(self, agent_id: Optional[str] = None, since: Optional[float] = None,
+                           limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Get commands, optionally issued by one agent and/or since an epoch time, newest first"""
+        return await self.query_history("recentCommands", since=since, agent_id=agent_id, limit=limit, offset=offset)
+    
+    async def get_prune_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get per-section prune cost (runs, evicted entries, seconds)"""
+        return self.pruner.stats
     
     async def get_compression_stats(self) -> Dict:
         """Get current compression statistics"""
+        await self.refresh()
         return self.context["compressionLog"]["compression_stats"]
     
+    async def get_performance_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get the latest performance metrics per model"""
+        await self.refresh()
+        return self.context["feedbackLoop"]["performance_metrics"]
+    
+    async def get_aggregate(self, metric: str, dimension: str = "", since: Optional[float] = None,
+                            window: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Count, sum, mean, min/max and (for measured values) p50-p99 of one series since an epoch
+        e.g. get_aggregate("compression_ratio", since=time.time() - WEEK_SECONDS)["p95"]"""
+        await self.refresh()
+        summary = self.aggregates.summary(metric, dimension, since, tier=window)
+        return summary.report() if summary is not None else None
+    
+    async def get_aggregates_by(self, metric: str, kind: str, since: Optional[float] = None,
+                                window: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """The same statistics per value of one dimension kind, e.g. kind="agent" -> {agent_id: stats}"""
+        await self.refresh()
+        summaries = self.aggregates.summaries(metric, since, tier=window, prefix=kind)
+        return {value: summary.report() for value, summary in summaries.items()}
+    
+    async def get_event_rate(self, metric: str, dimension: str = "") -> float:
+        """Exponentially weighted events per second of a series, as of now"""
+        await self.refresh()
+        return self.aggregates.rate(metric, dimension, time.time())
+    
+    async def get_error_rate(self, by: str = "agent", since: Optional[float] = None,
+                             window: Optional[str] = None) -> Dict[str, Any]:
+        """Errors per attempt, overall and per agent (commands and tasks) or per model (requests)"""
+        await self.refresh()
+        error_metric, attempt_metrics = ERROR_RATE_METRICS[by]
+        errors = self.aggregates.summaries(error_metric, since, tier=window)
+        attempts: Dict[str, int] = {}
+        for metric in attempt_metrics:
+            for dimension, summary in self.aggregates.summaries(metric, since, tier=window).items():
+                attempts[dimension] = attempts.get(dimension, 0) + summary.count
+    
+        def rate(dimension: str) -> Optional[float]:
+            failed = errors[dimension].count if dimension in errors else 0
+            return failed / attempts[dimension] if attempts.get(dimension) else None
+    
+        prefix = f"{by}:"
+        dimensions = {d for d in (*errors, *attempts) if d.startswith(prefix)}
+        return {"total": rate(""), by: {d[len(prefix):]: rate(d) for d in sorted(dimensions)}}
+    
     async def clear_error_logs(self) -> None:
         """Clear error logs"""
-        async with self._sync_lock:
-            self.context["errorLogs"] = []
-            await self.save_context()
+        await self._commit("clear_error_logs", {})
     
     async def get_user_profile(self) -> Dict:
         """Get current user profile"""
+        await self.refresh()
         return self.context["userProfile"].copy()
     
     async def get_task_history(self, n: int = 10) -> List[Dict]:
         """Get n most recent tasks"""
-        return self.context["taskHistory"][-n:]
+        await self.refresh()
+        if self.history_store is not None:
+            return await self.history_store.recent("taskHistory", n)
+        return self.context["taskHistory"].tail(n)
@@ -1,113 +1,207 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
+from bisect import bisect_left
+import heapq
 import logging
+import time
+from .ring import RingBuffer
+from utils.logger import observe
 
 logger = logging.getLogger(__name__)
 
+# History sections by dotted path, with the size limit attribute that applies to each
+HISTORY_SECTIONS = {
+    "recentCommands": "max_command_history",
+    "taskHistory": "max_conversation_history",
+    "errorLogs": "max_conversation_history",
+    "feedbackLoop.user_feedback": "max_conversation_history",
+    "compressionLog.compression_history": "max_conversation_history"
+}
+
+def _timestamp_epoch(entry: Any) -> float:
+    try:
+        return datetime.fromisoformat(entry["timestamp"]).timestamp()
+    except (TypeError, ValueError, KeyError) as e:
+        logger.warning(f"Error processing entry timestamp: {e}")
+        return float("-inf")
+
 class ContextPruner:
     """
     Manages memory usage by pruning old or irrelevant data from context
     Implements various pruning strategies to maintain optimal context size
+
+    History is time-ordered, so pruning only looks at entries past the age
+    cutoff: ring buffers keep pre-parsed epochs, plain lists are bisected,
+    and resource usage keys are parsed once into a time-ordered heap.
     """
-    
+
     def __init__(self):
         # Configuration for pruning
         self.max_conversation_history = 100  # Maximum number of conversation messages to keep
         self.max_command_history = 50       # Maximum number of commands to keep
         self.max_age_days = 7               # Maximum age of data to keep (in days)
-    
+
+        # Per-section prune cost: runs, evicted entries, seconds spent
+        self.stats: Dict[str, Dict[str, float]] = {}
+        # Incremental state for resource_usage: parsed epochs in a min-heap
+        self._resource_heap: List[Tuple[float, str]] = []
+        self._resource_keys: Set[str] = set()
+
+    def _cutoff(self) -> float:
+        return (datetime.now() - timedelta(days=self.max_age_days)).timestamp()
+
+    def _record(self, section: str, evicted: int, started: float) -> None:
+        stats = self.stats.setdefault(section, {"runs": 0, "evicted": 0, "last_seconds": 0.0, "total_seconds": 0.0})
+        elapsed = time.perf_counter() - started
+        stats["runs"] += 1
+        stats["evicted"] += evicted
+        stats["last_seconds"] = elapsed
+        stats["total_seconds"] += elapsed
+        observe("mcp_prune", elapsed, section=section)
+
     def prune(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Apply pruning strategies to the context"""
         pruned_context = context.copy()
-        
-        # Prune conversation history
-        if "conversation_history" in pruned_context:
-            pruned_context["conversation_history"] = self._prune_conversation_history(
-                pruned_context["conversation_history"]
-            )
-        
-        # Prune command history
-        if "recent_commands" in pruned_context:
-            pruned_context["recent_commands"] = self._prune_command_history(
-                pruned_context["recent_commands"]
-            )
-        
+
+        # Prune command history and the other history sections
+        for path in HISTORY_SECTIONS:
+            parent, _, key = path.rpartition(".")
+            container = pruned_context.get(parent, {}) if parent else pruned_context
+            if key not in container:
+                continue
+            if parent:
+                container = pruned_context[parent] = dict(container)
+            if path == "recentCommands":
+                container[key] = self._prune_command_history(container[key])
+            else:
+                container[key] = self._prune_conversation_history(container[key])
+
         # Prune system state
         if "system_state" in pruned_context:
             pruned_context["system_state"] = self._prune_system_state(
                 pruned_context["system_state"]
             )
-        
+
         return pruned_context
-    
+
+    def prune_in_place(self, context: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+        """
+        Evict expired entries from the live context
+        Each section is skipped in O(1) while its oldest entry is still inside the
+        age window, so the cost tracks entries crossing the boundary, not history size.
+        """
+        cutoff = self._cutoff()
+        for path in HISTORY_SECTIONS:
+            parent, _, key = path.rpartition(".")
+            container = context.get(parent, {}) if parent else context
+            history = container.get(key)
+            if history is None:
+                continue
+            started = time.perf_counter()
+            if isinstance(history, RingBuffer):
+                evicted = history.evict_older_than(cutoff)
+            else:
+                keep_from = self._first_within(history, cutoff)
+                evicted = keep_from
+                if keep_from:
+                    del history[:keep_from]
+            self._record(path, evicted, started)
+
+        usage = context.get("system_state", {}).get("resource_usage")
+        if usage is not None:
+            started = time.perf_counter()
+            evicted = 0
+            for key in self._expired_resource_keys(usage, cutoff):
+                usage.pop(key, None)
+                evicted += 1
+            self._record("system_state.resource_usage", evicted, started)
+        return self.stats
+
+    def _first_within(self, history: list, cutoff: float) -> int:
+        """Index of the first entry newer than cutoff in a time-ordered list"""
+        if not history or _timestamp_epoch(history[0]) >= cutoff:
+            return 0
+        return bisect_left(history, cutoff, key=_timestamp_epoch)
+
+    def _expired_resource_keys(self, usage: Dict[str, Any], cutoff: float) -> List[str]:
+        """Pop resource usage keys older than cutoff from the time-ordered index"""
+        new_keys = usage.keys() - self._resource_keys
+        for key in new_keys:
+            try:
+                epoch = datetime.fromisoformat(key).timestamp()
+            except ValueError:
+                logger.warning(f"Error processing resource usage timestamp: {key}")
+                continue
+            heapq.heappush(self._resource_heap, (epoch, key))
+            self._resource_keys.add(key)
+        expired = []
+        while self._resource_heap and self._resource_heap[0][0] <= cutoff:
+            _, key = heapq.heappop(self._resource_heap)
+            self._resource_keys.discard(key)
+            expired.append(key)
+        return expired
+
+    def _live_resource_usage(self, usage: Dict[str, Any], cutoff: float) -> Dict[str, Any]:
+        """Resource usage without keys older than cutoff, leaving the incremental index alone
+        prune() runs in the writer's thread; only prune_in_place (on the event loop) touches the index"""
+        live = {}
+        for key, value in usage.items():
+            try:
+                if datetime.fromisoformat(key).timestamp() <= cutoff:
+                    continue
+            except ValueError:
+                pass
+            live[key] = value
+        return live
+
+    def _prune_ring(self, history: RingBuffer) -> RingBuffer:
+        """Age out ring buffer entries; capacity is already enforced on insert"""
+        cutoff = self._cutoff()
+        oldest = history.oldest_epoch()
+        if oldest is None or oldest >= cutoff:
+            return history
+        pruned = history.copy()
+        pruned.evict_older_than(cutoff)
+        return pruned
+
     def _prune_conversation_history(self, history: list) -> list:
         """Prune conversation history based on age and size"""
+        if isinstance(history, RingBuffer):
+            return self._prune_ring(history)
         if not history:
             return []
-        
-        # Convert timestamps to datetime objects
-        now = datetime.now()
-        pruned_history = []
-        
-        for message in history:
-            try:
-                timestamp = datetime.fromisoformat(message["timestamp"])
-                age = now - timestamp
-                
-                # Keep messages that are newer than max_age_days
-                if age <= timedelta(days=self.max_age_days):
-                    pruned_history.append(message)
-            except (ValueError, KeyError) as e:
-                logger.warning(f"Error processing message timestamp: {e}")
-                continue
-        
-        # Keep only the most recent messages up to max_conversation_history
-        return pruned_history[-self.max_conversation_history:]
-    
+
+        # Keep messages that are newer than max_age_days, up to max_conversation_history
+        keep_from = max(self._first_within(history, self._cutoff()), len(history) - self.max_conversation_history)
+        return history[keep_from:]
+
     def _prune_command_history(self, commands: list) -> list:
         """Prune command history based on age and size"""
+        if isinstance(commands, RingBuffer):
+            return self._prune_ring(commands)
         if not commands:
             return []
-        
-        # Convert timestamps to datetime objects
-        now = datetime.now()
-        pruned_commands = []
-        
-        for command in commands:
-            try:
-                timestamp = datetime.fromisoformat(command["timestamp"])
-                age = now - timestamp
-                
-                # Keep commands that are newer than max_age_days
-                if age <= timedelta(days=self.max_age_days):
-                    pruned_commands.append(command)
-            except (ValueError, KeyError) as e:
-                logger.warning(f"Error processing command timestamp: {e}")
-                continue
-        
-        # Keep only the most recent commands up to max_command_history
-        return pruned_commands[-self.max_command_history:]
-    
+
+        # Keep commands that are newer than max_age_days, up to max_command_history
+        keep_from = max(self._first_within(commands, self._cutoff()), len(commands) - self.max_command_history)
+        return commands[keep_from:]
+
     def _prune_system_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Prune system state data"""
         pruned_state = state.copy()
-        
+
         # Update last_updated timestamp
         pruned_state["last_updated"] = datetime.now().isoformat()
-        
+
         # Clear completed tasks
         if "active_tasks" in pruned_state:
             pruned_state["active_tasks"] = [
                 task for task in pruned_state["active_tasks"]
                 if task.get("status") != "completed"
             ]
-        
+
         # Clear old resource usage data
         if "resource_usage" in pruned_state:
-            now = datetime.now()
-            pruned_state["resource_usage"] = {
-                k: v for k, v in pruned_state["resource_usage"].items()
-                if datetime.fromisoformat(k) > (now - timedelta(days=self.max_age_days))
-            }
-        
+            pruned_state["resource_usage"] = self._live_resource_usage(pruned_state["resource_usage"], self._cutoff())
+
         return pruned_state
@@ -0,0 +1,102 @@
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from collections import deque
+from datetime import datetime
+from itertools import islice
+import time
+
+def entry_epoch(entry: Any) -> float:
+    """Epoch seconds for a history entry's ISO timestamp (now if it has none)"""
+    try:
+        return datetime.fromisoformat(entry["timestamp"]).timestamp()
+    except (TypeError, KeyError, ValueError):
+        return time.time()
+
+class RingBuffer:
+    """
+    Capacity- and age-bounded history buffer for MCP context sections
+    Entries are kept oldest-first next to their pre-parsed epoch timestamps;
+    inserts evict from the old end in O(1) (amortized for age eviction).
+    """
+
+    __slots__ = ("capacity", "max_age", "_items", "_epochs")
+
+    def __init__(self, capacity: int, max_age: Optional[float] = None, items: Iterable[Any] = ()):
+        self.capacity = capacity    # Maximum number of entries kept
+        self.max_age = max_age      # Maximum entry age in seconds (None keeps entries forever)
+        self._items: deque = deque(maxlen=capacity)
+        self._epochs: deque = deque(maxlen=capacity)
+        self.extend(items)
+
+    def append(self, item: Any, epoch: Optional[float] = None) -> None:
+        """Add an entry, evicting the oldest ones past capacity or max_age"""
+        if epoch is None:
+            epoch = entry_epoch(item)
+        self._items.append(item)
+        self._epochs.append(epoch)
+        if self.max_age is not None:
+            self.evict_older_than(epoch - self.max_age)
+
+    def extend(self, items: Iterable[Any]) -> None:
+        for item in items:
+            self.append(item)
+
+    def evict_older_than(self, cutoff: float) -> int:
+        """Drop entries with an epoch before cutoff; returns how many were dropped"""
+        evicted = 0
+        epochs = self._epochs
+        while epochs and epochs[0] < cutoff:
+            epochs.popleft()
+            self._items.popleft()
+            evicted += 1
+        return evicted
+
+    def tail(self, n: int) -> List[Any]:
+        """The n most recent entries, oldest first, without copying the rest"""
+        if n <= 0:
+            return []
+        newest = list(islice(reversed(self._items), n))
+        newest.reverse()
+        return newest
+
+    def iter_newest(self) -> Iterator[Tuple[float, Any]]:
+        """(epoch, entry) pairs from newest to oldest"""
+        return zip(reversed(self._epochs), reversed(self._items))
+
+    def oldest_epoch(self) -> Optional[float]:
+        return self._epochs[0] if self._epochs else None
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._epochs.clear()
+
+    def copy(self) -> "RingBuffer":
+        clone = RingBuffer.__new__(RingBuffer)
+        clone.capacity = self.capacity
+        clone.max_age = self.max_age
+        clone._items = self._items.copy()
+        clone._epochs = self._epochs.copy()
+        return clone
+
+    def to_list(self) -> List[Any]:
+        return list(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._items)[index]
+        return self._items[index]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, RingBuffer):
+            return list(self._items) == list(other._items)
+        if isinstance(other, list):
+            return list(self._items) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"RingBuffer(capacity={self.capacity}, max_age={self.max_age}, len={len(self)})"
@@ -1,18 +1,54 @@
 from typing import Any, Dict
 from datetime import datetime
 import json
+from .ring import RingBuffer
+
+try:
+    import msgpack
+except ImportError:  # Listed in requirements.txt, but only needed for the binary on-disk format
+    msgpack = None
+
+FORMATS = ("json", "msgpack")
+TYPE_TAG = "__type__"
+
+def encode_default(value: Any) -> Any:
+    """Fallback for values json/msgpack cannot encode natively
+    Only called for the rare non-native value, so native data pays nothing"""
+    if isinstance(value, RingBuffer):
+        # Ring buffers are stored as plain lists; MCP re-applies their limits on load
+        return value.to_list()
+    if isinstance(value, datetime):
+        return {TYPE_TAG: "datetime", "value": value.isoformat()}
+    if isinstance(value, (set, frozenset)):
+        return {TYPE_TAG: "set", "value": list(value)}
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+def decode_tagged(data: Dict[str, Any]) -> Any:
+    """Object hook restoring tagged values"""
+    tag = data.get(TYPE_TAG)
+    if tag == "datetime":
+        return datetime.fromisoformat(data["value"])
+    elif tag == "set":
+        return set(data["value"])
+    return data
 
 class ContextSerializer:
     """
     Handles serialization and deserialization of context data
     Converts complex Python objects to JSON-serializable format
+
+    encode/decode are the fast path: typed schema fields are converted up front
+    and everything else goes straight to the C encoder, with tagged values
+    handled by a fallback hook. serialize/deserialize walk the whole tree and
+    are kept for callers that need a JSON-native structure.
     """
-    
+
     def serialize(self, data: Any) -> Dict:
         """Convert complex Python objects to JSON-serializable format"""
         if isinstance(data, dict):
             return {k: self.serialize(v) for k, v in data.items()}
-        elif isinstance(data, (list, tuple)):
+        elif isinstance(data, (list, tuple, RingBuffer)):
+            # Ring buffers are stored as plain lists; MCP re-applies their limits on load
             return [self.serialize(item) for item in data]
         elif isinstance(data, datetime):
             return {
@@ -25,7 +61,7 @@ class ContextSerializer:
                 "value": list(data)
             }
         return data
-    
+
     def deserialize(self, data: Any) -> Any:
         """Convert serialized data back to Python objects"""
         if isinstance(data, dict):
@@ -38,3 +74,30 @@ class ContextSerializer:
         elif isinstance(data, (list, tuple)):
             return [self.deserialize(item) for item in data]
         return data
+
+    def encode(self, context: Dict[str, Any], fmt: str = "json") -> bytes:
+        """Encode a context dict straight to bytes in the given on-disk format"""
+        if isinstance(context.get("activeAgents"), set):
+            # Known typed field: stored as a plain list, restored to a set by MCP
+            context = dict(context, activeAgents=list(context["activeAgents"]))
+        if fmt == "json":
+            return json.dumps(context, default=encode_default, separators=(",", ":")).encode("utf-8")
+        elif fmt == "msgpack":
+            return require_msgpack().packb(context, default=encode_default, use_bin_type=True)
+        raise ValueError(f"Unknown context format: {fmt}")
+
+    def decode(self, raw: bytes, fmt: str = "json") -> Dict[str, Any]:
+        """Decode bytes produced by encode (or by older serialize + json.dump)"""
+        # Tagged values are rare; skip the per-object hook when there are none
+        object_hook = decode_tagged if TYPE_TAG.encode() in raw else None
+        if fmt == "json":
+            return json.loads(raw, object_hook=object_hook)
+        elif fmt == "msgpack":
+            return require_msgpack().unpackb(raw, raw=False, object_hook=object_hook, strict_map_key=False)
+        raise ValueError(f"Unknown context format: {fmt}")
+
+def require_msgpack():
+    """The msgpack module; a clear error if the format is requested without it installed"""
+    if msgpack is None:
+        raise RuntimeError("The msgpack context format requires the 'msgpack' package (pip install msgpack)")
+    return msgpack
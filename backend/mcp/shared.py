@@ -0,0 +1,293 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pathlib import Path
+import os
+import json
+import fcntl
+import logging
+import asyncio
+from .mcp import MCP, _encode_snapshot
+from .serializer import FORMATS, encode_default
+from .writer import write_atomic
+from utils.logger import span
+
+logger = logging.getLogger(__name__)
+
+class SharedJournal:
+    """
+    Journal file appended to by several processes
+
+    The first line is a header holding the sequence number of the snapshot
+    the journal continues from ("base"); every other line is one mutation
+    record with a global sequence number. Appends and compaction happen under
+    an exclusive flock on a separate lock file; reads take no lock and stop at
+    the last complete line. Compaction replaces the file, so a reader notices
+    it by the inode changing, finishes the old file through its open handle
+    and continues in the new one.
+    """
+
+    def __init__(self, path: Path, lock_path: Path, compact_every: int = 1000):
+        self.path = Path(path)
+        self.lock_path = Path(lock_path)
+        self.compact_every = compact_every          # Records after the base before a compaction
+        self.seq = 0                                # Highest sequence number read or appended
+        self.base = 0                               # Snapshot sequence number the current file starts at
+        self._file = None
+        self._ino: Optional[int] = None
+        self._offset = 0                            # End of the last complete line read
+        self._lock_fd: Optional[int] = None
+        self.stats = {"appends": 0, "remote_records": 0, "reloads": 0, "compactions": 0}
+
+    def lock(self) -> None:
+        """Take the cross-process lock (blocks; call from a worker thread)"""
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+
+    def unlock(self) -> None:
+        fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.seq - self.base >= self.compact_every
+
+    def changed(self) -> bool:
+        """Whether another process appended or compacted since the last read (one stat call)"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return st.st_ino != self._ino or st.st_size > self._offset
+
+    def start_at(self, seq: int) -> None:
+        """Read the current file from its start, skipping records up to seq (lock held)"""
+        if not self.path.exists():
+            self.reset(seq)
+        self.seq = seq
+        self._open()
+
+    def reset(self, base: int) -> None:
+        """Replace the journal with an empty one continuing from snapshot base (lock held)"""
+        write_atomic(self.path, (json.dumps({"base": base}) + "\n").encode("utf-8"))
+        self.seq = max(self.seq, base)
+        self._open()
+
+    def _open(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "rb")
+        self._ino = os.fstat(self._file.fileno()).st_ino
+        header = self._file.readline()
+        self.base = json.loads(header)["base"]
+        self._offset = len(header)
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        self._file.seek(self._offset)
+        data = self._file.read()
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable shared journal record in {self.path.name}")
+                continue
+            if record["seq"] > self.seq:
+                records.append(record)
+                self.seq = record["seq"]
+        return records
+
+    def read_new(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Records other processes appended since the last read, oldest first,
+        and whether this process fell behind a compaction and has to reload
+        the snapshot (under the lock) instead
+        """
+        records = self._drain() if self._file is not None else []
+        try:
+            replaced = os.stat(self.path).st_ino != self._ino
+        except FileNotFoundError:
+            return records, False
+        if replaced:
+            self._open()
+            if self.seq < self.base:
+                return [], True
+            records += self._drain()
+        return records, False
+
+    def append(self, op: str, data: Dict[str, Any]) -> int:
+        """Append a record after the last one in the file (lock held, file read to the end)"""
+        if os.stat(self.path).st_size > self._offset:
+            # A writer crashed mid-record; cut the torn tail so this record starts on a clean line
+            with open(self.path, "r+b") as f:
+                f.truncate(self._offset)
+        self.seq = max(self.seq, self.base) + 1
+        line = (json.dumps({"seq": self.seq, "op": op, "data": data}, separators=(",", ":"), default=encode_default) + "\n").encode("utf-8")
+        with open(self.path, "ab") as f:
+            f.write(line)
+        self._offset += len(line)
+        self.stats["appends"] += 1
+        return self.seq
+
+    async def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+class SharedMCP(MCP):
+    """
+    MCP for several worker processes sharing one storage directory
+
+    Every mutation is appended to a shared journal under a cross-process
+    lock, after first applying whatever other workers appended, so every
+    process applies the same mutations in the same order. Each process keeps
+    its in-memory context as a read-through cache: getters (and a background
+    watcher, every poll_interval seconds) check the journal with one stat
+    call and apply new records, bumping section versions and notifying
+    listeners as local mutations do. Once compact_every records pile up, the
+    worker that notices writes a snapshot and starts a fresh journal, under
+    the same lock; a worker that fell behind reloads that snapshot.
+    """
+
+    def __init__(
+        self,
+        storage_path: str = "data/mcp",
+        storage_format: str = "json",
+        history_limits: Optional[Dict[str, Dict[str, Any]]] = None,
+        scheduler: Optional[Any] = None,
+        compact_every: int = 1000,
+        poll_interval: float = 0.05
+    ):
+        super().__init__(storage_path, False, storage_format, history_limits, None, scheduler)
+        self.journal = SharedJournal(self.storage_path / "context.shared.journal", self.storage_path / "context.lock", compact_every)
+        self.poll_interval = poll_interval          # Seconds between checks for other workers' changes
+        self._shared_lock = asyncio.Lock()          # One shared-journal transaction per process at a time
+        self._watcher: Optional[asyncio.Task] = None
+        self._compaction: Optional[asyncio.Task] = None
+
+    async def initialize(self) -> None:
+        if not self._initialized:
+            await self.load_context()
+            if self.poll_interval:
+                self._watcher = asyncio.create_task(self._watch())
+            self._initialized = True
+
+    async def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+        if self._compaction is not None:
+            await asyncio.gather(self._compaction, return_exceptions=True)
+        await self.journal.close()
+        await self.writer.close()
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Shared context refresh failed: {e}")
+
+    def _locked(self, func: Callable[..., Any], *args: Any) -> Any:
+        self.journal.lock()
+        try:
+            return func(*args)
+        finally:
+            self.journal.unlock()
+
+    def _reload(self) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Snapshot and the journal records after it (lock held, so the two match)"""
+        context, snapshot_seq = self._read_snapshot_file()
+        self.journal.start_at(snapshot_seq)
+        return context, self.journal.read_new()[0]
+
+    def _pull(self, locked: bool) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        records, reload = self.journal.read_new()
+        if not reload:
+            return None, records
+        self.journal.stats["reloads"] += 1
+        return self._reload() if locked else self._locked(self._reload)
+
+    def _install(self, context: Optional[Dict[str, Any]], records: List[Dict[str, Any]]) -> None:
+        """Apply what _pull read; everything read is applied before anything else runs"""
+        if context is not None:
+            context["activeAgents"] = set(context["activeAgents"])
+            self._install_aggregates(context.pop("__aggregates__", None))
+            self.context = context
+            self._install_history_buffers()
+            self._fingerprints = {}
+            for section in self.context:
+                self._versions[section] = self._versions.get(section, 0) + 1
+            for listener in self._listeners:
+                listener("load_context", tuple(self.context))
+        for record in records:
+            record = self.serializer.deserialize(record)
+            self._apply(record["op"], record["data"])
+
+    async def load_context(self) -> None:
+        """Load the latest snapshot and the shared journal after it"""
+        try:
+            async with self._shared_lock:
+                context, records = await asyncio.to_thread(self._locked, self._reload)
+                self._install(context, records)
+        except Exception as e:
+            logger.error(f"Failed to load shared context: {e}")
+            await self.log_error(e, {"operation": "load_context"})
+
+    async def refresh(self) -> bool:
+        if not self.journal.changed():
+            return False
+        async with self._shared_lock:
+            context, records = await asyncio.to_thread(self._pull, False)
+            self._install(context, records)
+        self.journal.stats["remote_records"] += len(records)
+        return context is not None or bool(records)
+
+    def _transaction(self, op: str, data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        context, records = self._pull(locked=True)
+        self.journal.append(op, data)
+        return context, records
+
+    async def _commit(self, op: str, data: Dict[str, Any], shard: Optional[str] = None) -> None:
+        """Apply other workers' mutations, then append and apply this one, under the shared lock"""
+        async with self._shared_lock:
+            with span("mcp_lock_wait", section="shared"):
+                context, records = await asyncio.to_thread(self._locked, self._transaction, op, data)
+            self._install(context, records)
+            self._apply(op, data)
+        self.journal.stats["remote_records"] += len(records)
+        if self.journal.needs_compaction and (self._compaction is None or self._compaction.done()):
+            self._compaction = asyncio.create_task(self._scheduled_compact() if self.scheduler else self.compact())
+
+    def _write_snapshot(self, snapshot: Tuple[Any, ...]) -> None:
+        write_atomic(self.storage_path / f"context.{self.storage_format}", _encode_snapshot(snapshot))
+        for fmt in FORMATS:
+            # A snapshot left in another format would shadow this one on load
+            stale = self.storage_path / f"context.{fmt}"
+            if fmt != self.storage_format and stale.exists():
+                stale.unlink()
+        self.journal.reset(self.journal.seq)
+        self.journal.stats["compactions"] += 1
+
+    async def compact(self) -> None:
+        """Fold the shared journal into a snapshot, unless another worker just did"""
+        async with self._shared_lock:
+            await asyncio.to_thread(self.journal.lock)
+            try:
+                context, records = await asyncio.to_thread(self._pull, True)
+                self._install(context, records)
+                if self.journal.needs_compaction:
+                    await asyncio.to_thread(self._write_snapshot, self._capture_snapshot())
+            except Exception as e:
+                logger.error(f"Failed to compact shared journal: {e}")
+            finally:
+                self.journal.unlock()
+
+    async def save_context(self) -> None:
+        """Snapshots are only written by compaction, under the shared lock"""
+        await self.compact()
@@ -0,0 +1,254 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from collections import deque
+import json
+import uuid
+import logging
+import asyncio
+from .serializer import encode_default
+
+logger = logging.getLogger(__name__)
+
+def _stream_default(value: Any) -> Any:
+    # Clients get plain JSON: sets become sorted lists, ring buffers lists
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return encode_default(value)
+
+def to_json_value(value: Any) -> Any:
+    """Plain JSON copy of a context value"""
+    return json.loads(json.dumps(value, default=_stream_default))
+
+def parse_event_id(event_id: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    """Stream id and sequence number from an SSE event id ("<stream>:<seq>")"""
+    stream, _, seq = (event_id or "").rpartition(":")
+    if not stream or not seq.isdigit():
+        return None, None
+    return stream, int(seq)
+
+def _escape(key: str) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+def _list_shift(old: List[Any], new: List[Any]) -> Optional[int]:
+    """Entries dropped from the front of old if new is old shifted left and appended to"""
+    if not old:
+        return 0
+    for start in range(len(old)):
+        kept = len(old) - start
+        if kept <= len(new) and old[start] == new[0] and old[start:] == new[:kept]:
+            return start
+    return None
+
+def diff(old: Any, new: Any, path: str = "", ops: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    JSON-patch-style ops turning old into new
+    Besides add/remove/replace, history lists use "drop" (remove count
+    entries from the front) and "append" (extend with value), so a ring
+    buffer that gained one entry and evicted one costs two small ops.
+    """
+    if ops is None:
+        ops = []
+    if old == new:
+        return ops
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old.keys() - new.keys():
+            ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+            else:
+                diff(old[key], value, f"{path}/{_escape(key)}", ops)
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and new:
+        dropped = _list_shift(old, new)
+        if dropped is not None:
+            if dropped:
+                ops.append({"op": "drop", "path": path, "count": dropped})
+            kept = len(old) - dropped
+            if len(new) > kept:
+                ops.append({"op": "append", "path": path, "value": new[kept:]})
+            return ops
+    ops.append({"op": "replace", "path": path, "value": new})
+    return ops
+
+def apply_ops(state: Dict[str, Any], ops: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply delta ops to a client-side copy of the context, in place"""
+    for op in ops:
+        tokens = [_unescape(token) for token in op["path"].split("/")[1:]]
+        parent: Any = state
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        key: Any = tokens[-1]
+        if isinstance(parent, list):
+            key = int(key)
+        kind = op["op"]
+        if kind in ("add", "replace"):
+            parent[key] = op["value"]
+        elif kind == "remove":
+            del parent[key]
+        elif kind == "drop":
+            del parent[key][:op["count"]]
+        elif kind == "append":
+            parent[key].extend(op["value"])
+        else:
+            raise ValueError(f"Unknown delta op: {kind}")
+    return state
+
+class Subscription:
+    """
+    One client's frame queue
+    A client that falls max_pending frames behind is not buffered further:
+    its queue is dropped and its next frame is a fresh snapshot.
+    """
+
+    def __init__(self, streamer: "ContextStreamer", sections: Optional[Iterable[str]], max_pending: int):
+        self.streamer = streamer
+        self.sections = set(sections) if sections else None  # None: every section
+        self.queue: asyncio.Queue = asyncio.Queue(max_pending)
+        self.resync = True                          # Next frame is a snapshot
+        self.queue.put_nowait(None)
+
+    def offer(self, frame: Dict[str, Any]) -> None:
+        if self.resync:
+            return
+        if self.sections is not None:
+            ops = [op for op in frame["ops"] if op["path"].split("/", 2)[1] in self.sections]
+            if not ops:
+                return
+            frame = {"type": "delta", "stream": frame["stream"], "seq": frame["seq"], "ops": ops}
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self._drain()
+            self.resync = True
+            self.queue.put_nowait(None)
+            self.streamer.stats["resyncs"] += 1
+
+    def _drain(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    async def next(self) -> Dict[str, Any]:
+        """Next frame to send: a snapshot after (re)connecting or lagging, else a delta"""
+        frame = await self.queue.get()
+        if frame is None:
+            self._drain()
+            self.resync = False
+            return self.streamer.snapshot(self.sections)
+        return frame
+
+    def close(self) -> None:
+        self.streamer.unsubscribe(self)
+
+class ContextStreamer:
+    """
+    Publishes MCP changes to subscribers as sequenced deltas
+
+    MCP commits mark their sections dirty; at most once per tick the dirty
+    sections are diffed against the last published copy and every change
+    since goes out as one frame with the next sequence number. New
+    subscribers get a snapshot first, or, when resuming from a sequence
+    number still in the backlog, just the frames they missed. Sequence
+    numbers restart with every streamer (and differ between worker
+    processes), so frames carry the streamer's random stream id and a
+    resume point only counts when it names this stream.
+    """
+
+    def __init__(self, mcp: Any, tick: float = 0.05, max_pending: int = 64, backlog: int = 256):
+        self.mcp = mcp
+        self.tick = tick                            # Minimum seconds between frames
+        self.max_pending = max_pending              # Frames a client may fall behind before a resync
+        self.stream_id = uuid.uuid4().hex[:12]      # Scopes sequence numbers to this streamer
+        self.seq = 0
+        self._state: Dict[str, Any] = {}            # Published JSON copy of each section
+        self._backlog: deque = deque(maxlen=backlog)
+        self._subscribers: List[Subscription] = []
+        self._dirty: set = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"frames": 0, "ops": 0, "commits": 0, "resyncs": 0}
+
+    def start(self) -> None:
+        if self._task is None:
+            self._state = {section: to_json_value(value) for section, value in self.mcp.context.items()}
+            self.mcp.add_listener(self._on_commit)
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self.mcp.remove_listener(self._on_commit)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_commit(self, op: str, sections: Iterable[str]) -> None:
+        self._dirty.update(sections)
+        self.stats["commits"] += 1
+        self._wakeup.set()
+
+    async def _loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.publish()
+            except Exception as e:
+                logger.error(f"Context stream publish failed: {e}")
+            # Commits landing during the pause are coalesced into the next frame
+            await asyncio.sleep(self.tick)
+
+    def publish(self) -> Optional[Dict[str, Any]]:
+        """Diff dirty sections and send one frame to every subscriber"""
+        dirty, self._dirty = self._dirty, set()
+        ops: List[Dict[str, Any]] = []
+        for section in sorted(dirty):
+            new = to_json_value(self.mcp.context.get(section))
+            diff(self._state.get(section), new, f"/{_escape(section)}", ops)
+            self._state[section] = new
+        if not ops:
+            return None
+        self.seq += 1
+        frame = {"type": "delta", "stream": self.stream_id, "seq": self.seq, "ops": ops}
+        self._backlog.append(frame)
+        self.stats["frames"] += 1
+        self.stats["ops"] += len(ops)
+        for subscriber in self._subscribers:
+            subscriber.offer(frame)
+        return frame
+
+    def snapshot(self, sections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Published context as of the current sequence number"""
+        state = self._state if sections is None else {s: self._state[s] for s in sections if s in self._state}
+        return {"type": "snapshot", "stream": self.stream_id, "seq": self.seq, "context": dict(state)}
+
+    def subscribe(
+        self,
+        since: Optional[int] = None,
+        sections: Optional[Iterable[str]] = None,
+        stream: Optional[str] = None
+    ) -> Subscription:
+        """
+        New subscription; its first frame is a snapshot unless stream is this
+        streamer's id and since a sequence number the backlog still covers, in
+        which case the missed deltas are replayed instead
+        """
+        subscription = Subscription(self, sections, self.max_pending)
+        if stream == self.stream_id and since is not None and since <= self.seq:
+            missed = [frame for frame in self._backlog if frame["seq"] > since]
+            covered = since == self.seq or (missed and missed[0]["seq"] == since + 1)
+            if covered and len(missed) < self.max_pending:
+                subscription._drain()
+                subscription.resync = False
+                for frame in missed:
+                    subscription.offer(frame)
+        self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
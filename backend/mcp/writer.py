@@ -0,0 +1,112 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import os
+import time
+import logging
+import asyncio
+from utils.logger import observe
+
+logger = logging.getLogger(__name__)
+
+def write_atomic(path: Path, data: bytes) -> int:
+    """Write data to path so readers only ever see the old or the new file"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    # fsync the directory so the rename itself survives a crash
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+    return len(data)
+
+def _encode_and_write(encode: Callable[[Any], bytes], path: Path, data: Any) -> Tuple[int, float, float]:
+    """Bytes written plus encode and write seconds, timed here since this may run in another process"""
+    started = time.perf_counter()
+    encoded = encode(data)
+    encoded_at = time.perf_counter()
+    written = write_atomic(path, encoded)
+    return written, encoded_at - started, time.perf_counter() - encoded_at
+
+class ContextWriter:
+    """
+    Off-loop, crash-safe writer for context snapshots
+    Encoding and disk I/O run in an executor; overlapping save requests are
+    coalesced so at most one write is in flight and one more is pending.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        encode: Callable[[Any], bytes],
+        process_threshold: int = 50_000
+    ):
+        self.path = Path(path)
+        self.encode = encode                        # Runs off-loop: snapshot -> bytes
+        self.process_threshold = process_threshold  # Size hint above which encoding moves to a process pool
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._capture: Optional[Callable[[], Any]] = None
+        self._size_hint = 0
+        self._waiter: Optional[asyncio.Future] = None
+        self._driver: Optional[asyncio.Task] = None
+        self.stats = {
+            "requests": 0,
+            "writes": 0,
+            "bytes_written": 0
+        }
+
+    async def save(self, capture: Callable[[], Any], size_hint: int = 0) -> None:
+        """
+        Persist the state returned by capture()
+        capture runs on the loop right before the write starts, so a request
+        that joins a pending write is still covered by that write.
+        """
+        loop = asyncio.get_running_loop()
+        self.stats["requests"] += 1
+        self._capture = capture
+        self._size_hint = size_hint
+        if self._waiter is None:
+            self._waiter = loop.create_future()
+        waiter = self._waiter
+        if self._driver is None or self._driver.done():
+            self._driver = asyncio.create_task(self._drive())
+        await asyncio.shield(waiter)
+
+    async def _drive(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._waiter is not None:
+            waiter, self._waiter = self._waiter, None
+            try:
+                data = self._capture()
+                if self._size_hint >= self.process_threshold:
+                    if self._process_pool is None:
+                        self._process_pool = ProcessPoolExecutor(max_workers=1)
+                    executor = self._process_pool
+                else:
+                    executor = None  # Default thread pool
+                written, encode_seconds, write_seconds = await loop.run_in_executor(
+                    executor, _encode_and_write, self.encode, self.path, data
+                )
+                observe("mcp_serialize", encode_seconds)
+                observe("mcp_disk_write", write_seconds)
+                self.stats["writes"] += 1
+                self.stats["bytes_written"] += written
+                if not waiter.done():
+                    waiter.set_result(None)
+            except Exception as e:
+                if not waiter.done():
+                    waiter.set_exception(e)
+
+    async def close(self) -> None:
+        """Wait for outstanding writes and release the process pool"""
+        if self._driver is not None:
+            await asyncio.gather(self._driver, return_exceptions=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True)
+            self._process_pool = None
@@ -0,0 +1,144 @@
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from abc import ABC, abstractmethod
+import json
+import time
+import logging
+import asyncio
+import httpx
+from .http import HTTPClientPool, get_http_pool
+from utils.logger import observe
+
+logger = logging.getLogger(__name__)
+
+class ModelError(Exception):
+    """A model backend failed or returned an unusable response"""
+
+def sse_data(line: str) -> Optional[Dict[str, Any]]:
+    """JSON payload of a server-sent event data line (None for anything else)"""
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    return json.loads(data)
+
+class HTTPModelClient(ABC):
+    """
+    Base class for LLM backends reached over HTTP
+    Subclasses describe the provider's request and response format; requests
+    go through the shared HTTPClientPool (keep-alive connections, per-provider
+    concurrency and rate limits, retries).
+    """
+
+    name = "model"
+    provider = "default"
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: Optional[str] = None,
+        timeout: float = 30.0,
+        pool: Optional[HTTPClientPool] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        self.pool = pool or get_http_pool()
+
+    @abstractmethod
+    def build_request(
+        self,
+        prompt: str,
+        max_tokens: int,
+        stream: bool = False
+    ) -> Tuple[str, Dict[str, Any], Dict[str, str], Dict[str, str]]:
+        """(path, JSON body, headers, query params) for a completion request"""
+
+    @abstractmethod
+    def parse_response(self, data: Dict[str, Any]) -> str:
+        """Generated text from the provider's JSON response"""
+
+    @abstractmethod
+    def parse_stream_line(self, line: str) -> Optional[str]:
+        """Text delta carried by one line of a streamed response, if any"""
+
+    async def generate(self, prompt: str, max_tokens: int = 512) -> str:
+        """Complete prompt; raises ModelError on HTTP or format errors"""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            text = await self._generate(prompt, max_tokens)
+            outcome = "ok"
+            return text
+        except asyncio.CancelledError:
+            outcome = "cancelled"  # e.g. a hedged request that lost the race
+            raise
+        finally:
+            observe("model_call", time.perf_counter() - started, model=self.name, outcome=outcome)
+
+    async def _generate(self, prompt: str, max_tokens: int) -> str:
+        path, body, headers, params = self.build_request(prompt, max_tokens)
+        try:
+            response = await self.pool.request(
+                self.provider, "POST", self.base_url + path,
+                json=body, headers=headers, params=params, timeout=self.timeout
+            )
+        except httpx.HTTPError as e:
+            raise ModelError(f"{self.name}: {type(e).__name__}: {e}") from e
+        if response.status_code >= 400:
+            raise ModelError(f"{self.name}: HTTP {response.status_code}")
+        try:
+            return self.parse_response(response.json())
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise ModelError(f"{self.name}: malformed response: {e}") from e
+
+    async def stream(self, prompt: str, max_tokens: int = 512) -> AsyncIterator[str]:
+        """Complete prompt, yielding text as the provider produces it"""
+        path, body, headers, params = self.build_request(prompt, max_tokens, stream=True)
+        try:
+            async with self.pool.stream(
+                self.provider, "POST", self.base_url + path,
+                json=body, headers=headers, params=params, timeout=self.timeout
+            ) as response:
+                if response.status_code >= 400:
+                    raise ModelError(f"{self.name}: HTTP {response.status_code}")
+                async for line in response.aiter_lines():
+                    try:
+                        text = self.parse_stream_line(line) if line else None
+                    except (ValueError, KeyError, IndexError, TypeError) as e:
+                        raise ModelError(f"{self.name}: malformed stream: {e}") from e
+                    if text:
+                        yield text
+        except httpx.HTTPError as e:
+            raise ModelError(f"{self.name}: {type(e).__name__}: {e}") from e
+
+    async def close(self) -> None:
+        """Connections belong to the shared pool, which is closed on shutdown"""
+
+class ChatCompletionsClient(HTTPModelClient):
+    """Backends with an OpenAI-compatible /v1/chat/completions endpoint"""
+
+    def build_request(
+        self,
+        prompt: str,
+        max_tokens: int,
+        stream: bool = False
+    ) -> Tuple[str, Dict[str, Any], Dict[str, str], Dict[str, str]]:
+        body = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens
+        }
+        if stream:
+            body["stream"] = True
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        return "/v1/chat/completions", body, headers, {}
+
+    def parse_response(self, data: Dict[str, Any]) -> str:
+        return data["choices"][0]["message"]["content"]
+
+    def parse_stream_line(self, line: str) -> Optional[str]:
+        data = sse_data(line)
+        return data["choices"][0]["delta"].get("content") if data else None
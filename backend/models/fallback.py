@@ -0,0 +1,36 @@
+from typing import Any, Dict, Optional, Tuple
+import json
+from .base import HTTPModelClient
+from .http import HTTPClientPool
+
+class OllamaClient(HTTPModelClient):
+    """Local model through Ollama's /api/generate; works offline, used as the last resort"""
+
+    name = "fallback"
+    provider = "ollama"
+
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:11434",
+        model: str = "phi",
+        api_key: Optional[str] = None,
+        timeout: float = 60.0,
+        pool: Optional[HTTPClientPool] = None
+    ):
+        super().__init__(base_url, model, api_key, timeout, pool)
+
+    def build_request(
+        self,
+        prompt: str,
+        max_tokens: int,
+        stream: bool = False
+    ) -> Tuple[str, Dict[str, Any], Dict[str, str], Dict[str, str]]:
+        body = {"model": self.model, "prompt": prompt, "stream": stream, "options": {"num_predict": max_tokens}}
+        return "/api/generate", body, {}, {}
+
+    def parse_response(self, data: Dict[str, Any]) -> str:
+        return data["response"]
+
+    def parse_stream_line(self, line: str) -> Optional[str]:
+        # Ollama streams one JSON object per line
+        return json.loads(line).get("response")
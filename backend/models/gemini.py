@@ -0,0 +1,43 @@
+from typing import Any, Dict, Optional, Tuple
+import os
+from .base import HTTPModelClient, sse_data
+from .http import HTTPClientPool
+
+class GeminiClient(HTTPModelClient):
+    """Gemini models through the Generative Language REST API"""
+
+    name = "gemini"
+    provider = "gemini"
+
+    def __init__(
+        self,
+        base_url: str = "https://generativelanguage.googleapis.com",
+        model: str = "gemini-1.5-flash",
+        api_key: Optional[str] = None,
+        timeout: float = 30.0,
+        pool: Optional[HTTPClientPool] = None
+    ):
+        super().__init__(base_url, model, api_key or os.environ.get("GEMINI_API_KEY"), timeout, pool)
+
+    def build_request(
+        self,
+        prompt: str,
+        max_tokens: int,
+        stream: bool = False
+    ) -> Tuple[str, Dict[str, Any], Dict[str, str], Dict[str, str]]:
+        body = {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": {"maxOutputTokens": max_tokens}
+        }
+        params = {"key": self.api_key} if self.api_key else {}
+        if stream:
+            params["alt"] = "sse"
+        method = "streamGenerateContent" if stream else "generateContent"
+        return f"/v1beta/models/{self.model}:{method}", body, {}, params
+
+    def parse_response(self, data: Dict[str, Any]) -> str:
+        return "".join(part.get("text", "") for part in data["candidates"][0]["content"]["parts"])
+
+    def parse_stream_line(self, line: str) -> Optional[str]:
+        data = sse_data(line)
+        return self.parse_response(data) if data else None
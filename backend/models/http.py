@@ -0,0 +1,199 @@
+from typing import Any, AsyncIterator, Dict, Optional
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+import time
+import random
+import logging
+import asyncio
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Per-provider limits: concurrent requests, sustained requests per second and
+# burst size of the token bucket (None disables rate limiting). The defaults
+# sit under the providers' free-tier quotas; raise them for paid plans.
+PROVIDER_LIMITS = {
+    "together": {"max_concurrency": 8, "rate": 10.0, "burst": 10},
+    "gemini": {"max_concurrency": 4, "rate": 0.25, "burst": 5},
+    "ollama": {"max_concurrency": 2, "rate": None, "burst": None},
+    "default": {"max_concurrency": 4, "rate": None, "burst": None}
+}
+
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Async token bucket: rate tokens per second, up to capacity stored"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Wait for tokens; returns the seconds spent waiting"""
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return now - started
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+class HTTPClientPool:
+    """
+    Pooled HTTP clients shared by every model backend
+
+    One keep-alive connection pool per host, so TLS and connection setup are
+    paid once rather than per request. Each provider gets a concurrency
+    semaphore and a token-bucket rate limiter from PROVIDER_LIMITS.
+    Connection errors, timeouts and retryable statuses (429, 5xx) are retried
+    with full-jitter exponential backoff, honouring Retry-After. stream()
+    hands back the response before the body is read so callers can forward
+    tokens as they arrive.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_connections_per_host: int = 10,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 30.0,
+        retries: int = 3,
+        backoff_base: float = 0.25,
+        backoff_max: float = 8.0
+    ):
+        self.limits = {**PROVIDER_LIMITS, **(limits or {})}
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_expiry = keepalive_expiry    # Seconds an idle connection is kept open
+        self.timeout = timeout
+        self.retries = retries                      # Extra attempts after the first
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        """Bind the pool to the running event loop"""
+        self._bind_loop()
+
+    async def close(self) -> None:
+        """Close every pooled connection; the pool reconnects if used again"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """The keep-alive client for url's host, created on first use"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(origin)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections_per_host,
+                    max_keepalive_connections=self.max_connections_per_host,
+                    keepalive_expiry=self.keepalive_expiry
+                )
+            )
+            self._clients[origin] = client
+        return client
+
+    def _bind_loop(self) -> None:
+        # Connections and semaphores belong to one event loop; start over on a new one
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._clients = {}
+            self._semaphores = {}
+            self._buckets = {}
+            self.stats = {}
+
+    def _provider(self, provider: str) -> Dict[str, float]:
+        self._bind_loop()
+        stats = self.stats.get(provider)
+        if stats is None:
+            limits = self.limits.get(provider, self.limits["default"])
+            self._semaphores[provider] = asyncio.Semaphore(limits["max_concurrency"])
+            self._buckets[provider] = TokenBucket(limits["rate"], limits["burst"] or 1) if limits["rate"] else None
+            stats = self.stats[provider] = {"requests": 0, "retries": 0, "errors": 0, "in_flight": 0, "throttled_seconds": 0.0}
+        return stats
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @asynccontextmanager
+    async def _slot(self, provider: str) -> AsyncIterator[Dict[str, float]]:
+        """Hold one of the provider's concurrency slots"""
+        stats = self._provider(provider)
+        async with self._semaphores[provider]:
+            stats["in_flight"] += 1
+            try:
+                yield stats
+            finally:
+                stats["in_flight"] -= 1
+
+    async def _send(self, provider: str, method: str, url: str, stream: bool, **kwargs: Any) -> httpx.Response:
+        """Send with rate limiting and retries; the caller must hold a slot"""
+        stats = self.stats[provider]
+        client = self.client_for(url)
+        for attempt in range(self.retries + 1):
+            bucket = self._buckets[provider]
+            if bucket is not None:
+                stats["throttled_seconds"] += await bucket.acquire()
+            stats["requests"] += 1
+            response = None
+            try:
+                request = client.build_request(method, url, **kwargs)
+                response = await client.send(request, stream=stream)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                await response.aclose()
+            except (httpx.TransportError, httpx.TimeoutException):
+                if attempt == self.retries:
+                    stats["errors"] += 1
+                    raise
+            stats["retries"] += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+        raise AssertionError("unreachable")
+
+    async def request(self, provider: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request and read the whole response"""
+        async with self._slot(provider):
+            return await self._send(provider, method, url, False, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, provider: str, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """Send a request and yield the response before its body is read
+        Retries only happen before the response starts; the provider slot is
+        held until the body is consumed."""
+        async with self._slot(provider):
+            response = await self._send(provider, method, url, True, **kwargs)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+
+_shared_pool: Optional[HTTPClientPool] = None
+
+def get_http_pool() -> HTTPClientPool:
+    """Process-wide pool, created on first use"""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = HTTPClientPool()
+    return _shared_pool
@@ -0,0 +1,147 @@
+from typing import Any, Dict, Optional
+import argparse
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StubModelServer:
+    """
+    Minimal HTTP/1.1 server answering completion requests in the format of
+    whichever provider endpoint is called (OpenAI-compatible chat
+    completions, Gemini generateContent, Ollama generate)
+    latency, fail_status, fail_times and reply can be changed while it runs to
+    simulate slow, failing or rate-limited backends. Streaming requests are
+    answered word by word with chunked transfer encoding.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 fail_status: Optional[int] = None, reply: str = "stub reply", stream_interval: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency                  # Seconds before each response
+        self.fail_status = fail_status          # Answer requests with this HTTP status when set
+        self.fail_times: Optional[int] = None   # Only fail this many more requests (None: all of them)
+        self.reply = reply
+        self.stream_interval = stream_interval  # Seconds between streamed words
+        self.requests = 0
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            if hasattr(self._server, "close_clients"):
+                self._server.close_clients()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode("latin-1").split(" ", 2)
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value.strip())
+                body = await reader.readexactly(length) if length else b""
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status = self._failure()
+                if status is None and self._is_stream(path, body):
+                    await self._stream(path, writer)
+                    continue
+                payload = {"error": "simulated failure"} if status else self._payload(path, self.reply)
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status or 200} {'Error' if status else 'OK'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass
+        finally:
+            writer.close()
+
+    def _failure(self) -> Optional[int]:
+        if self.fail_status is None or self.fail_times == 0:
+            return None
+        if self.fail_times is not None:
+            self.fail_times -= 1
+        return self.fail_status
+
+    def _is_stream(self, path: str, body: bytes) -> bool:
+        if "streamGenerateContent" in path:
+            return True
+        try:
+            return bool(json.loads(body or b"{}").get("stream"))
+        except ValueError:
+            return False
+
+    def _payload(self, path: str, text: str, stream: bool = False) -> Dict[str, Any]:
+        if ":generateContent" in path or "streamGenerateContent" in path:
+            return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]}
+        if path.startswith("/api/generate"):
+            return {"response": text, "done": not stream}
+        if stream:
+            return {"choices": [{"delta": {"content": text}}]}
+        return {"choices": [{"message": {"role": "assistant", "content": text}}]}
+
+    async def _stream(self, path: str, writer: asyncio.StreamWriter) -> None:
+        sse = not path.startswith("/api/generate")
+        writer.write(
+            f"HTTP/1.1 200 OK\r\nContent-Type: {'text/event-stream' if sse else 'application/x-ndjson'}\r\n"
+            "Transfer-Encoding: chunked\r\n\r\n".encode("latin-1")
+        )
+        words = self.reply.split(" ")
+        for i, word in enumerate(words):
+            text = word if i == 0 else f" {word}"
+            line = json.dumps(self._payload(path, text, stream=True))
+            chunk = (f"data: {line}\n\n" if sse else f"{line}\n").encode("utf-8")
+            writer.write(f"{len(chunk):x}\r\n".encode("latin-1") + chunk + b"\r\n")
+            await writer.drain()
+            if self.stream_interval:
+                await asyncio.sleep(self.stream_interval)
+        if sse and "chat/completions" in path:
+            chunk = b"data: [DONE]\n\n"
+            writer.write(f"{len(chunk):x}\r\n".encode("latin-1") + chunk + b"\r\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = StubModelServer(args.host, args.port, args.latency, args.fail_status, args.reply, args.stream_interval)
+    await server.start()
+    logger.info(f"Stub model server listening on {server.url}")
+    print(f"Stub model server listening on {server.url}")
+    await asyncio.Event().wait()
+
+# Usage (from backend/): python -m models.stub_server --port 8089 --latency 0.3
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the model provider APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-status", type=int, default=None)
+    parser.add_argument("--reply", default="stub reply")
+    parser.add_argument("--stream-interval", type=float, default=0.0)
+    asyncio.run(_serve(parser.parse_args()))
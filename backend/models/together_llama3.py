@@ -0,0 +1,20 @@
+from typing import Optional
+import os
+from .base import ChatCompletionsClient
+from .http import HTTPClientPool
+
+class TogetherLlama3Client(ChatCompletionsClient):
+    """Llama 3 chat model served by Together's OpenAI-compatible API"""
+
+    name = "llama3"
+    provider = "together"
+
+    def __init__(
+        self,
+        base_url: str = "https://api.together.xyz",
+        model: str = "meta-llama/Llama-3-70b-chat-hf",
+        api_key: Optional[str] = None,
+        timeout: float = 30.0,
+        pool: Optional[HTTPClientPool] = None
+    ):
+        super().__init__(base_url, model, api_key or os.environ.get("TOGETHER_API_KEY"), timeout, pool)
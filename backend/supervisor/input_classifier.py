@@ -0,0 +1,277 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from collections import deque
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+import os
+import json
+import time
+import logging
+from rapidfuzz.process import extractOne
+from rapidfuzz.fuzz import ratio
+from rapidfuzz.utils import default_process
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMMAND_MAP = Path(__file__).parent / "command_map.json"
+
+# Words a command may start with before its prefix ("please open firefox"), longest first
+COMMAND_LEADINS = ("hey aura", "aura", "please")
+# An app argument is a name ("firefox", "visual studio code"), not a request
+APP_ARGUMENT_WORDS = 3
+APP_ARGUMENT_FILLERS = ("the", "my")
+NON_APP_WORDS = frozenset((
+    "a", "an", "and", "or", "but", "of", "for", "to", "in", "on", "at", "by", "from", "with",
+    "about", "through", "into", "than", "versus", "vs", "me", "you", "it", "this", "that",
+    "how", "what", "why", "when", "where", "who", "which", "is", "are", "be", "do", "does"
+))
+
+def normalize_text(text: str) -> str:
+    """Lowercase, replace punctuation with spaces and collapse whitespace"""
+    return " ".join(default_process(text).split())
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over normalized keyword patterns
+    Finds every pattern occurring in a text in a single pass over it,
+    independent of how many patterns there are.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(index)
+
+        # Breadth-first failure links; outputs of the fallback state are inherited
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def search(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(start, pattern index) for every pattern occurrence in text"""
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                yield position - len(patterns[index]) + 1, index
+
+class _CompiledMap:
+    """Lookup structures built from one version of the command map"""
+
+    def __init__(self, commands: List[Dict[str, Any]]):
+        self.commands = commands
+        self.exact: Dict[str, int] = {}
+        self.prefixes: Dict[str, int] = {}
+        patterns: List[str] = []
+        self.pattern_commands: List[int] = []
+        for index, command in enumerate(commands):
+            for phrase in command.get("phrases", []):
+                phrase = normalize_text(phrase)
+                if phrase and phrase not in self.exact:
+                    self.exact[phrase] = index
+            for prefix in command.get("prefixes", []):
+                prefix = normalize_text(prefix)
+                if prefix and prefix not in self.prefixes:
+                    self.prefixes[prefix] = index
+            for pattern in command.get("patterns", []):
+                pattern = normalize_text(pattern)
+                if pattern:
+                    patterns.append(pattern)
+                    self.pattern_commands.append(index)
+        self.automaton = KeywordAutomaton(patterns)
+        self.prefix_words = max((len(prefix.split()) for prefix in self.prefixes), default=0)
+        # Fuzzy choices sorted by length, so a score cutoff narrows them to a slice
+        ordered = sorted(self.exact.items(), key=lambda item: len(item[0]))
+        self.choices = [phrase for phrase, _ in ordered]
+        self.choice_commands = [index for _, index in ordered]
+        self.choice_lengths = [len(phrase) for phrase in self.choices]
+
+class CommandMatcher:
+    """
+    Precompiled matcher for the locally answerable commands in command_map.json
+
+    Classification tries, in order: an exact hash lookup of the normalized
+    input against every phrase, a lookup of the input's first words against
+    command prefixes ("open firefox"; only at the start, so "how do I start
+    a business" is left to a model), an Aho-Corasick pass for keyword
+    patterns anywhere in the input (whole words, longest match wins; the
+    words after the match are returned as the argument), and a bulk fuzzy
+    score of the input against all phrases.
+    A prefix command that declares an argument kind ("argument": "app")
+    only matches when the rest of the input is such an argument: for apps,
+    a short name with no function words ("run me through photosynthesis"
+    is left to a model) that the argument_checks callback for the kind, if
+    one is given, accepts (e.g. resolves against the AppIndex).
+    The map is reloaded when the file's mtime changes; a broken file keeps
+    the previous map.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        fuzzy_cutoff: float = 88,
+        check_interval: float = 1.0,
+        argument_checks: Optional[Dict[str, Callable[[str], bool]]] = None
+    ):
+        self.path = Path(path) if path else DEFAULT_COMMAND_MAP
+        self.fuzzy_cutoff = fuzzy_cutoff        # Minimum rapidfuzz ratio for a fuzzy phrase match
+        self.check_interval = check_interval    # Seconds between mtime checks on classify
+        self.argument_checks = dict(argument_checks or {})  # Argument kind -> whether a value is valid
+        self._compiled = _CompiledMap([])
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+        self.stats = {"lookups": 0, "exact": 0, "pattern": 0, "fuzzy": 0, "misses": 0, "reloads": 0}
+        self.reload(force=True)
+
+    @property
+    def commands(self) -> List[Dict[str, Any]]:
+        return self._compiled.commands
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile the map if the file changed; returns True if it was reloaded"""
+        self._last_check = time.monotonic()
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if not force and mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = f.read()
+            commands = json.loads(raw)["commands"] if raw.strip() else []
+            compiled = _CompiledMap(commands)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Error loading command map {self.path}: {e}")
+            return False
+        # Swap in one assignment so a classify never sees a half-built map
+        self._compiled = compiled
+        self.stats["reloads"] += 1
+        return True
+
+    def classify(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Match text against the command map
+        Returns a dict with the command id, response, action, matched tier
+        ("exact", "pattern" or "fuzzy"), score and argument, or None.
+        """
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self.reload()
+        self.stats["lookups"] += 1
+        compiled = self._compiled
+        query = normalize_text(text)
+        if not query:
+            self.stats["misses"] += 1
+            return None
+
+        index = compiled.exact.get(query)
+        if index is not None:
+            return self._result(compiled, index, "exact", 100.0, "")
+
+        if compiled.prefixes:
+            match = self._match_prefix(compiled, query)
+            if match is not None:
+                index, argument = match
+                return self._result(compiled, index, "pattern", 100.0, argument)
+
+        best = None
+        for start, pattern_index in compiled.automaton.search(query):
+            pattern = compiled.automaton.patterns[pattern_index]
+            end = start + len(pattern)
+            # Whole words only
+            if (start and query[start - 1] != " ") or (end < len(query) and query[end] != " "):
+                continue
+            if best is None or len(pattern) > len(best[1]):
+                best = (start, pattern, pattern_index)
+        if best is not None:
+            start, pattern, pattern_index = best
+            # The argument is what follows the pattern ("open firefox"), else what precedes it
+            argument = query[start + len(pattern):].strip() or query[:start].strip()
+            return self._result(compiled, compiled.pattern_commands[pattern_index], "pattern", 100.0, argument)
+
+        # ratio() >= cutoff is impossible unless the lengths are within a factor of cutoff / (200 - cutoff)
+        cutoff = self.fuzzy_cutoff
+        low = bisect_left(compiled.choice_lengths, len(query) * cutoff / (200 - cutoff))
+        high = bisect_right(compiled.choice_lengths, len(query) * (200 - cutoff) / cutoff)
+        if low < high:
+            match = extractOne(query, compiled.choices[low:high], scorer=ratio, processor=None, score_cutoff=cutoff)
+            if match is not None:
+                _, score, choice = match
+                return self._result(compiled, compiled.choice_commands[low + choice], "fuzzy", score, "")
+
+        self.stats["misses"] += 1
+        return None
+
+    def _match_prefix(self, compiled: _CompiledMap, query: str) -> Optional[Tuple[int, str]]:
+        """Command whose prefix starts query (after lead-in words), and the rest as argument"""
+        words = query.split()
+        stripped = True
+        while stripped:
+            stripped = False
+            for leadin in COMMAND_LEADINS:
+                count = leadin.count(" ") + 1
+                if " ".join(words[:count]) == leadin and len(words) > count:
+                    words = words[count:]
+                    stripped = True
+                    break
+        # Longest prefix wins
+        for count in range(min(compiled.prefix_words, len(words)), 0, -1):
+            index = compiled.prefixes.get(" ".join(words[:count]))
+            if index is not None:
+                argument = self._argument(compiled.commands[index], words[count:])
+                return (index, argument) if argument is not None else None
+        return None
+
+    def _argument(self, command: Dict[str, Any], words: List[str]) -> Optional[str]:
+        """The argument of a prefix command, or None if it is not one of the command's kind"""
+        kind = command.get("argument")
+        if kind is None:
+            return " ".join(words)
+        if kind == "app":
+            while words and words[0] in APP_ARGUMENT_FILLERS:
+                words = words[1:]
+            if len(words) > APP_ARGUMENT_WORDS or any(word in NON_APP_WORDS for word in words):
+                return None
+        argument = " ".join(words)
+        if not argument:
+            return None
+        check = self.argument_checks.get(kind)
+        if check is not None and not check(argument):
+            return None
+        return argument
+
+    def _result(self, compiled: _CompiledMap, index: int, tier: str, score: float, argument: str) -> Dict[str, Any]:
+        self.stats[tier] += 1
+        command = compiled.commands[index]
+        return {
+            "id": command["id"],
+            "response": command.get("response"),
+            "action": command.get("action"),
+            "tier": tier,
+            "score": score,
+            "argument": argument
+        }
@@ -0,0 +1,269 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import json
+import time
+import logging
+import asyncio
+from compressor.cache import MinHasher, normalize_prompt, prompt_key
+from mcp.writer import write_atomic
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 2
+
+# Context a model response depends on by default. Only the preferences, not
+# the whole profile: usage_stats changes with every command.
+DEFAULT_CONTEXT_PATHS = ("userProfile.preferences",)
+
+class ResponseCache:
+    """
+    TTL- and size-bounded cache of model responses, persisted to disk
+
+    Entries are keyed on the normalized prompt plus MCP.fingerprint() of the
+    context paths the response depends on, so a change to that context makes
+    older answers unreachable; they are dropped the next time the
+    fingerprint is taken. With similarity_threshold set, an exact miss falls
+    back to MinHash LSH over prompts cached under the same fingerprint.
+    Entries expire after ttl seconds (wall clock, so they survive restarts;
+    short by default, as many answers go stale) and the least recently used
+    go first once max_entries is reached. Saved entries record the context
+    paths they were keyed on, and load() drops those whose fingerprint no
+    longer matches the context.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = "data/supervisor/response_cache.json",
+        mcp: Optional[Any] = None,
+        context_paths: Iterable[str] = DEFAULT_CONTEXT_PATHS,
+        ttl: float = 15 * 60,
+        max_entries: int = 1000,
+        similarity_threshold: Optional[float] = None,
+        min_near_length: int = 24,
+        num_perm: int = 64,
+        bands: int = 16,
+        save_every: int = 50
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = Path(path) if path else None    # None keeps the cache in memory only
+        self.mcp = mcp
+        self.context_paths = tuple(context_paths)
+        self.ttl = ttl                              # Seconds a response stays valid
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold  # None disables near-duplicate lookup
+        self.min_near_length = min_near_length      # Shorter prompts only ever match exactly
+        self.save_every = save_every                # Persist after this many new entries
+        self._hasher = MinHasher(num_perm)
+        self._bands = bands
+        self._rows = num_perm // bands
+        # key -> {"prompt", "fingerprint", "text", "model", "seconds", "expires", "signature"}, least recently used first
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, bytes], set] = {}
+        self._by_fingerprint: Dict[str, set] = {}
+        self._current: Dict[Tuple[str, ...], str] = {}  # Context paths -> latest fingerprint seen
+        self._unsaved = 0
+        self.stats = {
+            "hits": 0,
+            "near_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "invalidated": 0,
+            "evictions": 0,
+            "seconds_saved": 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fingerprint(self, context_paths: Optional[Iterable[str]] = None) -> str:
+        """
+        Fingerprint of the context a response depends on
+        Entries cached under an older fingerprint of the same paths are
+        invalidated here, so take it before each lookup.
+        """
+        paths = tuple(context_paths) if context_paths is not None else self.context_paths
+        current = self.mcp.fingerprint(paths) if self.mcp is not None and paths else ""
+        previous = self._current.get(paths)
+        self._current[paths] = current
+        if previous is not None and previous != current and previous not in self._current.values():
+            for key in list(self._by_fingerprint.get(previous, ())):
+                self._remove(key)
+                self.stats["invalidated"] += 1
+        return current
+
+    def _band_keys(self, fingerprint: str, signature: Any) -> List[Tuple[str, int, bytes]]:
+        rows = self._rows
+        return [(fingerprint, band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self._bands)]
+
+    def _near_eligible(self, normalized: str) -> bool:
+        return self.similarity_threshold is not None and len(normalized) >= self.min_near_length
+
+    def lookup(self, prompt: str, fingerprint: str) -> Tuple[Optional[Dict[str, Any]], str, float]:
+        """(cached entry or None, "hit" | "near_hit" | "miss", similarity)"""
+        normalized = normalize_prompt(prompt)
+        key = prompt_key(f"{fingerprint}\n{normalized}")
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None and entry["expires"] <= now:
+            self._remove(key)
+            self.stats["expired"] += 1
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self._record_hit("hits", entry)
+            return entry, "hit", 1.0
+
+        if self._near_eligible(normalized):
+            signature = self._hasher.signature(normalized)
+            candidates = set()
+            for band_key in self._band_keys(fingerprint, signature):
+                candidates |= self._buckets.get(band_key, set())
+            best_key, best = None, 0.0
+            for candidate in candidates:
+                if self._entries[candidate]["expires"] <= now:
+                    continue
+                score = MinHasher.similarity(signature, self._entries[candidate]["signature"])
+                if score > best:
+                    best_key, best = candidate, score
+            if best_key is not None and best >= self.similarity_threshold:
+                entry = self._entries[best_key]
+                self._entries.move_to_end(best_key)
+                self._record_hit("near_hits", entry)
+                return entry, "near_hit", best
+
+        self.stats["misses"] += 1
+        return None, "miss", 0.0
+
+    def _record_hit(self, kind: str, entry: Dict[str, Any]) -> None:
+        self.stats[kind] += 1
+        self.stats["seconds_saved"] += entry["seconds"]
+
+    def put(
+        self,
+        prompt: str,
+        fingerprint: str,
+        text: str,
+        model: Optional[str] = None,
+        seconds: float = 0.0,
+        expires: Optional[float] = None
+    ) -> None:
+        """Cache a response; fingerprint is the one taken before the model was called"""
+        normalized = normalize_prompt(prompt)
+        key = prompt_key(f"{fingerprint}\n{normalized}")
+        if key in self._entries:
+            self._remove(key)
+        signature = self._hasher.signature(normalized) if self._near_eligible(normalized) else None
+        self._entries[key] = {
+            "prompt": normalized,
+            "fingerprint": fingerprint,
+            "text": text,
+            "model": model,
+            "seconds": seconds,
+            "expires": expires if expires is not None else time.time() + self.ttl,
+            "signature": signature
+        }
+        self._by_fingerprint.setdefault(fingerprint, set()).add(key)
+        if signature is not None:
+            for band_key in self._band_keys(fingerprint, signature):
+                self._buckets.setdefault(band_key, set()).add(key)
+        self._unsaved += 1
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        keys = self._by_fingerprint.get(entry["fingerprint"])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_fingerprint[entry["fingerprint"]]
+        if entry["signature"] is not None:
+            for band_key in self._band_keys(entry["fingerprint"], entry["signature"]):
+                bucket = self._buckets.get(band_key)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._buckets[band_key]
+
+    def purge_expired(self) -> int:
+        """Drop expired entries; returns how many were removed"""
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if entry["expires"] <= now]
+        for key in expired:
+            self._remove(key)
+        self.stats["expired"] += len(expired)
+        return len(expired)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cache statistics for MCP's performance metrics"""
+        lookups = self.stats["hits"] + self.stats["near_hits"] + self.stats["misses"]
+        return dict(
+            self.stats,
+            entries=len(self._entries),
+            hit_rate=(self.stats["hits"] + self.stats["near_hits"]) / lookups if lookups else 0.0
+        )
+
+    def _encode(self) -> bytes:
+        paths = {fingerprint: list(key) for key, fingerprint in self._current.items()}
+        entries = [
+            [e["prompt"], e["fingerprint"], paths.get(e["fingerprint"]), e["text"], e["model"], e["seconds"], e["expires"]]
+            for e in self._entries.values()
+        ]
+        cache = {"version": CACHE_VERSION, "entries": entries}
+        return json.dumps(cache, separators=(",", ":")).encode("utf-8")
+
+    async def save(self) -> None:
+        """Persist unexpired entries in LRU order (runs off the event loop)"""
+        if self.path is None:
+            return
+        self.purge_expired()
+        data = self._encode()
+        self._unsaved = 0
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(write_atomic, self.path, data)
+        except OSError as e:
+            logger.error(f"Error saving response cache: {e}")
+
+    async def maybe_save(self) -> None:
+        if self._unsaved >= self.save_every:
+            await self.save()
+
+    async def load(self) -> None:
+        """Load a previously saved cache, skipping expired entries and those of outdated context"""
+        if self.path is None:
+            return
+        try:
+            raw = await asyncio.to_thread(self.path.read_bytes)
+            cache = json.loads(raw)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading response cache: {e}")
+            return
+        if cache.get("version") != CACHE_VERSION:
+            return
+        now = time.time()
+        current: Dict[Tuple[str, ...], str] = {}
+        for prompt, fingerprint, paths, text, model, seconds, expires in cache["entries"]:
+            if expires <= now:
+                continue
+            if self.mcp is not None:
+                # Nothing would ever look these up again: the context changed since they were saved
+                if paths is None:
+                    continue
+                paths = tuple(paths)
+                if paths not in current:
+                    current[paths] = self.fingerprint(paths)
+                if current[paths] != fingerprint:
+                    self.stats["invalidated"] += 1
+                    continue
+            self.put(prompt, fingerprint, text, model, seconds, expires)
+        self._unsaved = 0
+
+    async def close(self) -> None:
+        if self._unsaved:
+            await self.save()
@@ -0,0 +1,335 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+import re
+import time
+import logging
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+# Candidate models per input class, cheapest/fastest suitable tier first.
+# p95_budget: a model whose rolling p95 (seconds) exceeds this is demoted.
+# hedge: latency-critical classes send a second request once hedge_after
+# seconds (or the primary's p95, if lower) pass without an answer.
+DEFAULT_ROUTES = {
+    "quick": {"models": ["llama4_scout", "llama3", "gemini", "fallback"], "p95_budget": 1.5, "hedge": True, "hedge_after": 0.8},
+    "chat": {"models": ["llama3", "gemini", "llama4_scout", "fallback"], "p95_budget": 4.0, "hedge": True, "hedge_after": 2.0},
+    "reasoning": {"models": ["gemini", "llama3", "fallback"], "p95_budget": 20.0, "hedge": False, "hedge_after": None}
+}
+
+REASONING_HINTS = {"explain", "analyze", "analyse", "compare", "plan", "why", "debug", "code", "summarize", "summarise", "write"}
+
+# Words that make an answer depend on when it is asked; such prompts are never served from the response cache
+TIME_SENSITIVE_HINTS = {
+    "today", "tonight", "tomorrow", "yesterday", "now", "currently", "current", "latest", "recent",
+    "news", "weather", "forecast", "schedule", "calendar", "agenda", "upcoming", "week", "month",
+    "price", "prices", "stock", "stocks"
+}
+_WORD = re.compile(r"[a-z]+")
+
+class RoutingError(Exception):
+    """Every candidate model failed"""
+
+def classify_input(text: str) -> str:
+    """Input class for routing: "quick", "chat" or "reasoning" """
+    words = text.lower().split()
+    if len(words) > 60 or REASONING_HINTS.intersection(words):
+        return "reasoning"
+    if len(words) <= 12:
+        return "quick"
+    return "chat"
+
+def is_time_sensitive(text: str) -> bool:
+    """Whether the answer to text depends on when it is asked ("what's on my schedule today")"""
+    return bool(TIME_SENSITIVE_HINTS.intersection(_WORD.findall(text.lower())))
+
+class RollingStats:
+    """Latency and error statistics over a model's most recent requests"""
+
+    __slots__ = ("_latencies", "_outcomes", "_unpublished", "requests", "errors", "cancelled", "consecutive_errors")
+
+    def __init__(self, window: int = 100):
+        self._latencies: deque = deque(maxlen=window)  # Seconds, successful requests only
+        self._outcomes: deque = deque(maxlen=window)   # True for success
+        self._unpublished: deque = deque(maxlen=window * 10)  # Latencies not yet sent to MCP's aggregates
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0                             # Hedge losers, neither success nor error
+        self.consecutive_errors = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.requests += 1
+        self._outcomes.append(ok)
+        if ok:
+            self._latencies.append(latency)
+            self._unpublished.append(latency)
+            self.consecutive_errors = 0
+        else:
+            self.errors += 1
+            self.consecutive_errors += 1
+
+    def drain_latencies(self) -> List[float]:
+        """Latencies recorded since the last call"""
+        latencies = list(self._unpublished)
+        self._unpublished.clear()
+        return latencies
+
+    @property
+    def samples(self) -> int:
+        return len(self._outcomes)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        return self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "error_rate": self.error_rate,
+            "samples": self.samples,
+            "requests": self.requests,
+            "errors": self.errors,
+            "cancelled": self.cancelled
+        }
+
+class ModelRouter:
+    """
+    Routes prompts to model clients by input class and live model health
+
+    Per-model latency and error rates are kept over a rolling window and
+    published to MCP's performance_metrics. For each request the route's
+    candidates are ranked: healthy models (few samples yet, or p95 within the
+    class budget and error rate below max_error_rate) keep their configured
+    order, the user's default_model preference first; unhealthy ones follow,
+    fastest first. Latency-critical classes hedge: a second request goes to
+    the next candidate after a deadline and the loser is cancelled. Failed
+    requests fail over down the list. Inputs the local command matcher
+    answers never reach a model, and neither do prompts the optional
+    ResponseCache already holds an answer for in the current context;
+    time-sensitive prompts are neither looked up in nor added to the cache.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, Any],
+        mcp: Optional[Any] = None,
+        routes: Optional[Dict[str, Dict[str, Any]]] = None,
+        matcher: Optional[Any] = None,
+        cache: Optional[Any] = None,
+        window: int = 100,
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+        cooldown: float = 30.0,
+        publish_interval: float = 5.0
+    ):
+        self.models = models
+        self.mcp = mcp
+        self.routes = routes or DEFAULT_ROUTES
+        self.matcher = matcher
+        self.cache = cache
+        self.min_samples = min_samples          # Requests before a model's stats are trusted
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown                # Seconds a model is skipped after 3 errors in a row
+        self.publish_interval = publish_interval
+        self.model_stats = {name: RollingStats(window) for name in models}
+        self.stats = {"routed": 0, "local": 0, "cached": 0, "uncacheable": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "failures": 0}
+        self._down_until: Dict[str, float] = {}
+        self._last_publish = 0.0
+
+    def _healthy(self, name: str, budget: float) -> bool:
+        if self._down_until.get(name, 0.0) > time.monotonic():
+            return False
+        stats = self.model_stats[name]
+        if stats.samples < self.min_samples:
+            return True
+        p95 = stats.percentile(0.95)
+        return stats.error_rate <= self.max_error_rate and (p95 is None or p95 <= budget)
+
+    def rank(self, input_class: str) -> List[str]:
+        """Candidate models for an input class, best first"""
+        route = self.routes[input_class]
+        names = [name for name in route["models"] if name in self.models]
+        if self.mcp is not None and input_class != "quick":
+            preferred = self.mcp.context["userProfile"]["preferences"].get("model_preferences", {}).get("default_model")
+            if preferred in names:
+                names.remove(preferred)
+                names.insert(0, preferred)
+        healthy = [name for name in names if self._healthy(name, route["p95_budget"])]
+        demoted = sorted(
+            (name for name in names if name not in healthy),
+            key=lambda name: (self.model_stats[name].error_rate, self.model_stats[name].percentile(0.95) or 0.0)
+        )
+        return healthy + demoted
+
+    def _hedge_deadline(self, route: Dict[str, Any], primary: str) -> Optional[float]:
+        if not route.get("hedge"):
+            return None
+        stats = self.model_stats[primary]
+        p95 = stats.percentile(0.95) if stats.samples >= self.min_samples else None
+        return min(p95, route["hedge_after"]) if p95 is not None else route["hedge_after"]
+
+    async def route(
+        self,
+        prompt: str,
+        input_class: Optional[str] = None,
+        max_tokens: int = 512,
+        use_cache: bool = True,
+        context_paths: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Answer prompt locally, from the response cache or with the best available model
+        Returns a dict with the model, text, input class, latency, whether the
+        request was hedged and the cache outcome; raises RoutingError when
+        every model fails. context_paths overrides the context the cached
+        response is keyed on.
+        """
+        started = time.perf_counter()
+        if self.matcher is not None:
+            match = self.matcher.classify(prompt)
+            if match is not None:
+                self.stats["local"] += 1
+                return {
+                    "model": "local",
+                    "text": match["response"],
+                    "command": match,
+                    "class": "local",
+                    "latency": time.perf_counter() - started,
+                    "hedged": False,
+                    "cached": None
+                }
+
+        input_class = input_class or classify_input(prompt)
+        fingerprint = None
+        if self.cache is not None and use_cache and is_time_sensitive(prompt):
+            self.stats["uncacheable"] += 1
+        elif self.cache is not None and use_cache:
+            fingerprint = self.cache.fingerprint(context_paths)
+            entry, event, _ = self.cache.lookup(prompt, fingerprint)
+            if entry is not None:
+                self.stats["cached"] += 1
+                await self.maybe_publish()
+                return {
+                    "model": entry["model"],
+                    "text": entry["text"],
+                    "class": input_class,
+                    "latency": time.perf_counter() - started,
+                    "hedged": False,
+                    "cached": event
+                }
+        route = self.routes[input_class]
+        candidates = self.rank(input_class)
+        if not candidates:
+            raise RoutingError(f"No models configured for input class {input_class}")
+        self.stats["routed"] += 1
+        try:
+            name, text, hedged = await self._race(prompt, candidates, self._hedge_deadline(route, candidates[0]), max_tokens)
+        except RoutingError:
+            self.stats["failures"] += 1
+            raise
+        finally:
+            await self.maybe_publish()
+        latency = time.perf_counter() - started
+        if fingerprint is not None:
+            self.cache.put(prompt, fingerprint, text, name, latency)
+            await self.cache.maybe_save()
+        return {
+            "model": name,
+            "text": text,
+            "class": input_class,
+            "latency": latency,
+            "hedged": hedged,
+            "cached": "miss" if fingerprint is not None else None
+        }
+
+    async def _race(self, prompt: str, candidates: List[str], deadline: Optional[float], max_tokens: int) -> Tuple[str, str, bool]:
+        """Run candidates until one succeeds: failover on error, one hedge after deadline"""
+        remaining = iter(candidates)
+        pending: Dict[asyncio.Task, str] = {}
+        errors = []
+        hedged = False
+
+        def launch() -> bool:
+            name = next(remaining, None)
+            if name is None:
+                return False
+            pending[asyncio.create_task(self._call(name, prompt, max_tokens))] = name
+            return True
+
+        launch()
+        try:
+            while pending:
+                timeout = deadline if deadline is not None and not hedged else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    if launch():
+                        self.stats["hedged"] += 1
+                    continue
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        if hedged and name != candidates[0]:
+                            self.stats["hedge_wins"] += 1
+                        return name, task.result(), hedged
+                    errors.append(f"{name}: {task.exception()}")
+                if not pending:
+                    if launch():
+                        self.stats["failovers"] += 1
+            raise RoutingError("; ".join(errors) or "No model answered")
+        finally:
+            # Losers, and every call still running if the caller was cancelled,
+            # give back their provider slots now
+            losers = list(pending)
+            for loser in losers:
+                loser.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)
+
+    async def _call(self, name: str, prompt: str, max_tokens: int) -> str:
+        stats = self.model_stats[name]
+        started = time.perf_counter()
+        try:
+            text = await self.models[name].generate(prompt, max_tokens)
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            raise
+        except Exception as e:
+            stats.record(time.perf_counter() - started, False)
+            if stats.consecutive_errors >= 3:
+                self._down_until[name] = time.monotonic() + self.cooldown
+            logger.warning(f"Model {name} failed: {e}")
+            raise
+        stats.record(time.perf_counter() - started, True)
+        return text
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        metrics = {name: stats.snapshot() for name, stats in self.model_stats.items()}
+        if self.cache is not None:
+            metrics["response_cache"] = self.cache.snapshot()
+        return metrics
+
+    async def maybe_publish(self) -> None:
+        """Publish metrics to MCP, at most once per publish_interval"""
+        if time.monotonic() - self._last_publish >= self.publish_interval:
+            await self.publish()
+
+    async def publish(self) -> None:
+        self._last_publish = time.monotonic()
+        if self.mcp is not None:
+            metrics = self.metrics()
+            for name, stats in self.model_stats.items():
+                metrics[name]["latencies"] = stats.drain_latencies()
+            await self.mcp.update_performance_metrics(metrics)
+
+    async def close(self) -> None:
+        await self.publish()
+        if self.cache is not None:
+            await self.cache.close()
+        for client in self.models.values():
+            await client.close()
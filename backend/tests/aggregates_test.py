@@ -0,0 +1,148 @@
+import sys
+import json
+import time
+import random
+import pytest
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP, WEEK_SECONDS
+from mcp.aggregates import QuantileSketch, StreamingAggregates
+
+DAY = 24 * 60 * 60
+
+def test_sketch_quantiles_and_merge():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 1) for _ in range(20000)]
+    whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (left if i % 2 else right).add(value)
+    left.merge(right)
+    assert left.bins == whole.bins
+    ordered = sorted(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert whole.quantile(q) == pytest.approx(exact, rel=0.03)
+    assert len(whole.bins) <= whole.max_bins
+
+def test_memory_stays_constant():
+    aggregates = StreamingAggregates()
+    start = 1_700_000_000
+    rng = random.Random(1)
+    sizes = []
+    for day in range(60):
+        for i in range(500):
+            epoch = start + day * DAY + i * 150
+            aggregates.count("commands", epoch, [f"agent:agent-{i % 5}"])
+            aggregates.observe("compression_ratio", rng.uniform(0.2, 0.9), epoch)
+        sizes.append(len(json.dumps(aggregates.to_dict())))
+    # Once the retention windows are full, the state stops growing
+    assert sizes[-1] <= sizes[40] * 1.05
+    assert len(aggregates._buckets["day"]) == 35
+    assert len(aggregates._buckets["hour"]) == 48
+
+def test_windows_series_and_rates():
+    aggregates = StreamingAggregates(max_series=3)
+    now = 1_700_000_000
+    for i in range(100):
+        aggregates.count("errors", now - i * 60, [f"agent:a{i % 5}"])
+    # Older than the hourly window: only the daily tier reaches back this far
+    aggregates.count("errors", now - 5 * DAY, ["agent:a0"])
+
+    # Whole buckets: the last hour reaches back to the start of the hour it began in
+    floor = (now - 3600) // 3600 * 3600
+    assert aggregates.summary("errors", since=now - 3600, now=now).count == sum(now - i * 60 >= floor for i in range(100))
+    assert aggregates.summary("errors", since=now - WEEK_SECONDS, now=now).count == 101
+    per_agent = aggregates.summaries("errors", now=now, prefix="agent")
+    assert "other" in per_agent and len(per_agent) <= 4
+    assert sum(s.count for s in per_agent.values()) == 101
+    # 100 events a minute apart: the 5 minute EWMA sits near one event per minute
+    assert aggregates.rate("errors", now=now) == pytest.approx(1 / 60, rel=0.1)
+    assert aggregates.rate("errors", now=now + 600) == pytest.approx(aggregates.rate("errors", now=now) / 4)
+
+def test_events_older_than_retention_are_counted_as_dropped():
+    aggregates = StreamingAggregates()
+    now = 1_700_000_000
+    for i in range(48):
+        aggregates.count("commands", now - i * 3600)
+    # Past the 48 hourly buckets, still inside the daily ones
+    aggregates.count("commands", now - 60 * 3600, n=3)
+    assert aggregates.dropped == {"hour": 3, "day": 0}
+    assert len(aggregates._buckets["hour"]) == 48
+    assert aggregates.summary("commands", tier="hour").count == 48
+    assert aggregates.summary("commands", tier="day").count == 51
+    restored = StreamingAggregates().merge_state(aggregates.to_dict())
+    assert restored.dropped == aggregates.dropped
+
+def test_merged_states_equal_one_stream():
+    events = [(1_700_000_000 + i * 97, i % 7 / 10) for i in range(3000)]
+    whole, first, second = StreamingAggregates(), StreamingAggregates(), StreamingAggregates()
+    for i, (epoch, value) in enumerate(events):
+        for target in (whole, first if i < 1500 else second):
+            target.observe("compression_ratio", value, epoch)
+    merged = StreamingAggregates().merge_state(first.to_dict()).merge_state(second.to_dict())
+    for tier, buckets in whole.to_dict()["tiers"].items():
+        for start, metrics in buckets.items():
+            count, total, low, high, sketch = metrics["compression_ratio"][""]
+            other = merged.to_dict()["tiers"][tier][start]["compression_ratio"][""]
+            assert other[0] == count and other[1] == pytest.approx(total) and other[2:4] == [low, high]
+            assert sorted(zip(other[4][1::2], other[4][2::2])) == sorted(zip(sketch[1::2], sketch[2::2]))
+    assert merged.rate("compression_ratio", now=events[-1][0]) == pytest.approx(whole.rate("compression_ratio", now=events[-1][0]))
+
+@pytest.mark.asyncio
+async def test_mcp_getters_and_snapshot_round_trip(tmp_path):
+    mcp = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await mcp.initialize()
+    for i in range(20):
+        await mcp.add_command(f"play song {i}", "ok", agent_id="media")
+    await mcp.add_command("open mail", "ok", agent_id="mail")
+    await mcp.add_task("sync inbox", "failed", agent_id="mail")
+    for _ in range(2):
+        await mcp.log_error(TimeoutError("imap"), {"agent_id": "mail"})
+    await mcp.log_error(ValueError("bad track"), {"agent_id": "media"})
+    for compressed in (500, 600, 900):
+        await mcp.update_compression_log({"event": "miss", "original_chars": 1000, "compressed_chars": compressed})
+    await mcp.update_performance_metrics({"gemini": {"requests": 10, "errors": 2, "latencies": [0.2, 0.4]}})
+    await mcp.update_performance_metrics({"gemini": {"requests": 15, "errors": 2, "latencies": [0.3]}})
+
+    week = time.time() - WEEK_SECONDS
+    ratio = await mcp.get_aggregate("compression_ratio", since=week)
+    assert ratio["count"] == 3 and ratio["p50"] == pytest.approx(0.6, rel=0.03)
+    assert ratio["max"] == 0.9
+    errors = await mcp.get_error_rate()
+    assert errors["agent"] == {"mail": 1.0, "media": pytest.approx(1 / 20)}
+    assert errors["total"] == pytest.approx(3 / 22)
+    models = await mcp.get_error_rate(by="model")
+    assert models["model"]["gemini"] == pytest.approx(2 / 15)
+    assert (await mcp.get_aggregates_by("model_latency", "model"))["gemini"]["count"] == 3
+    assert "latencies" not in (await mcp.get_performance_metrics())["gemini"]
+    assert await mcp.get_event_rate("commands", "agent:media") > 0
+    await mcp.compact()
+    await mcp.add_command("after snapshot", "ok", agent_id="media")
+    await mcp.close()
+
+    # Snapshot plus the journal after it restore the same aggregates
+    restored = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await restored.initialize()
+    assert (await restored.get_aggregate("compression_ratio", since=week)) == ratio
+    assert (await restored.get_aggregates_by("commands", "agent"))["media"]["count"] == 21
+    assert (await restored.get_error_rate(by="model"))["model"]["gemini"] == pytest.approx(2 / 15)
+    assert restored.aggregates.totals == {f"{mcp.reporter_id}/gemini.requests": 15, f"{mcp.reporter_id}/gemini.errors": 2}
+    await restored.close()
+
+@pytest.mark.asyncio
+async def test_running_totals_from_interleaved_workers(tmp_path):
+    mcp = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await mcp.initialize()
+    # Two workers' routers report their own running totals, interleaved
+    reports = [("a", 100, 5), ("b", 1, 0), ("a", 101, 6), ("b", 3, 1), ("a", 102, 7)]
+    for reporter, requests, errors in reports:
+        await mcp.update_performance_metrics({"gemini": {"requests": requests, "errors": errors}}, reporter=reporter)
+    # Worker b restarted: its totals start over
+    await mcp.update_performance_metrics({"gemini": {"requests": 2, "errors": 0}}, reporter="b")
+    requests = await mcp.get_aggregate("model_requests", "model:gemini")
+    errors = await mcp.get_aggregate("model_errors", "model:gemini")
+    assert (requests["count"], errors["count"]) == (102 + 3 + 2, 7 + 1)
+    await mcp.close()
@@ -0,0 +1,94 @@
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from agents.automation.app_index import AppIndex
+
+def _write_app(directory, stem, name, exec_cmd):
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{stem}.desktop"
+    path.write_text(f"[Desktop Entry]\nName={name}\nExec={exec_cmd} %U\n")
+    return path
+
+def _index(tmp_path):
+    return AppIndex(
+        desktop_paths=[str(tmp_path / "system" / "*.desktop"), str(tmp_path / "user" / "*.desktop")],
+        cache_path=str(tmp_path / "cache" / "app_index.json"),
+        check_interval=0
+    )
+
+def test_match_uses_cached_index(tmp_path):
+    _write_app(tmp_path / "system", "firefox", "Firefox", "/usr/bin/firefox")
+    _write_app(tmp_path / "system", "telegram", "Telegram Desktop", "telegram-desktop")
+    index = _index(tmp_path)
+    assert index.match("firefx")[::2] == ("firefox", "/usr/bin/firefox")
+    assert index.match("zzzz") is None
+
+    # A second process starts from the disk cache without parsing anything
+    restored = _index(tmp_path)
+    assert restored.stats["files_parsed"] == 0
+    assert restored.apps == index.apps
+
+def test_refresh_only_parses_changed_files(tmp_path):
+    for i in range(20):
+        _write_app(tmp_path / "system", f"app{i}", f"App {i}", f"app{i}")
+    index = _index(tmp_path)
+    assert index.stats["files_parsed"] == 20
+
+    _write_app(tmp_path / "user", "editor", "Code Editor", "code")
+    os.remove(tmp_path / "system" / "app3.desktop")
+    assert index.refresh()
+    assert index.stats["files_parsed"] == 21
+    assert "app 3" not in index.apps
+    assert index.match("code editor")[2] == "code"
+    assert not index.refresh()
+
+def test_user_entries_override_system_entries(tmp_path):
+    _write_app(tmp_path / "system", "term", "Terminal", "xterm")
+    _write_app(tmp_path / "user", "term", "Terminal", "kitty")
+    assert _index(tmp_path).apps["terminal"] == "kitty"
+
+FIREFOX = """[Desktop Entry]
+Name=Firefox
+Name[de]=Feuerfuchs
+GenericName=Web Browser
+Keywords=Internet;WWW;Browser;
+Exec=firefox %u
+Actions=private;
+
+[Desktop Action private]
+Name=New Private Window
+Exec=firefox --private-window %u
+"""
+
+def test_resolve_many_scores_all_fields(tmp_path):
+    (tmp_path / "system").mkdir()
+    (tmp_path / "system" / "firefox.desktop").write_text(FIREFOX)
+    _write_app(tmp_path / "system", "files", "Files", "nautilus")
+    _write_app(tmp_path / "system", "terminal", "Terminal", "gnome-terminal")
+    index = _index(tmp_path)
+
+    results = index.resolve_many(["web browser", "feuerfuchs", "private window", "terminl", "nothing like it"])
+    assert results[0][0]["name"] == "firefox"
+    assert results[1][0]["exec"] == "firefox"
+    assert results[2][0]["action"] == "new private window"
+    assert results[3][0]["exec"] == "gnome-terminal"
+    assert results[4] == []
+    assert all(a["score"] >= b["score"] for ranked in results for a, b in zip(ranked, ranked[1:]))
+    # The action's Name= line must not replace the main entry's name
+    assert index.apps["firefox"] == "firefox"
+
+    index.resolve_many(["Web Browser!"])
+    assert index._query_cache.hits == 1
+
+def test_short_substrings_do_not_resolve(tmp_path):
+    _write_app(tmp_path / "system", "xterm", "XTerm", "xterm")
+    _write_app(tmp_path / "system", "code", "Visual Studio Code", "code")
+    (tmp_path / "system" / "firefox.desktop").write_text(FIREFOX)
+    index = _index(tmp_path)
+    # Whole-string ratio: a fragment of a name or keyword is not a match
+    assert index.resolve_many(["x", "fox", "code"]) == [[], [], []]
+    assert index.match("xterm")[0] == "xterm"
+    assert index.resolve_many(["xterm"], limit=0) == [[]]
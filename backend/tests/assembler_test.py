@@ -0,0 +1,80 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from mcp.assembler import ContextAssembler, estimate_tokens
+
+async def _mcp(tmp_path):
+    mcp = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await mcp.initialize()
+    for i in range(150):
+        await mcp.add_command(f"open app number {i}", {"status": "ok"})
+    await mcp.add_command("play jazz playlist on spotify", {"status": "ok"}, agent_id="media")
+    for i in range(30):
+        await mcp.add_command(f"check calendar {i}", "done")
+    await mcp.add_task("book dentist appointment", "pending")
+    await mcp.update_agent_state("media", {"player": "spotify", "volume": 40})
+    return mcp
+
+@pytest.mark.asyncio
+async def test_budgeted_prompt_prefers_relevant_items(tmp_path):
+    mcp = await _mcp(tmp_path)
+    assembler = ContextAssembler(mcp, max_candidates=40)
+    result = assembler.assemble("what was the jazz playlist on spotify?", budget=120)
+    prompt, breakdown = result["prompt"], result["breakdown"]
+
+    assert estimate_tokens(prompt) <= 120
+    assert result["tokens"] <= 120
+    assert "play jazz playlist on spotify" in prompt
+    assert "player" in prompt  # The media agent's state shares terms with the query
+    assert prompt.rstrip().endswith("User: what was the jazz playlist on spotify?")
+    commands = breakdown["sections"]["recentCommands"]
+    assert commands["considered"] == assembler.max_candidates
+    assert 0 < commands["items"] < commands["considered"]
+    assert result["tokens"] == breakdown["query"] + breakdown["overhead"] + sum(
+        s["tokens"] for s in breakdown["sections"].values()
+    )
+
+    # A larger budget only adds items
+    larger = assembler.assemble("what was the jazz playlist on spotify?", budget=1000)
+    assert larger["breakdown"]["sections"]["recentCommands"]["items"] > commands["items"]
+    await mcp.close()
+
+@pytest.mark.asyncio
+async def test_only_changed_items_are_rendered(tmp_path):
+    mcp = await _mcp(tmp_path)
+    assembler = ContextAssembler(mcp, max_candidates=40)
+    assembler.assemble("calendar", budget=300)
+    rendered = assembler.stats["rendered"]
+    assert rendered == 1 + 1 + 1 + assembler.max_candidates  # profile, agent, task, newest commands
+
+    # Unchanged sections are not rescanned at all
+    rescans = assembler.stats["rescans"]
+    assembler.assemble("spotify", budget=300)
+    assert (assembler.stats["rendered"], assembler.stats["rescans"]) == (rendered, rescans)
+
+    # One new command re-renders that command and the profile line only if preferences changed
+    await mcp.add_command("check calendar tomorrow", "done")
+    assembler.assemble("calendar tomorrow", budget=300)
+    assert assembler.stats["rendered"] == rendered + 1
+    await mcp.update_user_profile("theme", "light")
+    result = assembler.assemble("calendar tomorrow", budget=300)
+    assert assembler.stats["rendered"] == rendered + 2
+    assert "theme: light" in result["prompt"]
+    await mcp.close()
+
+@pytest.mark.asyncio
+async def test_custom_token_counter_and_tiny_budget(tmp_path):
+    mcp = await _mcp(tmp_path)
+    words = lambda text: len(text.split())
+    assembler = ContextAssembler(mcp, count_tokens=words, sections=["recentCommands"], max_candidates=40)
+    result = assembler.assemble("calendar", budget=5)
+    assert result["breakdown"]["sections"] == {"recentCommands": {"tokens": 0, "items": 0, "considered": 40}}
+    assert "## Recent commands" not in result["prompt"]
+    result = assembler.assemble("calendar", budget=40)
+    assert words(result["prompt"]) <= 40
+    assert "check calendar 29" in result["prompt"]
+    await mcp.close()
@@ -0,0 +1,29 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.suite import compare, run
+
+def _results(**medians):
+    return {"version": 1, "results": {case: {"median": median} for case, median in medians.items()}}
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = _results(save=0.010, load=0.010, tiny=0.00001, gone=0.001)
+    current = _results(save=0.014, load=0.006, tiny=0.00003, added=0.001)
+    rows = {row[0]: row for row in compare(current, baseline, threshold=0.25)}
+    assert rows["save"][4] == "regression" and rows["save"][3] == pytest.approx(1.4)
+    assert rows["load"][4] == "improved"
+    # Tripled, but by 20us: below the noise floor
+    assert rows["tiny"][4] == "ok"
+    assert (rows["added"][4], rows["gone"][4]) == ("new", "missing")
+
+@pytest.mark.asyncio
+async def test_suite_produces_json_results():
+    results = await run(["small"], ["prune", "serializer", "add_command"], repeat=1)
+    assert results["meta"]["python"]
+    assert {"pruner.prune[small]", "serializer.roundtrip.json[small]", "mcp.add_command.c16[small]"} <= set(results["results"])
+    stats = results["results"]["pruner.prune[small]"]
+    assert stats["samples"] == 1 and stats["median"] > 0
+    assert compare(results, results)[0][4] == "ok"
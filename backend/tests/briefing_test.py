@@ -0,0 +1,72 @@
+import pytest
+import sys
+import numpy as np
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from embeddings.briefing_gen import BriefingGenerator
+from embeddings.store import VectorStore
+from embeddings.vector_search import VectorIndex
+
+class _Summarizer:
+    def __init__(self):
+        self.seen = []
+
+    async def __call__(self, texts):
+        self.seen.extend(texts)
+        return [text.splitlines()[0] for text in texts]
+
+def _embed(texts):
+    return np.array([[len(t), t.count("o"), 1.0, 0.0] for t in texts], dtype=np.float32)
+
+async def _mcp(tmp_path):
+    mcp = MCP(storage_path=str(tmp_path / "mcp"), journal_mode=True)
+    await mcp.initialize()
+    return mcp
+
+@pytest.mark.asyncio
+async def test_runs_only_consume_new_events(tmp_path):
+    mcp = await _mcp(tmp_path)
+    index = VectorIndex(VectorStore(str(tmp_path / "vectors"), dim=4))
+    index.open()
+    summarize = _Summarizer()
+    gen = BriefingGenerator(
+        mcp, path=str(tmp_path / "briefing.json"), summarize=summarize.__call__,
+        embed=_embed, index=index, events_per_chunk=4, batch_size=2
+    )
+    for i in range(6):
+        await mcp.add_command(f"open app {i}", "ok")
+    await mcp.add_task("set up workspace", "completed", agent_id="automation")
+
+    first = await gen.run_once()
+    assert (first["events"], first["chunks"], first["embedded"]) == (7, 2, 2)
+    assert first["tokens"] > 0
+    assert len(index.store) == 2
+    assert (await mcp.get_agent_state("briefing"))["state"]["last_run"]["events"] == 7
+
+    # Nothing new: nothing is summarized or embedded again
+    assert (await gen.run_once())["events"] == 0
+    await mcp.add_command("open browser", None)
+    second = await gen.run_once()
+    assert (second["events"], second["chunks"]) == (1, 1)
+    assert summarize.seen[-1] == "command: open browser"
+    assert gen.briefing(1) == ["command: open browser"]
+    assert gen.totals["events"] == 8
+
+    # The checkpoint survives a restart
+    restored = BriefingGenerator(mcp, path=str(tmp_path / "briefing.json"))
+    await restored.load()
+    assert (await restored.run_once())["events"] == 0
+    await mcp.close()
+
+@pytest.mark.asyncio
+async def test_runs_are_capped(tmp_path):
+    mcp = await _mcp(tmp_path)
+    gen = BriefingGenerator(mcp, path=str(tmp_path / "briefing.json"), max_events_per_run=10)
+    for i in range(25):
+        await mcp.add_command("check mail", None)
+    assert [(await gen.run_once())["events"] for _ in range(4)] == [10, 10, 5, 0]
+    assert gen.briefing() == ["command: check mail (x5)", "command: check mail (x10) [2]"]
+    await mcp.close()
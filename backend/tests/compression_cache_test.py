@@ -0,0 +1,83 @@
+import pytest
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from compressor.cache import CompressionCache
+
+PROMPT = "Summarize the unread emails from my manager and draft a short reply to each"
+
+class _Compressor:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return f"short:{prompt[:10]}"
+
+@pytest.mark.asyncio
+async def test_exact_and_near_duplicate_hits(tmp_path):
+    cache = CompressionCache(path=str(tmp_path / "cache.json"), near_duplicates=True)
+    compress = _Compressor()
+    first = await cache.get_or_compress(PROMPT, compress.__call__)
+    # Case, whitespace and trailing punctuation do not matter
+    assert await cache.get_or_compress(f"  {PROMPT.upper()}!", compress.__call__) == first
+    # Neither does punctuation inside the prompt
+    assert await cache.get_or_compress(PROMPT.replace(" and", ", and"), compress.__call__) == first
+    assert compress.calls == 1
+    # Similar prompts with different words are compressed on their own
+    await cache.get_or_compress(PROMPT.replace("short", "brief"), compress.__call__)
+    assert await cache.get_or_compress("Open the calendar and show next week", compress.__call__) != first
+    assert compress.calls == 3
+    assert (cache.stats["hits"], cache.stats["near_hits"], cache.stats["misses"]) == (1, 1, 3)
+
+@pytest.mark.asyncio
+async def test_negated_prompt_is_not_a_near_duplicate(tmp_path):
+    sent = "Summarize the quarterly report in three bullet points and send it to alice@example.com"
+    for near_duplicates in (False, True):
+        cache = CompressionCache(path=str(tmp_path / "cache.json"), near_duplicates=near_duplicates)
+        cache.put(sent, "summarize report, send alice")
+        assert cache.lookup(sent.replace("and send", "and do not send")) == (None, "miss", 0.0)
+    # The tier is opt-in
+    assert not CompressionCache(path=str(tmp_path / "cache.json")).near_duplicates
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_call(tmp_path):
+    cache = CompressionCache(path=str(tmp_path / "cache.json"))
+    compress = _Compressor()
+    results = await asyncio.gather(*(cache.get_or_compress(PROMPT, compress.__call__) for _ in range(5)))
+    assert len(set(results)) == 1
+    assert compress.calls == 1
+
+@pytest.mark.asyncio
+async def test_lru_bounds_and_persistence(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = CompressionCache(path=path, max_entries=3, near_duplicates=False)
+    for i in range(5):
+        cache.put(f"prompt {i}", f"p{i}")
+    cache.lookup("prompt 2")  # Now the most recently used
+    cache.put("prompt 5", "p5")
+    assert cache.stats["evictions"] == 3
+    await cache.close()
+
+    restored = CompressionCache(path=path, max_entries=3, near_duplicates=False)
+    await restored.load()
+    assert [restored.lookup(f"prompt {i}")[0] for i in range(6)] == [None, None, "p2", None, "p4", "p5"]
+
+@pytest.mark.asyncio
+async def test_stats_recorded_in_mcp(tmp_path):
+    mcp = MCP(storage_path=str(tmp_path / "mcp"), journal_mode=True)
+    await mcp.initialize()
+    cache = CompressionCache(path=str(tmp_path / "cache.json"), mcp=mcp)
+    compress = _Compressor()
+    await cache.get_or_compress(PROMPT, compress.__call__)
+    await cache.get_or_compress(PROMPT, compress.__call__)
+    stats = await mcp.get_compression_stats()
+    assert stats["event"] == "hit"
+    assert stats["hit_rate"] == 0.5
+    assert len(mcp.context["compressionLog"]["compression_history"]) == 2
+    await mcp.close()
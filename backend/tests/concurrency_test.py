@@ -0,0 +1,58 @@
+import pytest
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+
+AGENTS = 100
+UPDATES_PER_AGENT = 20
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("journal_mode", [False, True])
+async def test_concurrent_agents_do_not_deadlock(tmp_path, journal_mode):
+    mcp = MCP(storage_path=str(tmp_path), journal_mode=journal_mode)
+    await mcp.initialize()
+
+    async def agent(agent_id: str):
+        for step in range(UPDATES_PER_AGENT):
+            await mcp.update_agent_state(agent_id, {"step": step})
+            await mcp.add_command(f"{agent_id}:{step}", None)
+            if step % 5 == 0:
+                await mcp.log_error(RuntimeError(agent_id), {"step": step})
+                await mcp.add_feedback("metric", agent_id)
+
+    # A deadlock shows up as a timeout rather than a hung test run
+    await asyncio.wait_for(
+        asyncio.gather(*(agent(f"agent-{i}") for i in range(AGENTS))),
+        timeout=60
+    )
+    await mcp.close()
+
+    assert mcp.context["userProfile"]["usage_stats"]["total_commands"] == AGENTS * UPDATES_PER_AGENT
+    assert len(mcp.context["agentStates"]) == AGENTS
+    assert all(entry["state"]["step"] == UPDATES_PER_AGENT - 1 for entry in mcp.context["agentStates"].values())
+    assert mcp.get_section_version("agentStates") == AGENTS * UPDATES_PER_AGENT
+    # Saves were coalesced rather than issued once per mutation
+    if not journal_mode:
+        assert mcp.writer.stats["writes"] < mcp.writer.stats["requests"]
+
+@pytest.mark.asyncio
+async def test_readers_do_not_wait_on_writers(tmp_path):
+    mcp = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await mcp.initialize()
+    await mcp.update_agent_state("automation", {"mood": "idle"})
+
+    # Hold the writer-side locks and make sure reads still complete immediately
+    async with mcp._section_lock("agentStates", "automation"), mcp._section_lock("taskHistory"):
+        state = await asyncio.wait_for(mcp.get_agent_state("automation"), timeout=0.1)
+        history = await asyncio.wait_for(mcp.get_task_history(), timeout=0.1)
+        # A disjoint agent can still be updated in the meantime
+        await asyncio.wait_for(mcp.update_agent_state("speech", {"mood": "busy"}), timeout=0.1)
+
+    assert state["state"]["mood"] == "idle"
+    assert history == []
+    assert (await mcp.get_agent_state("speech"))["state"]["mood"] == "busy"
+    await mcp.close()
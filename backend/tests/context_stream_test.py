@@ -0,0 +1,107 @@
+import pytest
+import asyncio
+import copy
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from mcp.stream import ContextStreamer, apply_ops, diff, parse_event_id, to_json_value
+
+def test_diff_round_trip():
+    old = {"a": {"b": 1, "c/d": [1, 2]}, "history": [1, 2, 3, 4], "gone": True}
+    new = {"a": {"b": 2, "c/d": [1, 2], "e": None}, "history": [3, 4, 5], "list": []}
+    ops = diff(old, new)
+    assert apply_ops(copy.deepcopy(old), ops) == new
+    # A ring buffer that evicted two entries and gained one
+    assert {"op": "drop", "path": "/history", "count": 2} in ops
+    assert {"op": "append", "path": "/history", "value": [5]} in ops
+    assert diff(new, new) == []
+
+async def _setup(tmp_path, **kwargs):
+    mcp = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await mcp.initialize()
+    streamer = ContextStreamer(mcp, **kwargs)
+    streamer.start()
+    return mcp, streamer
+
+async def _stop(mcp, streamer):
+    await streamer.stop()
+    await mcp.close()
+
+@pytest.mark.asyncio
+async def test_snapshot_then_coalesced_deltas(tmp_path):
+    mcp, streamer = await _setup(tmp_path, tick=0.05)
+    subscription = streamer.subscribe()
+    snapshot = await subscription.next()
+    assert (snapshot["type"], snapshot["seq"]) == ("snapshot", 0)
+    state = snapshot["context"]
+
+    for i in range(20):
+        await mcp.add_command(f"command {i}", "ok")
+    await mcp.update_agent_state("briefing", {"points": 3})
+    await asyncio.sleep(0.15)
+    # Twenty-one commits, but at most one frame per tick
+    assert streamer.stats["commits"] == 21
+    assert streamer.stats["frames"] <= 3
+    while not subscription.queue.empty():
+        frame = await subscription.next()
+        assert frame["type"] == "delta"
+        apply_ops(state, frame["ops"])
+    assert state == to_json_value(mcp.context)
+    await _stop(mcp, streamer)
+
+@pytest.mark.asyncio
+async def test_resume_filter_and_slow_client_resync(tmp_path):
+    mcp, streamer = await _setup(tmp_path, max_pending=3)
+    await mcp.add_command("first", "ok")
+    first = streamer.publish()
+    await mcp.add_task("task", "done")
+    streamer.publish()
+
+    # Resuming from a sequence number still in the backlog replays only the missed deltas
+    resumed = streamer.subscribe(since=first["seq"], stream=first["stream"])
+    frame = await resumed.next()
+    assert (frame["type"], frame["seq"]) == ("delta", first["seq"] + 1)
+    resumed.close()
+    # A section filter only passes ops for those sections
+    filtered = streamer.subscribe(sections=["agentStates"])
+    assert set((await filtered.next())["context"]) == {"agentStates"}
+    await mcp.add_command("second", "ok")
+    streamer.publish()
+    assert filtered.queue.empty()
+
+    # A client that falls behind is resynced with a snapshot instead of buffering
+    slow = streamer.subscribe()
+    await slow.next()
+    for i in range(5):
+        await mcp.add_command(f"burst {i}", "ok")
+        streamer.publish()
+    frame = await slow.next()
+    assert (frame["type"], frame["seq"]) == ("snapshot", streamer.seq)
+    assert frame["context"]["recentCommands"] == to_json_value(mcp.context["recentCommands"])
+    assert streamer.stats["resyncs"] == 1
+    await _stop(mcp, streamer)
+
+@pytest.mark.asyncio
+async def test_resume_point_from_another_stream_gets_a_snapshot(tmp_path):
+    mcp, streamer = await _setup(tmp_path)
+    await mcp.add_command("first", "ok")
+    first = streamer.publish()
+    await mcp.add_command("second", "ok")
+    streamer.publish()
+    # A restarted server (or another worker) numbers its frames from scratch
+    other = ContextStreamer(mcp)
+    other.start()
+    await mcp.add_command("third", "ok")
+    assert other.publish()["seq"] == first["seq"]
+    for since, stream in ((first["seq"], other.stream_id), (first["seq"], None)):
+        subscription = streamer.subscribe(since=since, stream=stream)
+        frame = await subscription.next()
+        assert (frame["type"], frame["stream"], frame["seq"]) == ("snapshot", streamer.stream_id, streamer.seq)
+        subscription.close()
+    assert parse_event_id(f"{streamer.stream_id}:{first['seq']}") == (streamer.stream_id, first["seq"])
+    assert parse_event_id("7") == parse_event_id(None) == (None, None)
+    await other.stop()
+    await _stop(mcp, streamer)
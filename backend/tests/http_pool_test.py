@@ -0,0 +1,117 @@
+import pytest
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from models.http import HTTPClientPool, TokenBucket
+from models.base import ModelError
+from models.stub_server import StubModelServer
+from models.together_llama3 import TogetherLlama3Client
+from models.gemini import GeminiClient
+from models.fallback import OllamaClient
+
+UNLIMITED = {"max_concurrency": 8, "rate": None, "burst": None}
+
+async def _server(**kwargs):
+    server = StubModelServer(**kwargs)
+    await server.start()
+    return server
+
+@pytest.mark.asyncio
+async def test_connections_are_reused():
+    server = await _server(reply="pooled")
+    pool = HTTPClientPool(limits={"together": UNLIMITED})
+    client = TogetherLlama3Client(base_url=server.url, pool=pool)
+    for _ in range(5):
+        assert await client.generate("hi") == "pooled"
+    assert (server.requests, server.connections) == (5, 1)
+    await pool.close()
+    await server.stop()
+
+@pytest.mark.asyncio
+async def test_retries_transient_failures():
+    server = await _server(fail_status=503, reply="recovered")
+    server.fail_times = 2
+    pool = HTTPClientPool(limits={"together": UNLIMITED}, retries=3, backoff_base=0.01)
+    client = TogetherLlama3Client(base_url=server.url, pool=pool)
+    assert await client.generate("hi") == "recovered"
+    assert server.requests == 3
+    assert pool.stats["together"]["retries"] == 2
+
+    # Out of retries: the last failure is reported
+    server.fail_times = None
+    with pytest.raises(ModelError, match="HTTP 503"):
+        await client.generate("hi")
+    # Client errors are not retried
+    server.fail_status = 400
+    requests = server.requests
+    with pytest.raises(ModelError, match="HTTP 400"):
+        await client.generate("hi")
+    assert server.requests == requests + 1
+    await pool.close()
+    await server.stop()
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_per_provider():
+    server = await _server(latency=0.05)
+    pool = HTTPClientPool(limits={"ollama": {"max_concurrency": 2, "rate": None, "burst": None}})
+    client = OllamaClient(base_url=server.url, pool=pool)
+    peak = 0
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, pool.stats.get("ollama", {}).get("in_flight", 0))
+            await asyncio.sleep(0.005)
+
+    watcher = asyncio.create_task(watch())
+    await asyncio.gather(*(client.generate("hi") for _ in range(6)))
+    watcher.cancel()
+    assert peak == 2
+    assert server.connections <= 2
+    await pool.close()
+    await server.stop()
+
+@pytest.mark.asyncio
+async def test_token_bucket_throttles():
+    bucket = TokenBucket(rate=20.0, capacity=2)
+    started = time.perf_counter()
+    waits = [await bucket.acquire() for _ in range(4)]
+    assert max(waits[:2]) < 0.01
+    assert time.perf_counter() - started >= 0.09
+
+    server = await _server()
+    pool = HTTPClientPool(limits={"gemini": {"max_concurrency": 4, "rate": 20.0, "burst": 1}})
+    client = GeminiClient(base_url=server.url, api_key="key", pool=pool)
+    await asyncio.gather(*(client.generate("hi") for _ in range(3)))
+    assert pool.stats["gemini"]["throttled_seconds"] >= 0.09
+    await pool.close()
+    await server.stop()
+
+@pytest.mark.asyncio
+async def test_streaming_yields_before_completion():
+    server = await _server(reply="one two three four", stream_interval=0.05)
+    pool = HTTPClientPool(limits={"together": UNLIMITED, "gemini": UNLIMITED, "ollama": UNLIMITED})
+    clients = [
+        TogetherLlama3Client(base_url=server.url, pool=pool),
+        GeminiClient(base_url=server.url, api_key="key", pool=pool),
+        OllamaClient(base_url=server.url, pool=pool)
+    ]
+    for client in clients:
+        started = time.perf_counter()
+        chunks = []
+        first = None
+        async for text in client.stream("hi"):
+            if first is None:
+                first = time.perf_counter() - started
+            chunks.append(text)
+        total = time.perf_counter() - started
+        assert "".join(chunks) == "one two three four"
+        assert len(chunks) == 4
+        assert first < total - 0.1
+    assert pool.stats["together"]["in_flight"] == 0
+    await pool.close()
+    await server.stop()
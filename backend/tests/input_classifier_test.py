@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from supervisor.input_classifier import CommandMatcher, KeywordAutomaton
+
+def _write_map(path, commands, mtime=None):
+    path.write_text(json.dumps({"version": 1, "commands": commands}))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+def test_default_map_tiers():
+    matcher = CommandMatcher()
+    assert matcher.classify("Hello, AURA!")["tier"] == "exact"
+    assert matcher.classify("what time is it?")["action"] == {"agent": "builtin", "name": "time"}
+    opened = matcher.classify("please open Firefox")
+    assert (opened["id"], opened["tier"], opened["argument"]) == ("open_app", "pattern", "firefox")
+    # Longest pattern wins, and patterns only match whole words
+    assert matcher.classify("turn up the volume a bit")["id"] == "volume"
+    assert matcher.classify("reopen the document") is None
+    fuzzy = matcher.classify("wat time is it")
+    assert (fuzzy["id"], fuzzy["tier"]) == ("time", "fuzzy")
+    assert matcher.classify("summarize this article about tides") is None
+    assert matcher.stats["misses"] == 2
+
+def test_questions_are_not_commands():
+    matcher = CommandMatcher()
+    # Command prefixes only count at the start of the input
+    for question in (
+        "how do I start a business",
+        "what is open source software",
+        "explain how to run a marathon",
+        "why does my laptop fan start spinning",
+        "can I turn up the volume on a vinyl player",
+    ):
+        assert matcher.classify(question) is None, question
+    assert matcher.classify("hey aura launch spotify")["argument"] == "spotify"
+    assert matcher.classify("turn up the volume")["id"] == "volume"
+
+def test_open_app_needs_an_app_argument():
+    installed = {"firefox", "spotify", "visual studio code"}
+    matcher = CommandMatcher(argument_checks={"app": installed.__contains__})
+    # Requests that start with a launch verb go to a model
+    for request in (
+        "run me through how photosynthesis works",
+        "start writing a cover letter for my job application",
+        "please run a comparison of python and rust",
+        "open questions in quantum gravity explained",
+        "launch",
+        "open the pod bay doors",
+    ):
+        assert matcher.classify(request) is None, request
+    assert matcher.classify("open the Firefox")["argument"] == "firefox"
+    assert matcher.classify("launch visual studio code")["argument"] == "visual studio code"
+    # Without a check, a short app-like name is enough
+    assert CommandMatcher().classify("start writing a cover letter") is None
+    assert CommandMatcher().classify("run htop")["argument"] == "htop"
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = KeywordAutomaton(["he", "she", "his", "hers"])
+    found = sorted((start, automaton.patterns[i]) for start, i in automaton.search("ushers"))
+    assert found == [(1, "she"), (2, "he"), (2, "hers")]
+
+def test_hot_reload(tmp_path):
+    path = tmp_path / "command_map.json"
+    _write_map(path, [{"id": "a", "phrases": ["ping"], "response": "pong"}], mtime=1000)
+    matcher = CommandMatcher(str(path), check_interval=0)
+    assert matcher.classify("ping")["response"] == "pong"
+
+    _write_map(path, [{"id": "a", "phrases": ["ping"], "response": "PONG"}], mtime=2000)
+    assert matcher.classify("ping")["response"] == "PONG"
+    # A broken edit keeps the last good map
+    path.write_text("{not json")
+    os.utime(path, (3000, 3000))
+    assert matcher.classify("ping")["response"] == "PONG"
+    assert matcher.stats["reloads"] == 2
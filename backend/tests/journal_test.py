@@ -0,0 +1,126 @@
+import pytest
+import pytest_asyncio
+import json
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+
+@pytest_asyncio.fixture
+async def journal_mcp(tmp_path):
+    mcp = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await mcp.initialize()
+    yield mcp
+    await mcp.close()
+
+@pytest.mark.asyncio
+async def test_journal_replay_restores_context(journal_mcp, tmp_path):
+    await journal_mcp.add_command("open firefox", {"status": "ok"})
+    await journal_mcp.update_agent_state("automation", {"mood": "busy"})
+    await journal_mcp.update_user_profile("theme", "light")
+    await journal_mcp.close()
+
+    # Nothing was rewritten; every mutation is a journal record
+    assert not (tmp_path / "context.json").exists()
+    lines = (tmp_path / "context.journal").read_text().splitlines()
+    assert [json.loads(line)["op"] for line in lines] == [
+        "add_command", "update_agent_state", "update_user_profile"
+    ]
+
+    restored = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await restored.initialize()
+    assert restored.context["recentCommands"][-1]["command"] == "open firefox"
+    assert restored.context["userProfile"]["usage_stats"]["total_commands"] == 1
+    assert (await restored.get_agent_state("automation"))["state"]["mood"] == "busy"
+    assert (await restored.get_user_profile())["preferences"]["theme"] == "light"
+    await restored.close()
+
+@pytest.mark.asyncio
+async def test_compaction_folds_journal_into_snapshot(journal_mcp, tmp_path):
+    for i in range(5):
+        await journal_mcp.add_command(f"cmd-{i}", i)
+    await journal_mcp.compact()
+    await journal_mcp.add_command("after-compaction", None)
+    await journal_mcp.close()
+
+    snapshot = json.loads((tmp_path / "context.json").read_text())
+    assert snapshot["__journal_seq__"] == 5
+    assert len(snapshot["recentCommands"]) == 5
+    assert not (tmp_path / "context.journal.1").exists()
+
+    restored = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await restored.initialize()
+    commands = [c["command"] for c in restored.context["recentCommands"]]
+    assert commands == [f"cmd-{i}" for i in range(5)] + ["after-compaction"]
+    await restored.close()
+
+@pytest.mark.asyncio
+async def test_replay_skips_torn_tail(journal_mcp, tmp_path):
+    await journal_mcp.add_command("complete", None)
+    await journal_mcp.close()
+    with open(tmp_path / "context.journal", "a") as f:
+        f.write('{"seq": 2, "op": "add_comm')
+
+    restored = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await restored.initialize()
+    assert [c["command"] for c in restored.context["recentCommands"]] == ["complete"]
+    await restored.add_command("next", None)
+    await restored.close()
+
+    again = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await again.initialize()
+    assert [c["command"] for c in again.context["recentCommands"]] == ["complete", "next"]
+    await again.close()
+
+@pytest.mark.asyncio
+async def test_group_commits_do_not_wait_for_compaction(tmp_path):
+    from mcp.journal import ContextJournal
+
+    journal = ContextJournal(tmp_path / "context.journal", flush_interval=0.01, compact_every=2)
+    admitted = asyncio.Event()
+    calls = []
+
+    async def on_compact():
+        # Stands in for a compaction queued behind other maintenance jobs
+        calls.append(1)
+        await admitted.wait()
+
+    journal.start(on_compact=on_compact)
+    for i in range(3):
+        journal.append("add_command", {"i": i})
+    await asyncio.sleep(0.05)
+    journal.append("add_command", {"i": 3})
+    await asyncio.sleep(0.05)
+    # The later record was flushed while compaction was still waiting, and only one was started
+    assert len((tmp_path / "context.journal").read_text().splitlines()) == 4
+    assert calls == [1]
+    admitted.set()
+    await journal.close()
+
+@pytest.mark.asyncio
+async def test_failed_batch_stays_buffered(journal_mcp, tmp_path, monkeypatch):
+    import mcp.journal
+    journal = journal_mcp.journal
+    synced = []
+    real_fsync = mcp.journal.os.fsync
+
+    def failing_fsync(fd):
+        synced.append(fd)
+        if len(synced) == 1:
+            raise OSError("disk full")
+        real_fsync(fd)
+
+    monkeypatch.setattr(mcp.journal.os, "fsync", failing_fsync)
+    await journal.flush()
+    await journal_mcp.add_command("first", "ok")
+    with pytest.raises(OSError):
+        await journal.flush()
+    await journal_mcp.add_command("second", "ok")
+    await journal.flush()
+    # The failed batch was cut from the file and written again ahead of the newer record
+    records = [json.loads(line) for line in (tmp_path / "context.journal").read_text().splitlines()]
+    assert [r["data"]["entry"]["command"] for r in records if r["op"] == "add_command"] == ["first", "second"]
+    assert len(synced) >= 2
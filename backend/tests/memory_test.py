@@ -0,0 +1,64 @@
+import pytest
+import time
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from agents.memory import SQLiteHistoryStore
+
+async def _sqlite_mcp(tmp_path):
+    mcp = MCP(
+        storage_path=str(tmp_path),
+        history_limits={"errorLogs": {"capacity": 5, "max_age": None}},
+        history_store=SQLiteHistoryStore(str(tmp_path / "history.db"))
+    )
+    await mcp.initialize()
+    return mcp
+
+@pytest.mark.asyncio
+async def test_history_queries_use_store(tmp_path):
+    mcp = await _sqlite_mcp(tmp_path)
+    started = time.time()
+    for i in range(30):
+        error = ValueError(str(i)) if i % 3 else KeyError(str(i))
+        await mcp.log_error(error, {"agent_id": "automation"})
+        await mcp.add_command(f"cmd-{i}", None, agent_id="speech" if i % 2 else "automation")
+
+    key_errors = await mcp.get_errors(error_type="KeyError", since=started)
+    assert [e["error_message"] for e in key_errors] == [repr(str(i)) for i in range(27, -1, -3)]
+    page = await mcp.get_commands(agent_id="speech", limit=3, offset=3)
+    assert [c["command"] for c in page] == ["cmd-23", "cmd-21", "cmd-19"]
+    # The store holds more than the bounded in-memory ring
+    assert len(mcp.context["errorLogs"]) == 5
+    assert len(await mcp.get_recent_errors(20)) == 20
+    await mcp.close()
+
+@pytest.mark.asyncio
+async def test_store_survives_restart_and_clear(tmp_path):
+    mcp = await _sqlite_mcp(tmp_path)
+    for i in range(12):
+        await mcp.log_error(RuntimeError(str(i)))
+    await mcp.add_task("open workspace", "completed", agent_id="automation")
+    await mcp.close()
+
+    restored = await _sqlite_mcp(tmp_path)
+    assert len(restored.context["errorLogs"]) == 5
+    assert [e["error_message"] for e in await restored.get_recent_errors(12)] == [str(i) for i in range(12)]
+    assert (await restored.get_task_history())[0]["task"] == "open workspace"
+    assert await restored.query_history("taskHistory", entry_type="completed", agent_id="automation")
+
+    await restored.clear_error_logs()
+    assert await restored.get_recent_errors() == []
+    await restored.close()
+
+@pytest.mark.asyncio
+async def test_in_memory_queries_without_store(tmp_path):
+    mcp = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await mcp.initialize()
+    for i in range(6):
+        await mcp.add_feedback("bug" if i % 2 else "idea", f"note-{i}", {"agent_id": "ui"})
+    bugs = await mcp.query_history("feedbackLoop.user_feedback", entry_type="bug", agent_id="ui", limit=2)
+    assert [f["content"] for f in bugs] == ["note-5", "note-3"]
+    await mcp.close()
@@ -0,0 +1,86 @@
+import pytest
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from models.http import HTTPClientPool
+from models.stub_server import StubModelServer
+from models.together_llama3 import TogetherLlama3Client
+from utils.logger import Histogram, configure_logging, registry, span, stop_logging
+
+def test_histogram_renders_prometheus_text():
+    histogram = Histogram("aura_test_seconds", "Test histogram", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, route='say "hi"')
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP aura_test_seconds Test histogram", "# TYPE aura_test_seconds histogram"]
+    assert 'aura_test_seconds_bucket{route="say \\"hi\\"",le="0.1"} 1' in lines
+    assert 'aura_test_seconds_bucket{route="say \\"hi\\"",le="1"} 3' in lines
+    assert 'aura_test_seconds_bucket{route="say \\"hi\\"",le="+Inf"} 4' in lines
+    assert 'aura_test_seconds_count{route="say \\"hi\\""} 4' in lines
+    assert histogram.snapshot(route='say "hi"')["p50"] == 1.0
+
+def test_span_is_a_noop_when_disabled():
+    registry.reset()
+    registry.enabled = False
+    try:
+        with span("model_call", model="x"):
+            pass
+        assert "aura_model_call_seconds" not in registry.render()
+        assert span("model_call") is span("app_lookup")
+    finally:
+        registry.enabled = True
+    with span("app_lookup"):
+        pass
+    assert registry.histogram("app_lookup_seconds").snapshot()["count"] == 1
+
+@pytest.mark.asyncio
+async def test_hot_paths_are_instrumented(tmp_path):
+    registry.reset()
+    mcp = MCP(storage_path=str(tmp_path))
+    await mcp.initialize()
+    await mcp.add_command("open mail", "ok")
+    await mcp.close()
+    server = StubModelServer()
+    await server.start()
+    pool = HTTPClientPool(retries=0)
+    await TogetherLlama3Client(base_url=server.url, pool=pool).generate("hi")
+    await pool.close()
+    await server.stop()
+
+    text = registry.render()
+    assert 'aura_mcp_lock_wait_seconds_count{section="recentCommands"} 1' in text
+    assert "aura_mcp_serialize_seconds_count" in text
+    assert "aura_mcp_disk_write_seconds_count" in text
+    assert 'aura_mcp_prune_seconds_count{section="recentCommands"}' in text
+    assert 'aura_model_call_seconds_count{model="llama3",outcome="ok"} 1' in text
+
+def test_buffered_structured_logging(tmp_path):
+    path = tmp_path / "aura.log"
+    configure_logging(path=str(path))
+    logging.getLogger("aura.test").info("saved context", extra={"bytes": 42})
+    stop_logging()
+    record = json.loads(path.read_text().splitlines()[-1])
+    assert (record["message"], record["bytes"], record["level"]) == ("saved context", 42, "INFO")
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(tmp_path, monkeypatch):
+    import httpx
+    import main
+
+    monkeypatch.setenv("AURA_MCP_PATH", str(tmp_path / "mcp"))
+    monkeypatch.setenv("AURA_LOG_PATH", str(tmp_path / "aura.log"))
+    monkeypatch.setenv("AURA_WARM_SUBSYSTEMS", "0")
+    async with main.lifespan(main.app):
+        await main.app.state.mcp.add_command("open mail", "ok")
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://aura") as client:
+            response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE aura_mcp_lock_wait_seconds histogram" in response.text
+    assert 'aura_scheduler_queued_jobs{lane="interactive"} 0' in response.text
@@ -0,0 +1,61 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.pruner import ContextPruner
+from mcp.ring import RingBuffer
+
+def _entries(days_ago):
+    return [{"timestamp": (datetime.now() - timedelta(days=d)).isoformat(), "age": d} for d in days_ago]
+
+def test_prune_in_place_evicts_only_expired_entries():
+    pruner = ContextPruner()
+    old_key = (datetime.now() - timedelta(days=10)).isoformat()
+    new_key = datetime.now().isoformat()
+    context = {
+        "recentCommands": RingBuffer(100, None, _entries([9, 8, 1, 0])),
+        "errorLogs": _entries([30, 2, 1]),
+        "system_state": {"resource_usage": {old_key: {"cpu": 90}, new_key: {"cpu": 5}}}
+    }
+    stats = pruner.prune_in_place(context)
+
+    assert [e["age"] for e in context["recentCommands"]] == [1, 0]
+    assert [e["age"] for e in context["errorLogs"]] == [2, 1]
+    assert list(context["system_state"]["resource_usage"]) == [new_key]
+    assert stats["recentCommands"]["evicted"] == 2
+    assert stats["errorLogs"]["evicted"] == 1
+    assert stats["system_state.resource_usage"]["evicted"] == 1
+
+    # Nothing crossed the cutoff since, so a second pass evicts nothing
+    pruner.prune_in_place(context)
+    assert stats["recentCommands"]["runs"] == 2
+    assert stats["recentCommands"]["evicted"] == 2
+
+def test_prune_applies_age_and_size_to_lists():
+    pruner = ContextPruner()
+    pruner.max_command_history = 2
+    commands = _entries([20, 3, 2, 1])
+    pruned = pruner.prune({"recentCommands": commands})
+    assert [e["age"] for e in pruned["recentCommands"]] == [2, 1]
+    assert len(commands) == 4
+
+def test_resource_usage_keys_are_indexed_once():
+    pruner = ContextPruner()
+    usage = {(datetime.now() - timedelta(minutes=m)).isoformat(): m for m in range(50)}
+    pruner.prune_in_place({"system_state": {"resource_usage": usage}})
+    assert len(pruner._resource_heap) == 50
+    pruner.prune_in_place({"system_state": {"resource_usage": usage}})
+    assert len(pruner._resource_heap) == 50
+    assert len(usage) == 50
+
+def test_prune_leaves_the_resource_index_to_prune_in_place():
+    pruner = ContextPruner()
+    old_key = (datetime.now() - timedelta(days=10)).isoformat()
+    new_key = datetime.now().isoformat()
+    usage = {old_key: {"cpu": 90}, new_key: {"cpu": 5}}
+    # prune() runs off the event loop, so it filters its copy without the shared index
+    pruned = pruner.prune({"system_state": {"resource_usage": usage}})
+    assert list(pruned["system_state"]["resource_usage"]) == [new_key]
+    assert pruner._resource_heap == [] and len(usage) == 2
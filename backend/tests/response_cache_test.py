@@ -0,0 +1,139 @@
+import pytest
+import time
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from models.http import HTTPClientPool
+from models.stub_server import StubModelServer
+from models.together_llama3 import TogetherLlama3Client
+from supervisor.response_cache import ResponseCache
+from supervisor.router import ModelRouter
+
+async def _mcp(path):
+    mcp = MCP(storage_path=str(path), journal_mode=True)
+    await mcp.initialize()
+    return mcp
+
+@pytest.mark.asyncio
+async def test_fingerprint_tracks_context_slice(tmp_path):
+    mcp = await _mcp(tmp_path)
+    before = mcp.fingerprint(["userProfile.preferences"])
+    # Commands touch userProfile.usage_stats, not the preferences
+    await mcp.add_command("open mail", "ok")
+    assert mcp.fingerprint(["userProfile.preferences"]) == before
+    assert mcp.fingerprint(["userProfile"]) != mcp.fingerprint(["userProfile.preferences"])
+    await mcp.update_user_profile("language", "de")
+    assert mcp.fingerprint(["userProfile.preferences"]) != before
+    await mcp.close()
+
+@pytest.mark.asyncio
+async def test_exact_hits_and_context_invalidation(tmp_path):
+    mcp = await _mcp(tmp_path)
+    cache = ResponseCache(path=None, mcp=mcp)
+    fingerprint = cache.fingerprint()
+    assert cache.lookup("What time is it?", fingerprint)[1] == "miss"
+    cache.put("What time is it?", fingerprint, "Noon.", "llama3", 0.8)
+    entry, event, _ = cache.lookup("  what TIME is it ", cache.fingerprint())
+    assert (entry["text"], entry["model"], event) == ("Noon.", "llama3", "hit")
+    assert cache.stats["seconds_saved"] == pytest.approx(0.8)
+
+    await mcp.update_user_profile("language", "de")
+    fingerprint = cache.fingerprint()
+    assert cache.stats["invalidated"] == 1 and len(cache) == 0
+    assert cache.lookup("What time is it?", fingerprint)[0] is None
+    await mcp.close()
+
+def test_ttl_and_lru_eviction():
+    cache = ResponseCache(path=None, ttl=0.05, max_entries=2)
+    cache.put("first", "", "1")
+    cache.put("second", "", "2")
+    cache.lookup("first", "")
+    cache.put("third", "", "3")
+    # "second" was least recently used
+    assert cache.lookup("second", "")[0] is None
+    assert cache.stats["evictions"] == 1
+    time.sleep(0.06)
+    assert cache.lookup("first", "")[0] is None
+    assert cache.stats["expired"] == 1
+
+def test_near_duplicates_stay_within_context():
+    cache = ResponseCache(path=None, similarity_threshold=0.8)
+    cache.put("summarize the meeting notes from this morning", "ctx-a", "summary")
+    entry, event, similarity = cache.lookup("summarise the meeting notes from this morning", "ctx-a")
+    assert (entry["text"], event) == ("summary", "near_hit")
+    assert similarity >= 0.8
+    assert cache.lookup("summarise the meeting notes from this morning", "ctx-b")[0] is None
+    assert cache.lookup("open the calendar", "ctx-a")[0] is None
+
+@pytest.mark.asyncio
+async def test_save_and_load(tmp_path):
+    path = tmp_path / "responses.json"
+    cache = ResponseCache(path=str(path))
+    cache.put("hello", "ctx", "hi there", "llama3", 0.5)
+    cache.put("stale", "ctx", "old", "llama3", 0.5, expires=time.time() - 1)
+    await cache.close()
+
+    loaded = ResponseCache(path=str(path))
+    await loaded.load()
+    assert len(loaded) == 1
+    assert loaded.lookup("hello", "ctx")[0]["text"] == "hi there"
+
+@pytest.mark.asyncio
+async def test_load_drops_entries_of_outdated_context(tmp_path):
+    mcp = await _mcp(tmp_path / "mcp")
+    path = tmp_path / "responses.json"
+    cache = ResponseCache(path=str(path), mcp=mcp)
+    assert cache.ttl <= 60 * 60
+    cache.put("hello", cache.fingerprint(), "hi there")
+    cache.put("guten tag", cache.fingerprint(["userProfile"]), "hallo")
+    await cache.close()
+
+    loaded = ResponseCache(path=str(path), mcp=mcp)
+    await loaded.load()
+    assert len(loaded) == 2
+    # A command changes the profile's usage_stats but not its preferences
+    await mcp.add_command("open mail", "ok")
+    loaded = ResponseCache(path=str(path), mcp=mcp)
+    await loaded.load()
+    assert len(loaded) == 1 and loaded.stats["invalidated"] == 1
+    assert loaded.lookup("hello", loaded.fingerprint())[0]["text"] == "hi there"
+    await mcp.close()
+
+@pytest.mark.asyncio
+async def test_router_serves_repeats_from_cache(tmp_path):
+    server = StubModelServer(latency=0.05, reply="cached answer")
+    await server.start()
+    mcp = await _mcp(tmp_path)
+    pool = HTTPClientPool(limits={"together": {"max_concurrency": 4, "rate": None, "burst": None}}, retries=0)
+    router = ModelRouter(
+        {"llama3": TogetherLlama3Client(base_url=server.url, pool=pool)},
+        mcp=mcp,
+        routes={"quick": {"models": ["llama3"], "p95_budget": 1.0, "hedge": False, "hedge_after": None}},
+        cache=ResponseCache(path=None, mcp=mcp),
+        publish_interval=0
+    )
+    first = await router.route("What's the capital of Peru", input_class="quick")
+    second = await router.route("what's the capital of peru?", input_class="quick")
+    assert (first["cached"], second["cached"]) == ("miss", "hit")
+    assert second["text"] == "cached answer" and second["model"] == "llama3"
+    assert second["latency"] < first["latency"]
+    assert server.requests == 1
+
+    await mcp.update_user_profile("language", "de")
+    assert (await router.route("what's the capital of peru", input_class="quick"))["cached"] == "miss"
+    assert server.requests == 2
+    # Answers that depend on when they are asked are never cached
+    for _ in range(2):
+        assert (await router.route("what's on my schedule today", input_class="quick"))["cached"] is None
+    assert server.requests == 4 and router.stats["uncacheable"] == 2
+
+    metrics = await mcp.get_performance_metrics()
+    assert metrics["response_cache"]["hits"] == 1
+    assert metrics["response_cache"]["hit_rate"] == pytest.approx(1 / 3)
+    await router.close()
+    await pool.close()
+    await server.stop()
+    await mcp.close()
@@ -0,0 +1,56 @@
+import pytest
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from mcp.pruner import ContextPruner
+from mcp.ring import RingBuffer
+
+def test_ring_buffer_evicts_by_capacity_and_age():
+    ring = RingBuffer(capacity=3, max_age=60)
+    for i in range(5):
+        ring.append({"n": i}, epoch=1000 + i)
+    assert [item["n"] for item in ring] == [2, 3, 4]
+
+    # An insert two minutes later ages out everything before it
+    ring.append({"n": 5}, epoch=1124)
+    assert ring.to_list() == [{"n": 5}]
+    assert ring.tail(10) == [{"n": 5}]
+    assert ring.tail(0) == []
+
+def test_pruner_trims_schema_sections():
+    old = (datetime.now() - timedelta(days=30)).isoformat()
+    fresh = datetime.now().isoformat()
+    context = {
+        "recentCommands": RingBuffer(10, None, [{"timestamp": old}, {"timestamp": fresh}]),
+        "feedbackLoop": {"user_feedback": [{"timestamp": old}, {"timestamp": fresh}]}
+    }
+    pruned = ContextPruner().prune(context)
+    assert pruned["recentCommands"] == [{"timestamp": fresh}]
+    assert pruned["feedbackLoop"]["user_feedback"] == [{"timestamp": fresh}]
+    # The live buffer is left untouched
+    assert len(context["recentCommands"]) == 2
+
+@pytest.mark.asyncio
+async def test_history_limits_survive_save_and_load(tmp_path):
+    limits = {"errorLogs": {"capacity": 3, "max_age": None}}
+    mcp = MCP(storage_path=str(tmp_path), history_limits=limits)
+    await mcp.initialize()
+    for i in range(5):
+        await mcp.log_error(ValueError(str(i)))
+    assert [e["error_message"] for e in await mcp.get_recent_errors(2)] == ["3", "4"]
+    await mcp.close()
+
+    on_disk = json.loads((tmp_path / "context.json").read_text())
+    assert [e["error_message"] for e in on_disk["errorLogs"]] == ["2", "3", "4"]
+
+    restored = MCP(storage_path=str(tmp_path), history_limits=limits)
+    await restored.initialize()
+    assert isinstance(restored.context["errorLogs"], RingBuffer)
+    await restored.log_error(ValueError("5"))
+    assert [e["error_message"] for e in await restored.get_recent_errors()] == ["3", "4", "5"]
+    await restored.close()
@@ -0,0 +1,123 @@
+import pytest
+import time
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from models.stub_server import StubModelServer
+from models.http import HTTPClientPool
+from models.together_llama3 import TogetherLlama3Client
+from models.scout_llama4 import ScoutLlama4Client
+from models.gemini import GeminiClient
+from models.fallback import OllamaClient
+from supervisor.router import ModelRouter, RoutingError, classify_input
+from supervisor.input_classifier import CommandMatcher
+
+ROUTES = {
+    "quick": {"models": ["llama4_scout", "llama3"], "p95_budget": 1.0, "hedge": True, "hedge_after": 0.05},
+    "reasoning": {"models": ["gemini", "fallback"], "p95_budget": 5.0, "hedge": False, "hedge_after": None}
+}
+
+async def _servers(**latencies):
+    servers = {}
+    for name, latency in latencies.items():
+        server = StubModelServer(latency=latency, reply=f"from {name}")
+        await server.start()
+        servers[name] = server
+    return servers
+
+# The router fails over itself; no pool-level retries or provider rate limits
+UNLIMITED = {"max_concurrency": 8, "rate": None, "burst": None}
+POOL_LIMITS = {provider: UNLIMITED for provider in ("together", "gemini", "ollama")}
+
+def _router(servers, **kwargs):
+    pool = HTTPClientPool(limits=POOL_LIMITS, retries=0)
+    models = {
+        "llama4_scout": ScoutLlama4Client(base_url=servers["llama4_scout"].url, pool=pool),
+        "llama3": TogetherLlama3Client(base_url=servers["llama3"].url, pool=pool),
+        "gemini": GeminiClient(base_url=servers["gemini"].url, pool=pool),
+        "fallback": OllamaClient(base_url=servers["fallback"].url, pool=pool)
+    }
+    return ModelRouter(models, routes=ROUTES, **kwargs)
+
+async def _stop(router, servers):
+    await router.close()
+    await next(iter(router.models.values())).pool.close()
+    for server in servers.values():
+        await server.stop()
+
+def test_classify_input():
+    assert classify_input("open my mail") == "quick"
+    assert classify_input("explain how the journal compaction works") == "reasoning"
+    assert classify_input(" ".join(["word"] * 20)) == "chat"
+
+@pytest.mark.asyncio
+async def test_hedge_cancels_slow_primary():
+    servers = await _servers(llama4_scout=1.0, llama3=0.01, gemini=0, fallback=0)
+    router = _router(servers)
+    started = time.perf_counter()
+    result = await router.route("open my mail")
+    assert (result["model"], result["text"], result["hedged"]) == ("llama3", "from llama3", True)
+    assert time.perf_counter() - started < 0.5
+    # The slow primary was cancelled, not counted as an error
+    assert router.model_stats["llama4_scout"].cancelled == 1
+    assert router.model_stats["llama4_scout"].errors == 0
+    assert router.stats["hedge_wins"] == 1
+    await _stop(router, servers)
+
+@pytest.mark.asyncio
+async def test_cancelled_route_cancels_hedged_calls():
+    servers = await _servers(llama4_scout=1.0, llama3=1.0, gemini=0, fallback=0)
+    router = _router(servers)
+    route = asyncio.create_task(router.route("open my mail"))
+    # Past the hedge deadline: the primary and the hedge are both in flight
+    await asyncio.sleep(0.2)
+    assert router.stats["hedged"] == 1
+    route.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await route
+    # Both provider calls were cancelled before route() gave up, not left running
+    assert router.model_stats["llama4_scout"].cancelled == router.model_stats["llama3"].cancelled == 1
+    await _stop(router, servers)
+
+@pytest.mark.asyncio
+async def test_failover_demotes_failing_model(tmp_path):
+    servers = await _servers(llama4_scout=0, llama3=0, gemini=0, fallback=0)
+    servers["gemini"].fail_status = 503
+    mcp = MCP(storage_path=str(tmp_path), journal_mode=True)
+    await mcp.initialize()
+    router = _router(servers, mcp=mcp, min_samples=3, publish_interval=0)
+    for _ in range(3):
+        result = await router.route("explain the plan", input_class="reasoning")
+        assert result["model"] == "fallback"
+    assert router.stats["failovers"] == 3
+    # Enough errors: gemini is ranked last and no longer tried first
+    assert router.rank("reasoning") == ["fallback", "gemini"]
+    calls = servers["gemini"].requests
+    await router.route("explain the plan", input_class="reasoning")
+    assert servers["gemini"].requests == calls
+
+    metrics = await mcp.get_performance_metrics()
+    assert metrics["gemini"]["error_rate"] == 1.0
+    assert metrics["fallback"]["requests"] == 4
+    assert (await mcp.get_error_rate(by="model"))["model"]["gemini"] == 1.0
+    assert (await mcp.get_aggregates_by("model_latency", "model"))["fallback"]["count"] == 4
+    await _stop(router, servers)
+    await mcp.close()
+
+@pytest.mark.asyncio
+async def test_all_failing_raises_and_local_commands_skip_models():
+    servers = await _servers(llama4_scout=0, llama3=0, gemini=0, fallback=0)
+    for server in servers.values():
+        server.fail_status = 500
+    router = _router(servers, matcher=CommandMatcher())
+    with pytest.raises(RoutingError):
+        await router.route("check my mail please")
+    requests = sum(server.requests for server in servers.values())
+    result = await router.route("Hello AURA")
+    assert (result["model"], result["command"]["id"]) == ("local", "greeting")
+    assert sum(server.requests for server in servers.values()) == requests
+    await _stop(router, servers)
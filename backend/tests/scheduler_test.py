@@ -0,0 +1,131 @@
+import pytest
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from utils.scheduler import Scheduler
+
+def _square(x):
+    # Module level so the process pool can pickle it
+    return x * x, os.getpid()
+
+async def _record(order, name, delay=0.0):
+    order.append(name)
+    await asyncio.sleep(delay)
+    return name
+
+@pytest.mark.asyncio
+async def test_interactive_jobs_go_first():
+    scheduler = Scheduler(max_running=1)
+    order = []
+    blocker = scheduler.submit(_record, order, "blocker", 0.05, lane="maintenance")
+    background = scheduler.submit(_record, order, "background", lane="background")
+    interactive = scheduler.submit(_record, order, "interactive", lane="interactive")
+    assert await asyncio.gather(blocker, background, interactive) == ["blocker", "background", "interactive"]
+    assert order == ["blocker", "interactive", "background"]
+    stats = scheduler.stats()
+    assert stats["background"]["completed"] == 1
+    assert stats["background"]["wait_max"] >= 0.04
+    await scheduler.close()
+
+@pytest.mark.asyncio
+async def test_deadline_order_and_late_jobs():
+    scheduler = Scheduler(max_running=1)
+    order = []
+    blocker = scheduler.submit(_record, order, "blocker", 0.05, lane="interactive")
+    jobs = [
+        scheduler.submit(_record, order, "none", lane="interactive"),
+        scheduler.submit(_record, order, "later", lane="interactive", deadline=10.0),
+        scheduler.submit(_record, order, "soon", lane="interactive", deadline=0.01)
+    ]
+    await asyncio.gather(blocker, *jobs)
+    assert order == ["blocker", "soon", "later", "none"]
+    assert scheduler.stats()["interactive"]["late"] == 1
+    await scheduler.close()
+
+@pytest.mark.asyncio
+async def test_lane_concurrency_cap_and_queue_depth():
+    scheduler = Scheduler()
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        peak = max(peak, scheduler.lanes["background"].running)
+        await asyncio.sleep(0.02)
+
+    jobs = [scheduler.submit(work, lane="background") for _ in range(6)]
+    assert scheduler.stats()["background"]["queued"] == 4
+    # Threads for blocking callables, interactive lane unaffected by the busy background lane
+    assert await scheduler.run(sum, [1, 2, 3], lane="interactive") == 6
+    await asyncio.gather(*jobs)
+    assert peak == 2
+    assert scheduler.stats()["background"]["completed"] == 6
+    await scheduler.close()
+
+@pytest.mark.asyncio
+async def test_cancellation():
+    scheduler = Scheduler(max_running=1)
+    order = []
+    running = scheduler.submit(_record, order, "running", 10.0, lane="interactive")
+    queued = scheduler.submit(_record, order, "queued", lane="interactive")
+    await asyncio.sleep(0.01)
+    assert queued.cancel()
+    assert running.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await running
+    after = await scheduler.run(_record, order, "after", lane="interactive")
+    assert after == "after"
+    assert order == ["running", "after"]
+    assert scheduler.stats()["interactive"]["cancelled"] == 2
+
+    # Cancelling a waiter cancels its job
+    waiter = asyncio.create_task(scheduler.run(asyncio.sleep, 10.0, lane="interactive"))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert scheduler.stats()["interactive"]["running"] == 0
+    await scheduler.close()
+
+@pytest.mark.asyncio
+async def test_callables_returning_coroutines_are_awaited():
+    scheduler = Scheduler()
+    order = []
+
+    def wrapper(name):
+        return _record(order, name)
+
+    assert await scheduler.run(lambda: _record(order, "lambda")) == "lambda"
+    assert await scheduler.run(wrapper, "wrapper") == "wrapper"
+    assert order == ["lambda", "wrapper"]
+    await scheduler.close()
+
+@pytest.mark.asyncio
+async def test_cpu_jobs_run_in_process_pool():
+    scheduler = Scheduler(process_workers=1)
+    value, pid = await scheduler.run(_square, 7, lane="background", cpu=True)
+    assert value == 49 and pid != os.getpid()
+    with pytest.raises(ValueError):
+        scheduler.submit(_record, [], "x", cpu=True)
+    await scheduler.close()
+
+@pytest.mark.asyncio
+async def test_periodic_jobs_and_mcp_compaction(tmp_path):
+    scheduler = Scheduler()
+    runs = []
+    scheduler.every(0.01, runs.append, 1, name="tick")
+    mcp = MCP(storage_path=str(tmp_path), journal_mode=True, scheduler=scheduler)
+    mcp.journal.compact_every = 5
+    await mcp.initialize()
+    for i in range(10):
+        await mcp.add_command(f"command {i}", "ok")
+    await asyncio.sleep(0.2)
+    assert len(runs) >= 3
+    assert mcp.journal.stats["compactions"] >= 1
+    assert scheduler.stats()["maintenance"]["completed"] >= len(runs) + 1
+    await mcp.close()
+    await scheduler.close()
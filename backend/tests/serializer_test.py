@@ -0,0 +1,60 @@
+import pytest
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from mcp.ring import RingBuffer
+from mcp.serializer import ContextSerializer
+
+SAMPLE = {
+    "activeAgents": {"automation", "speech"},
+    "recentCommands": RingBuffer(10, None, [{"timestamp": "2026-01-01T00:00:00", "command": "open"}]),
+    "agentStates": {"automation": {"state": {"seen": {1, 2}, "at": datetime(2026, 1, 1, 12, 30)}}},
+    "errorLogs": []
+}
+
+@pytest.mark.parametrize("fmt", ["json", "msgpack"])
+def test_encode_decode_round_trip(fmt):
+    if fmt == "msgpack":
+        pytest.importorskip("msgpack")
+    serializer = ContextSerializer()
+    decoded = serializer.decode(serializer.encode(SAMPLE, fmt), fmt)
+    assert sorted(decoded["activeAgents"]) == ["automation", "speech"]
+    assert decoded["recentCommands"] == [{"timestamp": "2026-01-01T00:00:00", "command": "open"}]
+    assert decoded["agentStates"]["automation"]["state"] == {"seen": {1, 2}, "at": datetime(2026, 1, 1, 12, 30)}
+
+def test_decode_reads_legacy_serialized_files():
+    serializer = ContextSerializer()
+    legacy = dict(SAMPLE, activeAgents=sorted(SAMPLE["activeAgents"]))
+    raw = json.dumps(serializer.serialize(legacy), indent=2).encode()
+    assert serializer.decode(raw) == serializer.deserialize(json.loads(raw))
+
+@pytest.mark.asyncio
+async def test_msgpack_storage_migrates_existing_json(tmp_path):
+    pytest.importorskip("msgpack")
+    mcp = MCP(storage_path=str(tmp_path))
+    await mcp.initialize()
+    await mcp.add_command("open editor", {"at": datetime(2026, 1, 1)})
+    await mcp.close()
+
+    binary = MCP(storage_path=str(tmp_path), storage_format="msgpack")
+    await binary.initialize()
+    assert binary.context["recentCommands"][-1]["result"] == {"at": datetime(2026, 1, 1)}
+    await binary.add_command("open browser", None)
+    await binary.close()
+    assert (tmp_path / "context.msgpack").exists()
+
+    restored = MCP(storage_path=str(tmp_path), storage_format="msgpack")
+    await restored.initialize()
+    assert [c["command"] for c in restored.context["recentCommands"]] == ["open editor", "open browser"]
+    await restored.close()
+
+def test_msgpack_format_without_the_package_fails_up_front(tmp_path, monkeypatch):
+    import mcp.serializer
+    monkeypatch.setattr(mcp.serializer, "msgpack", None)
+    with pytest.raises(RuntimeError, match="pip install msgpack"):
+        MCP(storage_path=str(tmp_path), storage_format="msgpack")
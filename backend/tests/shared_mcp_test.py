@@ -0,0 +1,119 @@
+import sys
+import asyncio
+import pytest
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.shared import SharedMCP
+from benchmarks.mcp_workers_bench import run_workers
+
+def _commands(mcp):
+    return [entry["command"] for entry in mcp.context["recentCommands"]]
+
+@pytest.mark.asyncio
+async def test_workers_see_each_others_writes_in_one_order(tmp_path):
+    a = SharedMCP(storage_path=str(tmp_path), poll_interval=0)
+    b = SharedMCP(storage_path=str(tmp_path), poll_interval=0)
+    await a.initialize()
+    await b.initialize()
+    changes = []
+    b.add_listener(lambda op, sections: changes.append(op))
+    version = b.get_section_version("agentStates")
+
+    await a.add_command("open spotify", "ok")
+    await b.add_command("open calendar", "ok")
+    await a.update_agent_state("media", {"volume": 40})
+    await a.update_user_profile("theme", "light")
+    await b.update_user_profile("theme", "solarized")
+
+    # Reads go through the cache and pick up the other worker's records
+    assert await b.get_agent_state("media") == (await a.get_agent_state("media"))
+    assert b.get_section_version("agentStates") > version
+    # b applied a's records before each of its own commits, in journal order
+    assert changes == ["add_command", "add_command", "update_agent_state", "update_user_profile", "update_user_profile"]
+    assert (await a.get_user_profile())["preferences"]["theme"] == "solarized"
+    assert _commands(a) == _commands(b) == ["open spotify", "open calendar"]
+    assert a.context["userProfile"]["usage_stats"]["total_commands"] == 2
+    assert (await b.get_aggregate("commands"))["count"] == (await a.get_aggregate("commands"))["count"] == 2
+    assert not await b.refresh()  # Nothing new: one stat call, no read
+
+    # A third worker starting later loads the same state
+    c = SharedMCP(storage_path=str(tmp_path), poll_interval=0)
+    await c.initialize()
+    assert _commands(c) == _commands(a)
+    assert c.fingerprint(["userProfile", "agentStates"]) == a.fingerprint(["userProfile", "agentStates"])
+    for mcp in (a, b, c):
+        await mcp.close()
+
+@pytest.mark.asyncio
+async def test_compaction_and_lagging_worker_reload(tmp_path):
+    a = SharedMCP(storage_path=str(tmp_path), compact_every=10, poll_interval=0)
+    b = SharedMCP(storage_path=str(tmp_path), compact_every=10, poll_interval=0)
+    await a.initialize()
+    await b.initialize()
+    # b reads nothing while a writes past two compactions
+    for i in range(25):
+        await a.add_command(f"command {i}", "ok")
+        await asyncio.sleep(0)
+    await a.compact()
+    assert a.journal.stats["compactions"] >= 2
+    assert (tmp_path / "context.json").exists()
+
+    assert await b.refresh()
+    assert b.journal.stats["reloads"] == 1
+    assert _commands(b) == _commands(a)
+    await b.add_command("after reload", "ok")
+    assert await a.refresh()
+    assert _commands(a)[-1] == "after reload"
+    assert a.context["userProfile"]["usage_stats"]["total_commands"] == 26
+    await a.close()
+    await b.close()
+
+@pytest.mark.asyncio
+async def test_watcher_notifies_listeners(tmp_path):
+    a = SharedMCP(storage_path=str(tmp_path), poll_interval=0)
+    b = SharedMCP(storage_path=str(tmp_path), poll_interval=0.01)
+    await a.initialize()
+    await b.initialize()
+    seen = asyncio.Event()
+    b.add_listener(lambda op, sections: seen.set())
+    await a.log_error(RuntimeError("boom"))
+    await asyncio.wait_for(seen.wait(), timeout=2)
+    assert b.context["errorLogs"][-1]["error_message"] == "boom"
+    await a.close()
+    await b.close()
+
+def test_worker_processes_run_concurrently(tmp_path):
+    ops = 60
+    results = {}
+    for workers in (1, 3):
+        storage = tmp_path / f"workers-{workers}"
+        results[workers] = run_workers(str(storage), workers, ops, compact_every=50)
+        stats = results[workers]["stats"]
+        assert sum(s["appends"] for s in stats) == workers * ops
+        if workers > 1:
+            assert sum(s["remote_records"] for s in stats) > 0
+
+        # Nothing was lost or applied twice across workers
+        async def check():
+            mcp = SharedMCP(storage_path=str(storage), poll_interval=0)
+            await mcp.initialize()
+            usage = mcp.context["userProfile"]["usage_stats"]
+            assert usage["total_commands"] == workers * ops * 8 // 10
+            assert len(mcp.context["feedbackLoop"]["user_feedback"]) == workers * ops // 10
+            assert set(mcp.context["agentStates"]) == {f"worker-{w}" for w in range(workers)}
+            await mcp.close()
+        asyncio.run(check())
+    scaling = results[3]["ops_per_sec"] / results[1]["ops_per_sec"]
+    print(f"\nshared MCP: {results[1]['ops_per_sec']:.0f} ops/s with 1 worker, "
+          f"{results[3]['ops_per_sec']:.0f} ops/s with 3 (x{scaling:.2f})")
+
+def test_multi_worker_server_uses_shared_mcp(tmp_path, monkeypatch):
+    import main
+
+    monkeypatch.setenv("AURA_MCP_PATH", str(tmp_path))
+    monkeypatch.setenv("AURA_WORKERS", "4")
+    assert isinstance(main._build_mcp(None), SharedMCP)
+    monkeypatch.setenv("AURA_WORKERS", "1")
+    assert not isinstance(main._build_mcp(None), SharedMCP)
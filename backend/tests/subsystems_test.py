@@ -0,0 +1,116 @@
+import sys
+import time
+import asyncio
+import pytest
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.scheduler import Scheduler
+from utils.subsystems import SubsystemRegistry, SubsystemUnavailable
+
+class Component:
+    def __init__(self, name, closed):
+        self.name = name
+        self.closed = closed
+
+    async def close(self):
+        self.closed.append(self.name)
+
+@pytest.mark.asyncio
+async def test_warm_up_runs_in_priority_order():
+    loaded, closed = [], []
+    scheduler = Scheduler()
+    subsystems = SubsystemRegistry(scheduler)
+
+    def loader(name):
+        def load(registry):
+            time.sleep(0.01)  # Blocking work runs in a thread
+            loaded.append(name)
+            return Component(name, closed)
+        return load
+
+    subsystems.register("embeddings", loader("embeddings"), priority=40)
+    subsystems.register("pool", loader("pool"), priority=0)
+    subsystems.register("speech", loader("speech"), priority=50, warm=False)
+    assert subsystems.status()["pool"]["state"] == "registered"
+    assert loaded == []
+
+    await subsystems.warm()
+    assert loaded == ["pool", "embeddings"]
+    assert subsystems.ready("embeddings") and not subsystems.ready("speech")
+    assert scheduler.stats()["background"]["completed"] == 2
+    assert not subsystems.status()["pool"]["on_demand"]
+
+    await subsystems.close()
+    assert closed == ["embeddings", "pool"]
+    await scheduler.close()
+
+@pytest.mark.asyncio
+async def test_on_demand_load_is_shared_and_dependencies_resolve():
+    calls = []
+    subsystems = SubsystemRegistry()
+
+    async def pool(registry):
+        calls.append("pool")
+        await asyncio.sleep(0.01)
+        return "pool"
+
+    async def router(registry):
+        calls.append("router")
+        return f"router over {await registry.get('pool')}"
+
+    subsystems.register("pool", pool, priority=0)
+    subsystems.register("router", router, priority=10)
+    results = await asyncio.gather(*(subsystems.get("router") for _ in range(5)))
+    assert results == ["router over pool"] * 5
+    assert calls == ["router", "pool"]
+    assert subsystems.status()["router"]["on_demand"]
+    assert subsystems.peek("router") == "router over pool"
+
+    # Warm-up skips what is already loaded
+    await subsystems.warm()
+    assert calls == ["router", "pool"]
+    with pytest.raises(KeyError):
+        await subsystems.get("missing")
+    await subsystems.close()
+
+@pytest.mark.asyncio
+async def test_failed_load_is_reported_and_retried():
+    attempts = []
+    subsystems = SubsystemRegistry()
+
+    def flaky(registry):
+        attempts.append(1)
+        if len(attempts) <= 2:
+            raise ImportError("No module named 'whisper'")
+        return "speech"
+
+    subsystems.register("speech", flaky)
+    await subsystems.warm()
+    status = subsystems.status()["speech"]
+    assert status["state"] == "failed" and "whisper" in status["error"]
+    assert subsystems.peek("speech") is None
+    with pytest.raises(SubsystemUnavailable):
+        await subsystems.get("speech")
+    assert await subsystems.get("speech") == "speech"
+    assert subsystems.status()["speech"]["state"] == "ready"
+    await subsystems.close()
+
+@pytest.mark.asyncio
+async def test_health_answers_before_warm_up(tmp_path, monkeypatch):
+    import httpx
+    import main
+
+    monkeypatch.setenv("AURA_MCP_PATH", str(tmp_path / "mcp"))
+    monkeypatch.setenv("AURA_LOG_PATH", str(tmp_path / "aura.log"))
+    monkeypatch.setenv("AURA_WARM_SUBSYSTEMS", "0")
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://aura") as client:
+            response = await client.get("/health")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ok"
+    assert set(body["subsystems"]) == set(main.SUBSYSTEMS)
+    assert all(s["state"] == "registered" for s in body["subsystems"].values())
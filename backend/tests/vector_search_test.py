@@ -0,0 +1,66 @@
+import sys
+import numpy as np
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from embeddings.store import VectorStore
+from embeddings.vector_search import VectorIndex
+
+DIM = 16
+
+def _clustered(n, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIM))
+    return (centers[rng.integers(clusters, size=n)] + 0.2 * rng.normal(size=(n, DIM))).astype(np.float32)
+
+def _index(tmp_path, **kwargs):
+    index = VectorIndex(VectorStore(str(tmp_path / "vectors"), dim=DIM, initial_capacity=8), **kwargs)
+    index.open()
+    return index
+
+def test_exact_search_add_delete_and_reopen(tmp_path):
+    index = _index(tmp_path, mode="exact")
+    vectors = _clustered(100)
+    index.add([f"v{i}" for i in range(100)], vectors, [{"n": i} for i in range(100)])
+    hits = index.search(vectors[[3, 42]], k=1)
+    assert [h[0][0] for h in hits] == ["v3", "v42"]
+    assert abs(hits[0][0][1] - 1.0) < 1e-5
+
+    assert index.delete(["v3", "missing"]) == 1
+    assert index.search(vectors[3], k=1)[0][0][0] != "v3"
+    # The freed row is reused by the next add
+    index.add(["new"], vectors[3])
+    assert index.store.size == 100
+    assert index.search(vectors[3], k=1)[0][0][0] == "new"
+    index.close()
+
+    reopened = _index(tmp_path, mode="exact")
+    assert len(reopened.store) == 100
+    assert reopened.search(vectors[42], k=1)[0][0][0] == "v42"
+    assert reopened.store.payload("v42") == {"n": 42}
+
+def test_ivf_recall_and_incremental_updates(tmp_path):
+    index = _index(tmp_path, mode="ivf", nprobe=4)
+    vectors = _clustered(3000)
+    index.add([f"v{i}" for i in range(3000)], vectors)
+    queries = vectors[:50] + 0.05 * np.random.default_rng(1).normal(size=(50, DIM)).astype(np.float32)
+    exact = index.search(queries, k=10, mode="exact")
+    approx = index.search(queries, k=10)
+    assert index.trained
+    recall = np.mean([len({i for i, _ in a} & {i for i, _ in e}) / 10 for a, e in zip(approx, exact)])
+    assert recall > 0.9
+
+    # Added and deleted vectors are reflected without retraining
+    extra = _clustered(10, seed=7)
+    index.add([f"x{i}" for i in range(10)], extra)
+    index.delete(["v0"])
+    assert index.search(extra[5], k=1)[0][0][0] == "x5"
+    assert "v0" not in {i for i, _ in index.search(vectors[0], k=10)[0]}
+    assert index.stats["trainings"] == 1
+    index.close()
+
+    reopened = _index(tmp_path, mode="ivf", nprobe=4)
+    assert reopened.trained
+    assert reopened.search(extra[5], k=1)[0][0][0] == "x5"
+    assert reopened.stats["trainings"] == 0
@@ -0,0 +1,108 @@
+import os
+import sys
+import asyncio
+import pytest
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from agents.automation.app_index import AppIndex
+from agents.automation.workspace import WorkspaceLauncher, expand_exec, LAUNCH_ENV
+
+def _write_app(directory, stem, lines):
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{stem}.desktop"
+    path.write_text("[Desktop Entry]\n" + "\n".join(lines) + "\n")
+    return path
+
+def _launcher(tmp_path, profiles):
+    index = AppIndex(
+        desktop_paths=[str(tmp_path / "apps" / "*.desktop")],
+        cache_path=str(tmp_path / "cache" / "app_index.json"),
+        check_interval=0
+    )
+    return WorkspaceLauncher(index=index, profiles_path=str(tmp_path / "workspaces.json"), profiles=profiles)
+
+async def _wait_for(launcher, *paths):
+    # Also wait for the children to exit and be reaped
+    for _ in range(300):
+        if all(path.exists() for path in paths) and launcher.reap() == 0:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"not created: {[str(p) for p in paths if not p.exists()]}")
+
+def test_expand_exec_field_codes():
+    assert expand_exec('code --new-window %F') == ["code", "--new-window"]
+    assert expand_exec('"/opt/My App/run" --title=%c %k %i %U', "My App", "/x/app.desktop") == [
+        "/opt/My App/run", "--title=My App", "/x/app.desktop"
+    ]
+    assert expand_exec("printf 100%% %d") == ["printf", "100%"]
+
+@pytest.mark.asyncio
+async def test_workspace_launch_reuses_plan(tmp_path):
+    out = tmp_path / "out"
+    workdir = tmp_path / "work"
+    out.mkdir()
+    workdir.mkdir()
+    _write_app(tmp_path / "apps", "editor", ["Name=Code Editor", f"Exec=touch {out}/editor-%c %F"])
+    _write_app(tmp_path / "apps", "notes", ["Name=Notes", "Exec=touch notes-started %U", f"Path={workdir}"])
+    launcher = _launcher(tmp_path, {"coding": ["code editor", "notes", "no such program"]})
+
+    results = await launcher.launch("coding")
+    assert [r["status"] for r in results] == ["launched", "launched", "not_found"]
+    assert results[0]["name"] == "code editor" and results[0]["pid"] > 0
+    assert all(r["seconds"] >= 0 for r in results)
+    await _wait_for(launcher, out / "editor-code editor", workdir / "notes-started")
+    assert launcher.env["QT_ACCESSIBILITY"] == LAUNCH_ENV["QT_ACCESSIBILITY"]
+
+    # Repeated launches only spawn: no resolution, no index refresh
+    def fail(*args, **kwargs):
+        raise AssertionError("plan should be cached")
+    launcher.index.resolve_many = fail
+    launcher.index.refresh = fail
+    (out / "editor-code editor").unlink()
+    results = await launcher.launch("coding")
+    assert [r["status"] for r in results] == ["launched", "launched", "not_found"]
+    await _wait_for(launcher, out / "editor-code editor")
+    assert launcher.stats["plans_built"] == 1
+    assert launcher.stats["plan_hits"] == 1
+    assert launcher.stats["launched"] == 4
+
+@pytest.mark.asyncio
+async def test_failed_spawn_replans_against_fresh_index(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    desktop = _write_app(tmp_path / "apps", "tool", ["Name=Tool", f"Exec={tmp_path}/missing-binary"])
+    launcher = _launcher(tmp_path, {"tools": ["tool"]})
+    launcher.plan("tools")
+
+    # The app is upgraded after the plan was made (package managers replace by rename)
+    upgraded = tmp_path / "tool.desktop.new"
+    upgraded.write_text(f"[Desktop Entry]\nName=Tool\nExec=touch {out}/tool\n")
+    os.replace(upgraded, desktop)
+    results = await launcher.launch("tools")
+    assert results[0]["status"] == "launched"
+    await _wait_for(launcher, out / "tool")
+    assert launcher.plan("tools")[0]["argv"] == ["touch", f"{out}/tool"]
+
+@pytest.mark.asyncio
+async def test_bad_exec_line_fails_only_its_app(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    _write_app(tmp_path / "apps", "broken", ["Name=Broken", "Exec=broken --title='unterminated"])
+    _write_app(tmp_path / "apps", "notes", ["Name=Notes", f"Exec=touch {out}/notes"])
+    launcher = _launcher(tmp_path, {"mixed": ["broken", "notes"]})
+
+    results = await launcher.launch("mixed")
+    assert [r["status"] for r in results] == ["failed", "launched"]
+    assert "Exec" in results[0]["error"] and results[0]["pid"] is None
+    await _wait_for(launcher, out / "notes")
+    assert launcher.stats["failed"] == 1
+
+def test_profiles_persist(tmp_path):
+    launcher = _launcher(tmp_path, {})
+    launcher.set_profile("writing", ["notes", "browser"])
+    restored = WorkspaceLauncher(index=launcher.index, profiles_path=launcher.profiles_path)
+    assert restored.profiles == {"writing": ["notes", "browser"]}
+    with pytest.raises(KeyError):
+        restored.plan("gaming")
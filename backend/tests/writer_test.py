@@ -0,0 +1,55 @@
+import pytest
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+from mcp.mcp import MCP
+from mcp.writer import ContextWriter
+
+@pytest.mark.asyncio
+async def test_overlapping_saves_are_coalesced(tmp_path):
+    writer = ContextWriter(tmp_path / "state.json", encode=lambda data: json.dumps(data).encode())
+    state = {"count": 0}
+
+    async def bump_and_save():
+        state["count"] += 1
+        await writer.save(lambda: dict(state))
+
+    await asyncio.gather(*(bump_and_save() for _ in range(20)))
+    await writer.close()
+
+    # One write in flight plus one pending that captures the latest state
+    assert writer.stats["requests"] == 20
+    assert writer.stats["writes"] <= 2
+    assert json.loads((tmp_path / "state.json").read_text()) == {"count": 20}
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+@pytest.mark.asyncio
+async def test_failed_encode_keeps_previous_file(tmp_path):
+    target = tmp_path / "state.json"
+    target.write_text('{"intact": true}')
+
+    def explode(data):
+        raise ValueError("cannot encode")
+
+    writer = ContextWriter(target, encode=explode)
+    with pytest.raises(ValueError):
+        await writer.save(lambda: {})
+    assert json.loads(target.read_text()) == {"intact": True}
+
+@pytest.mark.asyncio
+async def test_save_and_load_round_trip(tmp_path):
+    mcp = MCP(storage_path=str(tmp_path))
+    await mcp.initialize()
+    await mcp.add_command("open terminal", {"status": "ok"})
+    await mcp.update_agent_state("automation", {"mood": "idle"})
+    await mcp.close()
+
+    restored = MCP(storage_path=str(tmp_path))
+    await restored.initialize()
+    assert restored.context["recentCommands"][-1]["command"] == "open terminal"
+    assert (await restored.get_agent_state("automation"))["state"]["mood"] == "idle"
+    await restored.close()
@@ -0,0 +1,290 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from logging.handlers import QueueHandler, QueueListener
+from bisect import bisect_left
+import os
+import json
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) for latency histograms: 50us to 30s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Spans recorded across the backend and what they measure
+SPANS = {
+    "mcp_lock_wait": "Time waiting for an MCP section lock",
+    "mcp_prune": "Time pruning one MCP history section",
+    "mcp_serialize": "Time encoding a context snapshot",
+    "mcp_disk_write": "Time writing and syncing a context snapshot",
+    "app_lookup": "Time resolving application names against the app index",
+    "model_call": "Time for one model backend request"
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Histogram:
+    """Cumulative Prometheus histogram, one series per label set"""
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelKey, List[Any]] = {}
+        self._lock = threading.Lock()  # Spans also close in worker threads
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, **labels: Any) -> Dict[str, Any]:
+        """Count, sum and an estimated p50/p95 for one label set"""
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            counts, total, count = (list(series[0]), series[1], series[2]) if series else ([], 0.0, 0)
+        def quantile(q: float) -> Optional[float]:
+            if not count:
+                return None
+            rank, seen = q * count, 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                seen += bucket
+                if seen >= rank:
+                    return bound
+            return float("inf")
+        return {"count": count, "sum": total, "p50": quantile(0.5), "p95": quantile(0.95)}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total, count) for key, (counts, total, count) in self._series.items())
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+class Counter:
+    """Monotonic Prometheus counter, one series per label set"""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._series: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._series.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = sorted(self._series.items())
+        lines += [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in series]
+        return lines
+
+# A collector returns {metric name: (type, help, [(labels, value), ...])} when metrics are scraped
+Collector = Callable[[], Dict[str, Tuple[str, str, List[Tuple[Dict[str, Any], float]]]]]
+
+class Registry:
+    """
+    Metrics of one process, rendered in the Prometheus text format
+    Histograms and counters are kept as they are observed; collectors add
+    gauges (queue depths, pool stats) computed only when /metrics is read.
+    """
+
+    def __init__(self, namespace: str = "aura", enabled: bool = True):
+        self.namespace = namespace
+        self.enabled = enabled                      # When False, span() and observe() do nothing
+        self.slow_span_seconds: Optional[float] = None  # Log spans slower than this
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help: Optional[str] = None, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        full_name = f"{self.namespace}_{name}"
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(full_name, Histogram(full_name, help or name, buckets))
+        return metric
+
+    def counter(self, name: str, help: Optional[str] = None) -> Counter:
+        full_name = f"{self.namespace}_{name}"
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(full_name, Counter(full_name, help or name))
+        return metric
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Collector) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines += metric.render()
+        for collector in list(self._collectors):
+            try:
+                collected = collector()
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+                continue
+            for name, (kind, help, samples) in collected.items():
+                full_name = f"{self.namespace}_{name}"
+                lines += [f"# HELP {full_name} {help}", f"# TYPE {full_name} {kind}"]
+                lines += [
+                    f"{full_name}{_format_labels(_label_key(labels))} {_format_value(value)}"
+                    for labels, value in samples if value is not None
+                ]
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        self._metrics = {}
+        self._collectors = []
+
+registry = Registry(enabled=os.environ.get("AURA_METRICS", "1") != "0")
+
+class Span:
+    """Times a block (with or async with) into the <name>_seconds histogram"""
+
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self) -> "Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self.started
+        self.histogram.observe(elapsed, **self.labels)
+        if registry.slow_span_seconds is not None and elapsed >= registry.slow_span_seconds:
+            logger.info("slow span", extra={"span": self.histogram.name, "seconds": elapsed, **self.labels})
+
+    async def __aenter__(self) -> "Span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+    async def __aenter__(self) -> "_NoopSpan":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+def _span_histogram(name: str) -> Histogram:
+    histogram = registry._metrics.get(f"{registry.namespace}_{name}_seconds")
+    return histogram if histogram is not None else registry.histogram(f"{name}_seconds", SPANS.get(name))
+
+def span(name: str, **labels: Any) -> Any:
+    """Context manager timing a block; a shared no-op when metrics are disabled"""
+    if not registry.enabled:
+        return _NOOP_SPAN
+    return Span(_span_histogram(name), labels)
+
+def observe(name: str, seconds: float, **labels: Any) -> None:
+    """Record a duration measured elsewhere (e.g. in a worker process)"""
+    if registry.enabled:
+        _span_histogram(name).observe(seconds, **labels)
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed via extra="""
+
+    _reserved = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in self._reserved)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+def configure_logging(level: int = logging.INFO, path: Optional[str] = None, structured: bool = True) -> QueueListener:
+    """
+    Route the root logger through a queue drained by a background thread
+    Logging calls on the event loop then only enqueue the record; formatting
+    and the (possibly blocking) write to stderr or path happen off-loop.
+    """
+    global _listener, _queue_handler
+    stop_logging()
+    handler: logging.Handler = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler()
+    handler.setFormatter(JSONFormatter() if structured else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    _queue_handler = QueueHandler(records)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    _listener = QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_logging() -> None:
+    """Flush buffered records and stop the logging thread"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,283 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+import inspect
+import time
+import heapq
+import logging
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+# Lanes in priority order. Lower lanes only get global slots the lanes above
+# leave free, and their own caps keep headroom for interactive work.
+DEFAULT_LANES = {
+    "interactive": {"priority": 0, "max_concurrency": 8},
+    "background": {"priority": 1, "max_concurrency": 2},
+    "maintenance": {"priority": 2, "max_concurrency": 1}
+}
+
+class Job:
+    """
+    Handle for a scheduled call
+    Await it for the result; cancel() drops it from its queue or, once
+    started, cancels the running coroutine (a process pool call finishes in
+    its worker but its result is discarded).
+    """
+
+    __slots__ = ("name", "lane", "call", "cpu", "deadline", "submitted", "future", "task")
+
+    def __init__(self, name: str, lane: str, call: Callable[[], Any], cpu: bool, deadline: Optional[float]):
+        self.name = name
+        self.lane = lane
+        self.call = call
+        self.cpu = cpu
+        self.deadline = deadline                    # Monotonic time the job should start by, if any
+        self.submitted = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.task: Optional[asyncio.Task] = None
+        self.future.add_done_callback(self._on_done)
+
+    def _on_done(self, future: asyncio.Future) -> None:
+        if future.cancelled() and self.task is not None:
+            self.task.cancel()
+
+    def __await__(self):
+        return self.future.__await__()
+
+    def cancel(self) -> bool:
+        return self.future.cancel()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+class Lane:
+    """Queue, concurrency cap and wait-time statistics of one priority lane"""
+
+    def __init__(self, name: str, priority: int, max_concurrency: int, window: int = 1000):
+        self.name = name
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.running = 0
+        self._queue: List[Tuple[float, int, Job]] = []  # (deadline or inf, sequence, job) heap
+        self._seq = 0
+        self.waits: deque = deque(maxlen=window)     # Seconds from submission to start
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "late": 0}
+
+    def push(self, job: Job) -> None:
+        self._seq += 1
+        deadline = job.deadline if job.deadline is not None else float("inf")
+        heapq.heappush(self._queue, (deadline, self._seq, job))
+        self.stats["submitted"] += 1
+
+    def pop(self) -> Optional[Job]:
+        """Most urgent job still wanted: earliest deadline first, then FIFO"""
+        while self._queue:
+            job = heapq.heappop(self._queue)[2]
+            if not job.future.cancelled():
+                return job
+            self.stats["cancelled"] += 1
+        return None
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, job in self._queue if not job.future.cancelled())
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        def percentile(q: float) -> Optional[float]:
+            return waits[min(len(waits) - 1, int(q * len(waits)))] if waits else None
+        return dict(
+            self.stats,
+            queued=self.queued,
+            running=self.running,
+            max_concurrency=self.max_concurrency,
+            wait_p50=percentile(0.5),
+            wait_p95=percentile(0.95),
+            wait_max=waits[-1] if waits else None
+        )
+
+class Scheduler:
+    """
+    Runs jobs in priority lanes on the event loop
+
+    Each lane has its own concurrency cap and the scheduler a global one
+    (max_running); free slots go to the highest-priority lane with work
+    queued, so long background prompts wait behind UI tasks. Within a lane
+    jobs with a deadline run earliest-deadline-first, ahead of the rest,
+    and starting after the deadline is counted as late. Coroutine functions
+    run on the loop, plain callables in a thread, and cpu=True jobs (pruning,
+    compression, embedding) in a process pool, so their arguments and
+    results must be picklable. every() runs periodic jobs through a lane.
+    """
+
+    def __init__(
+        self,
+        lanes: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_running: int = 8,
+        process_workers: Optional[int] = None
+    ):
+        lanes = lanes or DEFAULT_LANES
+        self.lanes = {
+            name: Lane(name, config["priority"], config["max_concurrency"])
+            for name, config in lanes.items()
+        }
+        self._ordered = sorted(self.lanes.values(), key=lambda lane: lane.priority)
+        self.max_running = max_running              # Jobs running at once across all lanes
+        self.process_workers = process_workers or max(1, (os.cpu_count() or 1) - 1)
+        self._running = 0
+        self._active: set = set()                    # Jobs currently running
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._periodic: Dict[str, asyncio.Task] = {}
+        self._closed = False
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        lane: str = "background",
+        deadline: Optional[float] = None,
+        cpu: bool = False,
+        name: Optional[str] = None,
+        **kwargs: Any
+    ) -> Job:
+        """
+        Queue func(*args, **kwargs) on a lane and return its Job
+        deadline is in seconds from now; cpu runs func in the process pool.
+        """
+        if self._closed:
+            raise RuntimeError("Scheduler is closed")
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown lane: {lane}")
+        if cpu and asyncio.iscoroutinefunction(func):
+            raise ValueError("Coroutine functions cannot run in the process pool")
+        job = Job(
+            name or getattr(func, "__name__", "job"),
+            lane,
+            partial(func, *args, **kwargs),
+            cpu,
+            time.monotonic() + deadline if deadline is not None else None
+        )
+        self.lanes[lane].push(job)
+        self._dispatch()
+        return job
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Submit and wait for the result (cancelling the wait cancels the job)"""
+        return await self.submit(func, *args, **kwargs)
+
+    def every(
+        self,
+        interval: float,
+        func: Callable[..., Any],
+        *args: Any,
+        lane: str = "maintenance",
+        name: Optional[str] = None,
+        cpu: bool = False,
+        **kwargs: Any
+    ) -> asyncio.Task:
+        """Run func through a lane every interval seconds (measured from the end of the last run)"""
+        name = name or getattr(func, "__name__", "job")
+
+        async def loop() -> None:
+            while True:
+                try:
+                    await self.submit(func, *args, lane=lane, name=name, cpu=cpu, **kwargs)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Periodic job {name} failed: {e}")
+                await asyncio.sleep(interval)
+
+        previous = self._periodic.get(name)
+        if previous is not None:
+            previous.cancel()
+        task = self._periodic[name] = asyncio.create_task(loop())
+        return task
+
+    def _dispatch(self) -> None:
+        for lane in self._ordered:
+            while self._running < self.max_running and lane.running < lane.max_concurrency:
+                job = lane.pop()
+                if job is None:
+                    break
+                lane.running += 1
+                self._running += 1
+                self._active.add(job)
+                job.task = asyncio.create_task(self._run(lane, job))
+            if self._running >= self.max_running:
+                break
+
+    async def _run(self, lane: Lane, job: Job) -> None:
+        started = time.monotonic()
+        lane.waits.append(started - job.submitted)
+        if job.deadline is not None and started > job.deadline:
+            lane.stats["late"] += 1
+        try:
+            if job.cpu:
+                result = await asyncio.get_running_loop().run_in_executor(self._process_pool(), job.call)
+            elif inspect.iscoroutinefunction(inspect.unwrap(job.call.func)):
+                result = await job.call()
+            else:
+                result = await asyncio.to_thread(job.call)
+                if inspect.isawaitable(result):
+                    # A plain callable that returns a coroutine (a lambda, a wrapper): run it on the loop
+                    result = await result
+        except asyncio.CancelledError:
+            lane.stats["cancelled"] += 1
+            job.future.cancel()
+            raise
+        except Exception as e:
+            lane.stats["failed"] += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            lane.stats["completed"] += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            lane.running -= 1
+            self._running -= 1
+            self._active.discard(job)
+            if not self._closed:
+                self._dispatch()
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        return self._pool
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth, running jobs, outcomes and wait times per lane"""
+        return {name: lane.snapshot() for name, lane in self.lanes.items()}
+
+    async def close(self) -> None:
+        """Stop periodic jobs, cancel queued and running jobs and shut down the process pool"""
+        self._closed = True
+        tasks = list(self._periodic.values())
+        self._periodic = {}
+        for lane in self._ordered:
+            while True:
+                job = lane.pop()
+                if job is None:
+                    break
+                job.cancel()
+                lane.stats["cancelled"] += 1
+        tasks += [job.task for job in self._active if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._pool is not None:
+            await asyncio.to_thread(self._pool.shutdown, True, cancel_futures=True)
+            self._pool = None
+
+_shared_scheduler: Optional[Scheduler] = None
+
+def get_scheduler() -> Scheduler:
+    """Process-wide scheduler, created on first use"""
+    global _shared_scheduler
+    if _shared_scheduler is None or _shared_scheduler._closed:
+        _shared_scheduler = Scheduler()
+    return _shared_scheduler
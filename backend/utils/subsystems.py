@@ -0,0 +1,168 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+import time
+import logging
+import asyncio
+import importlib
+
+logger = logging.getLogger(__name__)
+
+# A loader builds the component. Coroutine functions run on the event loop
+# (and should push blocking work to a thread); plain callables run in a
+# thread, so their imports and file reads never stall request handling.
+Loader = Callable[["SubsystemRegistry"], Union[Any, Awaitable[Any]]]
+
+class SubsystemUnavailable(Exception):
+    """A subsystem failed to load"""
+
+async def import_module(name: str) -> Any:
+    """Import a module in a worker thread"""
+    return await asyncio.to_thread(importlib.import_module, name)
+
+class Subsystem:
+    """Registration and load state of one component"""
+
+    __slots__ = ("name", "loader", "priority", "warm", "state", "instance", "error", "seconds", "on_demand", "task")
+
+    def __init__(self, name: str, loader: Loader, priority: int, warm: bool):
+        self.name = name
+        self.loader = loader
+        self.priority = priority                    # Lower warms first
+        self.warm = warm                            # False: only ever loaded on first use
+        self.state = "registered"                   # registered, loading, ready or failed
+        self.instance: Any = None
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None        # Load time
+        self.on_demand = False                      # A caller needed it before warm-up got to it
+        self.task: Optional[asyncio.Task] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "priority": self.priority,
+            "seconds": self.seconds,
+            "on_demand": self.on_demand,
+            "error": self.error
+        }
+
+class SubsystemRegistry:
+    """
+    Components registered by name and built only when needed
+
+    Registering is free: nothing is imported until a subsystem is loaded.
+    warm() loads the warm subsystems one at a time in priority order through
+    the scheduler's background lane, so the server answers requests while
+    they load; get() loads a subsystem immediately when a request needs it
+    before warm-up has reached it. Concurrent callers share one load, a
+    failed load is retried on the next get(), and loaders may get() the
+    subsystems they depend on.
+    """
+
+    def __init__(self, scheduler: Optional[Any] = None, lane: str = "background"):
+        self.scheduler = scheduler
+        self.lane = lane                            # Scheduler lane warm-up runs in
+        self._subsystems: Dict[str, Subsystem] = {}
+        self._loaded: List[str] = []                # Load order, closed in reverse
+        self._warmup: Optional[asyncio.Task] = None
+        self.started = time.monotonic()
+
+    def register(self, name: str, loader: Loader, priority: int = 100, warm: bool = True) -> None:
+        if name in self._subsystems:
+            raise ValueError(f"Subsystem already registered: {name}")
+        self._subsystems[name] = Subsystem(name, loader, priority, warm)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._subsystems
+
+    def peek(self, name: str) -> Any:
+        """The component if it is already loaded, else None (never triggers a load)"""
+        subsystem = self._subsystems.get(name)
+        return subsystem.instance if subsystem is not None and subsystem.state == "ready" else None
+
+    def ready(self, name: str) -> bool:
+        return self.peek(name) is not None
+
+    async def get(self, name: str) -> Any:
+        """The component, loading it now if needed"""
+        subsystem = self._subsystems.get(name)
+        if subsystem is None:
+            raise KeyError(f"Unknown subsystem: {name}")
+        if subsystem.state == "ready":
+            return subsystem.instance
+        subsystem.on_demand = True
+        return await self._ensure(subsystem)
+
+    async def _ensure(self, subsystem: Subsystem) -> Any:
+        if subsystem.task is None:
+            subsystem.task = asyncio.create_task(self._load(subsystem))
+        # Shielded: a cancelled caller must not abort a load others may be waiting on
+        await asyncio.shield(subsystem.task)
+        if subsystem.state != "ready":
+            raise SubsystemUnavailable(f"{subsystem.name}: {subsystem.error}")
+        return subsystem.instance
+
+    async def _load(self, subsystem: Subsystem) -> None:
+        subsystem.state = "loading"
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(subsystem.loader):
+                instance = await subsystem.loader(self)
+            else:
+                instance = await asyncio.to_thread(subsystem.loader, self)
+        except Exception as e:
+            subsystem.state = "failed"
+            subsystem.error = f"{type(e).__name__}: {e}"
+            logger.error(f"Loading subsystem {subsystem.name} failed: {subsystem.error}")
+        else:
+            subsystem.instance = instance
+            subsystem.state = "ready"
+            subsystem.error = None
+            self._loaded.append(subsystem.name)
+        finally:
+            subsystem.seconds = time.perf_counter() - started
+            subsystem.task = None
+
+    def warm(self) -> asyncio.Task:
+        """Start loading warm subsystems in the background, highest priority first"""
+        if self._warmup is None:
+            self._warmup = asyncio.create_task(self._warm())
+        return self._warmup
+
+    async def _warm(self) -> None:
+        pending = sorted((s for s in self._subsystems.values() if s.warm), key=lambda s: s.priority)
+        for subsystem in pending:
+            if subsystem.state in ("ready", "loading"):
+                continue
+            try:
+                if self.scheduler is not None:
+                    await self.scheduler.run(self._ensure, subsystem, lane=self.lane, name=f"warm:{subsystem.name}")
+                else:
+                    await self._ensure(subsystem)
+            except SubsystemUnavailable:
+                pass
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Load state, priority and load time per subsystem"""
+        return {name: subsystem.snapshot() for name, subsystem in self._subsystems.items()}
+
+    async def close(self) -> None:
+        """Stop warm-up and close loaded components in reverse load order"""
+        if self._warmup is not None:
+            self._warmup.cancel()
+            await asyncio.gather(self._warmup, return_exceptions=True)
+            self._warmup = None
+        for subsystem in self._subsystems.values():
+            if subsystem.task is not None:
+                subsystem.task.cancel()
+                await asyncio.gather(subsystem.task, return_exceptions=True)
+        for name in reversed(self._loaded):
+            subsystem = self._subsystems[name]
+            close = getattr(subsystem.instance, "close", None)
+            try:
+                result = close() if close is not None else None
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Closing subsystem {name} failed: {e}")
+            subsystem.state = "registered"
+            subsystem.instance = None
+        self._loaded = []